@@ -0,0 +1,210 @@
+"""
+    Micro-benchmarks of the model, rendering and serialization hot paths.
+"""
+import os
+import sys
+import json
+import pickle
+import random
+import timeit
+import argparse
+import platform
+import statistics
+from typing import Callable, Dict
+# rendering is measured without window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame as pg  # pylint: disable=wrong-import-position
+# pylint: disable=wrong-import-position
+from utils.settings import BASE
+from map.grid import Grid
+from player.player import Player
+from game.game import Game
+from online.protocol import encode_message
+
+# default relative slowdown that is reported as regression
+THRESHOLD = 1.25
+
+
+class BenchmarkSuite:
+    """Class that times registered cases and compares results with a baseline.
+    Every case is a function that prepares data and returns the measured function,
+    so preparation is not measured.
+
+    Attributes:
+        cases - Dict[str, Callable] - cases by name.
+        repeat - int - count of measurements of every case, the best one is reported.
+        results - Dict[str, Dict[str, float]] - results by name of the case.
+    """
+    def __init__(self, repeat: int = 5):
+        """Create suite without cases."""
+        self.cases: Dict[str, Callable[[], Callable[[], None]]] = {}
+        self.repeat = repeat
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def case(self, name: str) -> Callable:
+        """Decorator that registers case under input name."""
+        def register(setup: Callable[[], Callable[[], None]]) -> Callable:
+            self.cases[name] = setup
+            return setup
+        return register
+
+    def run(self, selected: str = "") -> None:
+        """Time all cases which names contain input text. Count of calls in one
+        measurement is chosen so the measurement takes at least 0.2 s.
+        Random generator is seeded before every case, so every run measures the same data.
+
+        Attributes:
+            selected - str - part of the case name, by default all cases.
+        """
+        for name, setup in self.cases.items():
+            if selected not in name:
+                continue
+            random.seed(0)
+            timer = timeit.Timer(setup())
+            number, _ = timer.autorange()
+            times = [t / number * 1e6 for t in timer.repeat(self.repeat, number)]
+            self.results[name] = {
+                "best_us": min(times),
+                "median_us": statistics.median(times),
+                "number": number
+            }
+            print(f"{name:40s} {min(times):12.2f} us")
+
+    def save(self, path: str) -> None:
+        """Write results with information about the machine to JSON file."""
+        data = {
+            "python": platform.python_version(),
+            "pygame": pg.version.ver,
+            "machine": platform.platform(),
+            "results": self.results
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+
+    def compare(self, path: str, threshold: float = THRESHOLD) -> bool:
+        """Compare results with the baseline from JSON file (see save)
+        and print ratio of the times for every case.
+
+        Attributes:
+            path - str - path of the baseline.
+            threshold - float - ratio of the times that is regression.
+        Return:
+            bool - True if some case is slower than threshold times the baseline.
+        """
+        with open(path, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regression = False
+        for name, result in self.results.items():
+            if name not in baseline:
+                print(f"{name:40s} {'new':>12s}")
+                continue
+            ratio = result["best_us"] / baseline[name]["best_us"]
+            slower = ratio > threshold
+            regression |= slower
+            print(f"{name:40s} {baseline[name]['best_us']:12.2f} -> {result['best_us']:12.2f} us"
+                  f" {ratio:6.2f}x{'  REGRESSION' if slower else ''}")
+        return regression
+
+
+SUITE = BenchmarkSuite()
+
+
+@SUITE.case("Grid()")
+def grid_init() -> Callable:
+    """Create empty grid."""
+    return Grid
+
+
+@SUITE.case("Grid.check_neighbors")
+def check_neighbors() -> Callable:
+    """Check neighbours of one cell in the middle of the board with ships."""
+    player = Player(0)
+    player.random_set_ships()
+    return lambda: player.board.check_neighbors(5, 5)
+
+
+@SUITE.case("Player.random_set_ships")
+def random_set_ships() -> Callable:
+    """Set random ships on the new board (with creation of the board and fleet)."""
+    return Player(0).reset
+
+
+@SUITE.case("Fleet.update_sunk")
+def update_sunk() -> Callable:
+    """Update sunk attribute of the whole fleet."""
+    player = Player(0)
+    player.random_set_ships()
+    return lambda: player.fleet.update_sunk(player.board)
+
+
+@SUITE.case("Ship.update_position")
+def update_position() -> Callable:
+    """Move the biggest ship on its own position (always valid move)."""
+    player = Player(0)
+    player.random_set_ships()
+    ship = next(iter(player.fleet.ships[-1]))
+    first = ship.pos[0]
+    return lambda: ship.update_position(first.y, first.x, player.board, ship.orientation)
+
+
+@SUITE.case("pickle Game")
+def pickle_game() -> Callable:
+    """Pickle the whole new game (before drawing, drawn screen is not picklable)."""
+    game = Game()
+    game.player.random_set_ships()
+    return lambda: pickle.dumps(game)
+
+
+@SUITE.case("encode set_user_ships")
+def encode_ships() -> Callable:
+    """Encode positions of the players ships for the server."""
+    player = Player(0)
+    player.random_set_ships()
+    return lambda: encode_message("set_user_ships", 0, player.board, player.fleet)
+
+
+@SUITE.case("Game.all_draw (nothing changed)")
+def all_draw_cached() -> Callable:
+    """Draw frame of the game where nothing changed since the last frame."""
+    game = Game()
+    game.player.random_set_ships()
+    game.all_draw(None)
+    return lambda: game.all_draw(None)
+
+
+@SUITE.case("Game.all_draw (whole screen)")
+def all_draw_full() -> Callable:
+    """Draw frame of the game where whole screen must be redrawn."""
+    game = Game()
+    game.player.random_set_ships()
+
+    def draw():
+        game.screen.invalidate()
+        game.all_draw(None)
+    return draw
+
+
+def main():
+    """Parse arguments, run benchmarks, save and compare results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("-o", "--output", help="write results to JSON file")
+    parser.add_argument("-c", "--compare", help="compare results with baseline JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD,
+                        help="ratio of the times that is reported as regression")
+    parser.add_argument("-k", "--select", default="", help="run only cases containing text")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="count of measurements")
+    args = parser.parse_args()
+
+    pg.init()
+    pg.display.set_mode((BASE["WIDTH"], BASE["HEIGHT"]))
+    SUITE.repeat = args.repeat
+    SUITE.run(args.select)
+    if args.output:
+        SUITE.save(args.output)
+    if args.compare and SUITE.compare(args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
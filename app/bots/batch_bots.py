@@ -0,0 +1,211 @@
+"""
+    Computer players that choose shots on many boards at once (see BatchBoards).
+"""
+from typing import Tuple
+import numpy as np
+# src.map
+from map.bitgrid import SIZE
+# src.engine
+from engine.batch_board import CELLS_CNT, BatchBoards, placement_matrix
+# src.bots
+from bots.density_bot import HIT_WEIGHT
+
+# cells with even sum of coordinates (same as hunt_target_bot.PARITY)
+PARITY = np.add.outer(np.arange(SIZE), np.arange(SIZE)) % 2 == 0
+# neighbours of every cell: above, below, left and right, -1 outside the board
+NEIGHBOURS = np.array([[(x + dx) * SIZE + y + dy if 0 <= x + dx < SIZE and 0 <= y + dy < SIZE
+                        else -1 for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+                       for x in range(SIZE) for y in range(SIZE)])
+
+
+def pick(boards: np.ndarray, cells: np.ndarray, count: int,
+         rng: np.random.Generator) -> np.ndarray:
+    """Return random candidate for every board (every board must have some candidate).
+
+    Attributes:
+        boards - np.ndarray - sorted indexes of the boards (from 0 to count - 1)
+                 of all candidates.
+        cells - np.ndarray - indexes of the cells (x * SIZE + y) of all candidates.
+        count - int - count of the boards.
+        rng - np.random.Generator - generator of random numbers.
+    Return:
+        np.ndarray - indexes of the chosen cells.
+    """
+    counts = np.bincount(boards, minlength=count)
+    starts = np.cumsum(counts) - counts
+    return cells[starts + (rng.random(count) * counts).astype(np.intp)]
+
+
+class BatchRandomBot:
+    """Same strategy as RandomBot for many boards at once. For every board bot has
+    random order of all cells and shoots the next cell in this order that was not shot,
+    so the choice doesn't depend on the count of cells.
+
+    Attributes:
+        rng - np.random.Generator - generator of random numbers.
+        order - np.ndarray | None - int8 array (K, CELLS_CNT), order of the cells
+                for every board, None before the first shot.
+        pos - np.ndarray | None - position of the next cell in the order for every board.
+    """
+    def __init__(self, rng: np.random.Generator):
+        """Create bot with input generator of random numbers."""
+        self.rng = rng
+        self.order = None
+        self.pos = None
+
+    def cell_order(self, count: int) -> np.ndarray:
+        """Return random order of all cells for every board.
+
+        Attributes:
+            count - int - count of the boards.
+        Return:
+            np.ndarray - int8 array (count, CELLS_CNT).
+        """
+        cells = np.tile(np.arange(CELLS_CNT, dtype=np.int8), (count, 1))
+        return self.rng.permuted(cells, axis=1)
+
+    def hunt(self, boards: BatchBoards, games: np.ndarray) -> np.ndarray:
+        """Return the next not shot cell in the order for every input board.
+
+        Attributes:
+            boards - BatchBoards - enemy boards (only shot cells are used).
+            games - np.ndarray - indexes of the boards.
+        Return:
+            np.ndarray - indexes of the cells (x * SIZE + y).
+        """
+        if self.order is None or len(self.order) != len(boards):
+            self.order = self.cell_order(len(boards))
+            self.pos = np.zeros(len(boards), dtype=np.intp)
+        states = boards.states.reshape(len(boards), CELLS_CNT)
+        todo = games
+        while todo.size:
+            shot = states[todo, self.order[todo, self.pos[todo]]] > 1
+            todo = todo[shot]
+            self.pos[todo] += 1
+        return self.order[games, self.pos[games]].astype(np.intp)
+
+    def choose_shots(self, boards: BatchBoards, games: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Choose cell for every input board.
+
+        Attributes:
+            boards - BatchBoards - enemy boards (only shot cells and sunk ships are used).
+            games - np.ndarray - indexes of the boards.
+        Return:
+            Tuple[np.ndarray, np.ndarray] - x (rows) and y (columns) of the cells.
+        """
+        return np.divmod(self.hunt(boards, games), SIZE)
+
+
+class BatchHuntTargetBot(BatchRandomBot):
+    """Same strategy as HuntTargetBot for many boards at once. In hunt mode
+    order of the cells has all cells of the chessboard pattern first.
+
+    Attributes:
+        rng - np.random.Generator - generator of random numbers.
+        order - np.ndarray | None - same as in BatchRandomBot.
+        pos - np.ndarray | None - same as in BatchRandomBot.
+    """
+    def cell_order(self, count: int) -> np.ndarray:
+        """Return random order of the cells of the chessboard pattern
+        followed by random order of other cells for every board.
+
+        Attributes:
+            count - int - count of the boards.
+        Return:
+            np.ndarray - int8 array (count, CELLS_CNT).
+        """
+        parts = [np.tile(np.flatnonzero(cells).astype(np.int8), (count, 1))
+                 for cells in (PARITY.ravel(), ~PARITY.ravel())]
+        return np.hstack([self.rng.permuted(part, axis=1) for part in parts])
+
+    @staticmethod
+    def targets(states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return cells that bot can choose in target mode (see HuntTargetBot.candidates).
+        Only hit cells are visited: bot shoots only next to the hit cells until the ship
+        is sunk, so every board has one ship with hit cells in one piece of the line.
+        Then free neighbours of different hit cells are different cells
+        and the next part of the ship is always one of them.
+
+        Attributes:
+            states - np.ndarray - array (n, CELLS_CNT), states of the boards
+                     with hit but not sunk ship.
+        Return:
+            Tuple[np.ndarray, np.ndarray] - indexes of the boards (sorted)
+            and of the cells of all candidates.
+        """
+        boards, hits = np.nonzero(states == 2)
+        counts = np.bincount(boards, minlength=len(states))
+        first, last = hits[np.cumsum(counts) - counts], hits[np.cumsum(counts) - 1]
+        # ship with two hit cells in line is finished along this line
+        lines = np.empty((len(states), 4), dtype=bool)
+        lines[:, :2] = ((counts < 2) | (first % SIZE == last % SIZE))[:, None]
+        lines[:, 2:] = ((counts < 2) | (first // SIZE == last // SIZE))[:, None]
+        cells = np.where(lines[boards], NEIGHBOURS[hits], -1)
+        boards = np.broadcast_to(boards[:, None], cells.shape)
+        free = (cells >= 0) & (states[boards, cells] <= 1)
+        return boards[free], cells[free]
+
+    def choose_shots(self, boards: BatchBoards, games: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Choose cell for every input board: next cell in the order in hunt mode
+        and random target if some ship is hit but not sunk.
+
+        Attributes:
+            boards - BatchBoards - enemy boards (only shot cells and sunk ships are used).
+            games - np.ndarray - indexes of the boards.
+        Return:
+            Tuple[np.ndarray, np.ndarray] - x (rows) and y (columns) of the cells.
+        """
+        left = boards.left[games]
+        target = ((left > 0) & (left < boards.sizes)).any(axis=1)
+        cells = np.empty(len(games), dtype=np.intp)
+        cells[~target] = self.hunt(boards, games[~target])
+        if target.any():
+            states = boards.states[games[target]].reshape(-1, CELLS_CNT)
+            cells[target] = pick(*self.targets(states), len(states), self.rng)
+        return np.divmod(cells, SIZE)
+
+
+class BatchDensityBot(BatchRandomBot):
+    """Same strategy as DensityBot for many boards at once. Counts of positions
+    for all boards are computed by one matrix multiplication for every ship size.
+
+    Attributes:
+        rng - np.random.Generator - generator of random numbers.
+    """
+    @staticmethod
+    def heat_map(boards: BatchBoards, games: np.ndarray) -> np.ndarray:
+        """Return weighted count of consistent positions of not sunk ships for every cell
+        of every input board (see DensityBot.heat_map).
+
+        Attributes:
+            boards - BatchBoards - enemy boards (only shot cells and sunk ships are used).
+            games - np.ndarray - indexes of the boards.
+        Return:
+            np.ndarray - array (n, CELLS_CNT).
+        """
+        states = boards.states[games].reshape(len(games), CELLS_CNT)
+        blocked = (states >= 3).astype(np.float64)
+        hits = (states == 2).astype(np.float64)
+        not_sunk = boards.left[games] > 0
+        heat = np.zeros((len(games), CELLS_CNT))
+        for size in np.unique(boards.sizes):
+            remaining = (not_sunk & (boards.sizes == size)).sum(axis=1)
+            matrix = placement_matrix(int(size))
+            weight = (blocked @ matrix.T == 0) * (1 + HIT_WEIGHT * (hits @ matrix.T))
+            heat += remaining[:, None] * (weight @ matrix)
+        return heat
+
+    def choose_shots(self, boards: BatchBoards, games: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Choose not shot cell with the highest density on every input board,
+        random if there are more such cells.
+
+        Attributes:
+            boards - BatchBoards - enemy boards (only shot cells and sunk ships are used).
+            games - np.ndarray - indexes of the boards.
+        Return:
+            Tuple[np.ndarray, np.ndarray] - x (rows) and y (columns) of the cells.
+        """
+        free = boards.states[games].reshape(len(games), CELLS_CNT) <= 1
+        # counts are whole numbers, so noise only breaks ties
+        scores = self.heat_map(boards, games) + 0.5 * self.rng.random(free.shape, np.float32)
+        return np.divmod(np.argmax(np.where(free, scores, -1), axis=1), SIZE)
@@ -0,0 +1,69 @@
+"""
+    Class that represents computer player that shoots by probability density.
+"""
+import random
+from collections import Counter
+import numpy as np
+# src.map
+from map.bitgrid import SIZE
+# src.engine
+from engine.board import Board
+from engine.batch_board import CELLS_CNT, mask_to_vector, placement_matrix
+
+# placements through already hit (not sunk) cells are this times more probable
+HIT_WEIGHT = 50
+
+
+class DensityBot:
+    """Class that represents computer player that shoots by probability density.
+    For every ship that is not sunk yet, all its positions that are consistent with
+    already shot cells (don't cover missed or dead cells) are counted for every cell
+    at once by matrix multiplication. Positions through hit cells are preferred,
+    so after hit bot finishes the ship. Bot sees only shot cells and sunk ships,
+    never positions of not hit ships.
+
+    Attributes:
+        rng - random.Random - generator of random numbers for choosing between best cells.
+    """
+    def __init__(self, rng: random.Random = None):
+        """Create bot with input generator of random numbers."""
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def heat_map(board: Board) -> np.ndarray:
+        """Return weighted count of consistent positions of not sunk ships for every cell.
+        Already shot cells have zero.
+
+        Attributes:
+            board - Board - enemy board (only shot cells and sunk ships are used).
+        Return:
+            np.ndarray - vector of CELLS_CNT values in order of cell indexes.
+        """
+        grid = board.grid
+        blocked = mask_to_vector(grid.misses | grid.dead)
+        open_hits = grid.hits & ~grid.dead
+        hits = mask_to_vector(open_hits)
+        heat = np.zeros(CELLS_CNT)
+        remaining = Counter(size for size, sunk in zip(board.sizes, board.sunk) if not sunk)
+        for size, cnt in remaining.items():
+            matrix = placement_matrix(size)
+            weight = (matrix @ blocked == 0).astype(np.float64)
+            if open_hits:
+                weight *= 1 + HIT_WEIGHT * (matrix @ hits)
+            heat += cnt * (weight @ matrix)
+        heat[mask_to_vector(grid.hits | grid.misses).astype(bool)] = 0
+        return heat
+
+    def choose_shot(self, board: Board) -> tuple:
+        """Choose cell with the highest density, random if there are more such cells.
+
+        Attributes:
+            board - Board - enemy board (only shot cells and sunk ships are used).
+        Return:
+            Tuple[int, int] - x (row) and y (column) of the cell.
+        """
+        heat = self.heat_map(board)
+        if heat.max() <= 0:
+            heat = 1 - mask_to_vector(board.grid.hits | board.grid.misses)
+        best = np.flatnonzero(heat == heat.max())
+        return divmod(int(best[self.rng.randrange(len(best))]), SIZE)
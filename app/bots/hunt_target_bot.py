@@ -0,0 +1,68 @@
+"""
+    Class that represents computer player that hunts ships and then finishes them.
+"""
+import random
+# src.map
+from map.bitgrid import SIZE, FULL, NOT_FIRST_COL, NOT_LAST_COL, random_cell
+# src.engine
+from engine.board import Board
+
+# all cells with even sum of coordinates, every ship bigger than 1 covers at least one
+PARITY = sum(1 << (x * SIZE + y) for x in range(SIZE) for y in range(SIZE) if (x + y) % 2 == 0)
+
+
+def vertical_neighbours(mask: int) -> int:
+    """Return mask of the cells above and below the cells from the mask."""
+    return ((mask << SIZE) | (mask >> SIZE)) & FULL
+
+
+def horizontal_neighbours(mask: int) -> int:
+    """Return mask of the cells left and right from the cells from the mask."""
+    return ((mask << 1) & NOT_FIRST_COL) | ((mask >> 1) & NOT_LAST_COL)
+
+
+class HuntTargetBot:
+    """Class that represents computer player with classic hunt and target strategy.
+    In hunt mode bot shoots random not shot cells of the chessboard pattern.
+    After hit (target mode) bot shoots neighbours of the hit cells,
+    along the line of the ship if it has two or more hit cells.
+
+    Attributes:
+        rng - random.Random - generator of random numbers.
+    """
+    def __init__(self, rng: random.Random = None):
+        """Create bot with input generator of random numbers."""
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def candidates(board: Board) -> int:
+        """Return mask of the cells that bot can choose from.
+
+        Attributes:
+            board - Board - enemy board (only shot cells are used).
+        Return:
+            int - mask of not shot cells.
+        """
+        grid = board.grid
+        free = FULL & ~(grid.hits | grid.misses)
+        open_hits = grid.hits & ~grid.dead
+        if open_hits:
+            vertical = vertical_neighbours(open_hits) & free
+            horizontal = horizontal_neighbours(open_hits) & free
+            if open_hits & vertical_neighbours(open_hits) and vertical:
+                return vertical
+            if open_hits & horizontal_neighbours(open_hits) and horizontal:
+                return horizontal
+            if vertical | horizontal:
+                return vertical | horizontal
+        return free & PARITY or free
+
+    def choose_shot(self, board: Board) -> tuple:
+        """Choose random cell from candidates.
+
+        Attributes:
+            board - Board - enemy board (only shot cells are used).
+        Return:
+            Tuple[int, int] - x (row) and y (column) of the cell.
+        """
+        return divmod(random_cell(self.candidates(board), self.rng), SIZE)
@@ -0,0 +1,39 @@
+"""
+    Class that represents computer player that shoots randomly.
+"""
+import random
+# src.map
+from map.bitgrid import SIZE, FULL, random_cell
+# src.engine
+from engine.board import Board
+
+
+class RandomBot:
+    """Class that represents computer player that shoots in random cells
+    that were not shot yet. Used as the weakest opponent in tournaments.
+
+    Attributes:
+        rng - random.Random - generator of random numbers.
+    """
+    def __init__(self, rng: random.Random = None):
+        """Create bot with input generator of random numbers."""
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def candidates(board: Board) -> int:
+        """Return mask of the cells that bot can choose from (all not shot cells).
+
+        Attributes:
+            board - Board - enemy board (only shot cells are used).
+        """
+        return FULL & ~(board.grid.hits | board.grid.misses)
+
+    def choose_shot(self, board: Board) -> tuple:
+        """Choose random cell from candidates.
+
+        Attributes:
+            board - Board - enemy board (only shot cells are used).
+        Return:
+            Tuple[int, int] - x (row) and y (column) of the cell.
+        """
+        return divmod(random_cell(self.candidates(board), self.rng), SIZE)
@@ -3,18 +3,30 @@
 """
 import sys
 import copy
+from collections import deque
 from typing import List
 import pygame as pg
 
 from utils.settings import COLORS, BASE, FONT_SIZE, FONT_NAME, CHAT
 from utils.helper import draw_text, draw_rect
+from utils.text_wrapper import TextWrapper
 from online.network import Network
 
+# splits chat texts on lines that can be shown in the chat boxes
+WRAPPER = TextWrapper(FONT_NAME["CHAT"], FONT_SIZE["CHAT"], 280)
+
 
 class Chat:
     """Class that represents chat between two players.
 
     Attributes:
+        messages - List[str] - lines received from the server (in order of the chat log),
+                   then sent lines that are not confirmed by the server
+                   and lines that are not sent yet.
+        last_seq - int - sequence number of the last line received from the server
+                   (also count of received lines at the start of messages).
+        sent - deque - counts of lines in sent messages that are not confirmed yet.
+        unsent - int - count of lines at the end of messages that are not sent yet.
     """
     def __init__(self):
         self.input_box = pg.Rect(BASE["WIDTH"] // 2 - 150, BASE["HEIGHT"] // 2 + 300, 300, 23)
@@ -23,6 +35,9 @@ class Chat:
         self.active = False
         self.text = ''
         self.messages = []
+        self.last_seq = 0
+        self.sent = deque()
+        self.unsent = 0
         self.scroll = 0
 
     def draw(self, net: Network) -> None:
@@ -46,41 +61,19 @@ class Chat:
         """
         return self.input_box.collidepoint(x, y) or self.output_box.collidepoint(x, y)
 
-    @staticmethod
-    def get_text_width(text: str) -> int:
-        """Get text as string and calculate his width using chat's font.
-
-        Attributes:
-            text - str - text of the message.
-        Return:
-            int - width of the text.
-        """
-        font = pg.font.SysFont(FONT_NAME["CHAT"], FONT_SIZE["CHAT"])
-        return font.size(text)[0]
-
     def split_text(self, box: pg.Rect = None) -> List[str]:
         """Split input text on parts that can be shown in the output chat box.
+        Split texts are cached, so unchanged text is not split again (see TextWrapper).
 
         Attributes:
-            box - pg.Rect - output text box,
-            by default None for split text in message list.
+            box - pg.Rect - output text box, its height is increased for every part
+            after the first, by default None for split text in message list.
         Return:
-            List[int] - list of split parts of the text.
+            List[str] - list of split parts of the text.
         """
-        split_texts = []
-        tmp_text = self.text
-        txt_part = ''
-        for c in self.text:
-            txt_part += c
-            text_width = self.get_text_width(txt_part)
-            if text_width > 280:
-                tmp_text = tmp_text[len(txt_part):]
-                split_texts.append(txt_part[:-1])
-                if box is not None:
-                    box.h += 20
-                tmp_text += txt_part[-1]
-                txt_part = ''
-        split_texts.append(tmp_text)
+        split_texts = list(WRAPPER.wrap(self.text))
+        if box is not None:
+            box.h += 20 * (len(split_texts) - 1)
         return split_texts
 
     def input_text_box(self) -> None:
@@ -96,16 +89,70 @@ class Chat:
             draw_text(txt, dest, FONT_SIZE["CHAT"], FONT_NAME["CHAT"], COLORS["BLACK"])
             ofs += 20
 
+    def send_messages(self, net: Network) -> None:
+        """If player entered new messages, send them to the server (see post_lines).
+
+        Attributes:
+            net - Network - player part of online.
+        """
+        if self.unsent:
+            self.post_lines(net)
+
+    def post_lines(self, net: Network) -> None:
+        """Send lines that are not sent yet (can be none) with the last received
+        sequence number to the server. Server answers by all lines after this number,
+        answer comes later (see receive).
+
+        Attributes:
+            net - Network - player part of online.
+        """
+        net.post(("chat", self.last_seq, self.messages[len(self.messages) - self.unsent:]))
+        self.sent.append(self.unsent)
+        self.unsent = 0
+
+    def resume(self, net: Network) -> None:
+        """Connection was resumed (see Network.reconnect), answers on the sent lines
+        were lost. Send all not confirmed lines again and get all missed lines.
+
+        Attributes:
+            net - Network - player part of online.
+        """
+        self.unsent += sum(self.sent)
+        self.sent.clear()
+        self.post_lines(net)
+
+    def receive(self, seq: int, lines: List[str], own: bool = False) -> None:
+        """Insert lines from the server after already received lines.
+        Lines that were already received are skipped. If it is the answer on players
+        message, his sent lines are among the received lines, so they are not kept
+        as unconfirmed anymore. Lines from sequence number 0 are the whole chat log
+        (log could be replaced, see Room.leave and Room.adopt), so they replace
+        all received lines.
+
+        Attributes:
+            seq - int - sequence number before the first line.
+            lines - List[str] - lines from the server.
+            own - bool - True if it is the answer on players message (see post_lines).
+        """
+        pending = self.messages[self.last_seq:]
+        if own and self.sent:
+            pending = pending[self.sent.popleft():]
+        if seq == 0:
+            self.last_seq = 0
+        new = lines[max(0, self.last_seq - seq):]
+        self.messages = self.messages[:self.last_seq] + new + pending
+        self.last_seq += len(new)
+
     def output_text_box(self, net: Network) -> None:
         """Draw box where is all chat messages.
-        Firstly ask server if other player sent some messages and sent
-        his list of messages. Then draw output box (rect) with text from list
-        of messages (self.messages).
+        Firstly, if player entered new messages, send new lines to the server
+        (lines of other player are pushed by the server). Then draw output box (rect)
+        with text from list of messages (self.messages).
 
         Attributes:
             net - Network - player part of online.
         """
-        self.messages = net.send(("chat", self.messages))
+        self.send_messages(net)
 
         dst_label = (BASE["WIDTH"] // 2 - 20, BASE["HEIGHT"] // 2 + 160)
         draw_text("Chat", dst_label, FONT_SIZE["CHAT"])
@@ -160,6 +207,7 @@ class Chat:
                         txt = "> " + txt if i == 0 else "   " + txt
                         self.messages.append(txt)
                     self.text = ''
+                    self.unsent += len(txt_split)
                 elif event.key == pg.K_BACKSPACE:
                     self.text = self.text[:-1]
                 else:
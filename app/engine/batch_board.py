@@ -0,0 +1,263 @@
+"""
+    Class that represents many boards stored in NumPy arrays.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+import numpy as np
+# src.map
+from map.bitgrid import SIZE
+# src.ships
+from ships.placement import FLEET_SIZES, ship_placements
+# src.engine
+from engine.board import Board
+
+CELLS_CNT = SIZE * SIZE
+MASK_BYTES = (CELLS_CNT + 7) // 8
+# random positions tried for every ship before the exact choice (see choose_free)
+TRIES = 4
+
+
+def mask_to_vector(mask: int) -> np.ndarray:
+    """Convert mask of the cells (see BitGrid) to vector with one 0/1 value for every cell.
+
+    Attributes:
+        mask - int - mask of the cells.
+    Return:
+        np.ndarray - vector of CELLS_CNT float values in order of cell indexes
+        (float, so matrix products are done by BLAS, all counts are still exact).
+    """
+    raw = np.frombuffer(mask.to_bytes(MASK_BYTES, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:CELLS_CNT].astype(np.float64)
+
+
+@lru_cache(maxsize=None)
+def placement_matrix(size: int) -> np.ndarray:
+    """Return matrix of all positions of the ship with input size on the empty board.
+    Every row is one position (see ship_placements) as vector of cells.
+    Computed only once for every size.
+
+    Attributes:
+        size - int - size of the ship.
+    Return:
+        np.ndarray - matrix with shape (count of positions, CELLS_CNT).
+    """
+    return np.stack([mask_to_vector(p.mask) for p in ship_placements(size)])
+
+
+@lru_cache(maxsize=None)
+def placement_cells(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return indexes of the cells of every position of the ship with input size
+    and of the cells around it (see ship_placements). Positions have different count
+    of cells around, so shorter rows are filled by their first cell.
+    Computed only once for every size.
+
+    Attributes:
+        size - int - size of the ship.
+    Return:
+        Tuple[np.ndarray, np.ndarray] - arrays with shapes (count of positions, size)
+        and (count of positions, max count of cells around the ship).
+    """
+    ships = np.stack([np.flatnonzero(mask_to_vector(p.mask)) for p in ship_placements(size)])
+    around = [np.flatnonzero(mask_to_vector(p.halo & ~p.mask)) for p in ship_placements(size)]
+    width = max(len(cells) for cells in around)
+    around = np.stack([np.pad(cells, (0, width - len(cells)), mode="edge") for cells in around])
+    return ships, around
+
+
+def choose_free(blocked: np.ndarray, size: int,
+                rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Choose random position of the ship with input size that has no blocked cell
+    on every board. Random position is accepted if it is free, so every free position
+    has the same chance. Boards where all TRIES failed (only few positions are free)
+    choose from all free positions counted by the matrix product.
+
+    Attributes:
+        blocked - np.ndarray - bool array (K, CELLS_CNT), cells of placed ships
+                  and their neighbours.
+        size - int - size of the ship.
+        rng - np.random.Generator - generator of random numbers.
+    Return:
+        Tuple[np.ndarray, np.ndarray] - indexes of the positions (see ship_placements)
+        and for every board True if some position was free.
+    """
+    ships, _ = placement_cells(size)
+    chosen = np.zeros(len(blocked), dtype=np.intp)
+    todo = np.arange(len(blocked))
+    for _ in range(TRIES):
+        positions = rng.integers(len(ships), size=todo.size)
+        free = ~blocked[todo[:, None], ships[positions]].any(axis=1)
+        chosen[todo[free]] = positions[free]
+        todo = todo[~free]
+    # first position where count of free positions before it is bigger
+    # than random number below count of all
+    matrix = placement_matrix(size).astype(np.float32)
+    free = np.cumsum(blocked[todo].astype(np.float32) @ matrix.T == 0, axis=1, dtype=np.int16)
+    limit = (rng.random(todo.size) * free[:, -1]).astype(np.int16)
+    chosen[todo] = np.argmax(free > limit[:, None], axis=1)
+    placed = np.ones(len(blocked), dtype=bool)
+    placed[todo] = free[:, -1] > 0
+    return chosen, placed
+
+
+def sample_positions(count: int, rng: np.random.Generator,
+                     sizes: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """Choose random positions of the ships for count boards (see BatchBoards.random).
+
+    Attributes:
+        count - int - count of the boards.
+        rng - np.random.Generator - generator of random numbers.
+        sizes - Tuple[int, ...] - sizes of the ships.
+    Return:
+        Tuple[np.ndarray, np.ndarray] - indexes of the positions (see ship_placements)
+        with shape (count, count of ships) and for every board True
+        if all ships were placed.
+    """
+    chosen = np.zeros((count, len(sizes)), dtype=np.intp)
+    blocked = np.zeros((count, CELLS_CNT), dtype=bool)
+    placed = np.ones(count, dtype=bool)
+    boards = np.arange(count)[:, None]
+    for idx in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        chosen[:, idx], free = choose_free(blocked, sizes[idx], rng)
+        placed &= free
+        for cells in placement_cells(sizes[idx]):
+            blocked[boards, cells[chosen[:, idx]]] = True
+    return chosen, placed
+
+
+class BatchBoards:
+    """Class that represents K boards stored in NumPy arrays, so shots on all boards
+    are resolved at once. Rules are the same as in Board (and Ship.set_sunk with
+    Grid.around_sunk_ship): hit ship part is hit, if it was the last not hit part,
+    all cells of the ship are dead and all empty cells around it are missed.
+
+    Attributes:
+        sizes - np.ndarray - sizes of the ships in the same order as Fleet.itr_fleet.
+        states - np.ndarray - int8 array (K, SIZE, SIZE), states of all cells
+                 (same as in Cell, indexed by [board, x, y]).
+        ship_ids - np.ndarray - int8 array (K, SIZE, SIZE), index of the ship in the cell,
+                   -1 for cells without ship.
+        left - np.ndarray - int8 array (K, count of ships), not hit parts of every ship.
+        positions - np.ndarray - array (K, count of ships), index of the position of every
+                    ship in ship_placements of its size.
+    """
+    def __init__(self, count: int, sizes: Tuple[int, ...] = FLEET_SIZES):
+        """Create count empty boards, ships are not on the boards."""
+        self.sizes = np.array(sizes)
+        self.states = np.zeros((count, SIZE, SIZE), dtype=np.int8)
+        self.ship_ids = np.full((count, SIZE, SIZE), -1, dtype=np.int8)
+        self.left = np.tile(self.sizes, (count, 1)).astype(np.int8)
+        self.positions = np.zeros((count, len(sizes)), dtype=np.intp)
+
+    def __len__(self) -> int:
+        """Return count of the boards."""
+        return len(self.states)
+
+    @classmethod
+    def from_boards(cls, boards: List[Board]) -> 'BatchBoards':
+        """Create boards with the same ships and states as input boards.
+
+        Attributes:
+            boards - List[Board] - boards with all ships on the board.
+        Return:
+            BatchBoards - new boards.
+        """
+        batch = cls(len(boards), boards[0].sizes)
+        positions = {size: {p.mask: i for i, p in enumerate(ship_placements(size))}
+                     for size in set(boards[0].sizes)}
+        for k, board in enumerate(boards):
+            batch.states[k] = np.reshape(board.states(), (SIZE, SIZE))
+            for idx, mask in enumerate(board.ships):
+                cells = mask_to_vector(mask).reshape(SIZE, SIZE).astype(bool)
+                batch.ship_ids[k][cells] = idx
+                batch.positions[k, idx] = positions[board.sizes[idx]][mask]
+                batch.left[k, idx] -= np.count_nonzero(cells & (batch.states[k] != 1))
+        return batch
+
+    @classmethod
+    def random(cls, count: int, rng: np.random.Generator,
+               sizes: Tuple[int, ...] = FLEET_SIZES) -> 'BatchBoards':
+        """Create count boards with random legal positions of all ships. Same as in
+        PlacementEngine, bigger ships are placed first and every ship is chosen from
+        positions that don't touch already placed ships, but for all boards at once.
+        Boards where some ship has no free position are generated again.
+
+        Attributes:
+            count - int - count of the boards.
+            rng - np.random.Generator - generator of random numbers.
+            sizes - Tuple[int, ...] - sizes of the ships.
+        Return:
+            BatchBoards - new boards.
+        """
+        batch = cls(count, sizes)
+        chosen = np.zeros((count, len(sizes)), dtype=np.intp)
+        pending = np.arange(count)
+        while pending.size:
+            chosen[pending], placed = sample_positions(pending.size, rng, sizes)
+            pending = pending[~placed]
+        batch.positions = chosen
+        boards = np.arange(count)[:, None]
+        for idx, size in enumerate(sizes):
+            cells = placement_cells(size)[0][chosen[:, idx]]
+            batch.states.reshape(count, CELLS_CNT)[boards, cells] = 1
+            batch.ship_ids.reshape(count, CELLS_CNT)[boards, cells] = idx
+        return batch
+
+    def sunk(self) -> np.ndarray:
+        """Return bool array (K, count of ships), True if ship is sunk."""
+        return self.left == 0
+
+    def is_defeated(self, games: np.ndarray = None) -> np.ndarray:
+        """Return bool array, True if all ships on the board are sunk.
+
+        Attributes:
+            games - np.ndarray - indexes of the boards, by default all boards.
+        """
+        left = self.left if games is None else self.left[games]
+        return ~left.any(axis=1)
+
+    def shoot(self, games: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Resolve one shot on every input board (same as Board.shoot).
+        Raise ValueError if some cell was already shot.
+
+        Attributes:
+            games - np.ndarray - indexes of the boards (every board only once).
+            x - np.ndarray - x coordinates (rows) of the cells.
+            y - np.ndarray - y coordinates (columns) of the cells.
+        Return:
+            np.ndarray - new states of the cells: 2 (hit), 3 (miss) or 4 (ship is sunk).
+        """
+        # flat indexes are much cheaper than indexing by three arrays
+        shots = games * CELLS_CNT + x * SIZE + y
+        states = self.states.reshape(-1)[shots]
+        if (states > 1).any():
+            raise ValueError("Cell was already shot")
+        hit = states == 1
+        result = np.where(hit, 2, 3).astype(np.int8)
+        self.states.reshape(-1)[shots] = result
+        hit_idx = np.flatnonzero(hit)
+        hit_games = games[hit_idx]
+        hit_ships = self.ship_ids.reshape(-1)[shots[hit_idx]]
+        self.left[hit_games, hit_ships] -= 1
+        sunk = self.left[hit_games, hit_ships] == 0
+        if sunk.any():
+            self.sink(hit_games[sunk], hit_ships[sunk])
+            result[hit_idx[sunk]] = 4
+        return result
+
+    def sink(self, games: np.ndarray, ships: np.ndarray) -> None:
+        """Set all cells of the sunk ships dead and all cells around them missed.
+        Only these cells are changed (see placement_cells), other ships don't touch them,
+        so cells around are empty or already missed.
+
+        Attributes:
+            games - np.ndarray - indexes of the boards (every board only once).
+            ships - np.ndarray - index of the sunk ship on every board.
+        """
+        sizes = self.sizes[ships]
+        states = self.states.reshape(len(self), CELLS_CNT)
+        for size in np.unique(sizes):
+            same = sizes == size
+            cells, around = placement_cells(int(size))
+            positions = self.positions[games[same], ships[same]]
+            states[games[same][:, None], around[positions]] = 3
+            states[games[same][:, None], cells[positions]] = 4
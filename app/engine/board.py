@@ -0,0 +1,158 @@
+"""
+    Class that represents board and fleet of one player without drawing.
+"""
+import random
+from typing import List, Tuple
+# src.map
+from map.bitgrid import SIZE, BitGrid, cell_bit, ship_mask
+# src.ships
+from ships.placement import FLEET_SIZES, PLACEMENT
+
+# layout byte of the ship that is not on the board yet
+NO_SHIP = 0xFF
+VERTICAL = 0x80
+
+
+class Board:
+    """Class that represents board and fleet of one player without drawing
+    (pure Python, without pygame). Contains rules of the game: shot resolution,
+    sunk detection and win check. Used by the server and simulations,
+    client classes (Player, Grid, Fleet) are packed to the same layout (see encode_layout).
+
+    Attributes:
+        sizes - Tuple[int, ...] - sizes of the ships in the same order as Fleet.itr_fleet.
+        grid - BitGrid - states of all cells.
+        ships - List[int] - mask of every ship, 0 if ship is not on the board.
+        positions - List[int] - packed position of every ship: index of the first cell
+                    (row * 10 + col) with VERTICAL bit for orientation 1, or NO_SHIP.
+        sunk - List[bool] - True if ship is sunk.
+    """
+    def __init__(self, sizes: Tuple[int, ...] = FLEET_SIZES):
+        """Create empty board, ships are not on the board."""
+        self.sizes = sizes
+        self.grid = BitGrid()
+        self.ships = [0] * len(sizes)
+        self.positions = [NO_SHIP] * len(sizes)
+        self.sunk = [False] * len(sizes)
+
+    @classmethod
+    def from_layout(cls, layout: bytes, sizes: Tuple[int, ...] = FLEET_SIZES) -> 'Board':
+        """Create board with ships on packed positions (see positions attribute).
+        Raise ValueError if ships are not whole on the board or touch each other.
+
+        Attributes:
+            layout - bytes - packed positions of the ships.
+            sizes - Tuple[int, ...] - sizes of the ships.
+        Return:
+            Board - new board.
+        """
+        if len(layout) != len(sizes):
+            raise ValueError("Invalid ships layout")
+        board = cls(sizes)
+        for idx, pos in enumerate(layout):
+            if pos != NO_SHIP:
+                row, col = divmod(pos & ~VERTICAL, SIZE)
+                board.place(idx, row, col, 1 if pos & VERTICAL else 0)
+        return board
+
+    @classmethod
+    def random(cls, rng: random.Random = None) -> 'Board':
+        """Create board with random legal positions of all ships (see PlacementEngine).
+
+        Attributes:
+            rng - random.Random - generator of random numbers, by default random module.
+        Return:
+            Board - new board.
+        """
+        board = cls()
+        for idx, placement in enumerate(PLACEMENT.sample(rng)):
+            board.place(idx, placement.x, placement.y, placement.orientation)
+        return board
+
+    def place(self, idx: int, x: int, y: int, orientation: int) -> None:
+        """Place ship on the board. Raise ValueError if ship is not whole on the board
+        or touches other ship.
+
+        Attributes:
+            idx - int - index of the ship.
+            x - int - x coordinate (row) of the first cell of the ship.
+            y - int - y coordinate (column) of the first cell of the ship.
+            orientation - int - 0 if ship goes by x, 1 if by y (same as Ship.orientation).
+        """
+        mask = ship_mask(x, y, self.sizes[idx], orientation)
+        if not self.grid.can_place(mask):
+            raise ValueError("Invalid ships layout")
+        self.grid.place(mask)
+        self.ships[idx] = mask
+        self.positions[idx] = (x * SIZE + y) | (VERTICAL if orientation == 1 else 0)
+
+    def layout(self) -> bytes:
+        """Return packed positions of all ships."""
+        return bytes(self.positions)
+
+    def sunk_mask(self) -> int:
+        """Return mask of sunk ships (bit i is set if ship i is sunk)."""
+        return sum(1 << i for i, sunk in enumerate(self.sunk) if sunk)
+
+    def get_cell_state(self, x: int, y: int) -> int:
+        """Return state of the cell (same states as in Cell).
+
+        Attributes:
+            x - int - cell's x coordinate (row).
+            y - int - cell's y coordinate (column).
+        """
+        return self.grid.get_cell_state(x, y)
+
+    def states(self, ships: bool = True) -> List[int]:
+        """Return states of all cells in order of cell indexes (row * 10 + col).
+        If ships is False, not shot ship parts are returned as empty cells."""
+        return self.grid.states(ships)
+
+    def sunk_layout(self) -> bytes:
+        """Return packed positions of sunk ships, other ships are NO_SHIP."""
+        return bytes(pos if sunk else NO_SHIP for pos, sunk in zip(self.positions, self.sunk))
+
+    def load_shots(self, shots: int, sunk: int) -> None:
+        """Set all shot cells and sunk ships. Shot ship parts are hit,
+        other shot cells are missed and all cells of sunk ships are dead.
+
+        Attributes:
+            shots - int - mask of all shot cells.
+            sunk - int - mask of sunk ships (see sunk_mask).
+        """
+        self.sunk = [bool(sunk >> i & 1) for i in range(len(self.sizes))]
+        dead = sum(mask for mask, is_sunk in zip(self.ships, self.sunk) if is_sunk)
+        self.grid.hits = (shots & self.grid.ships) | dead
+        self.grid.misses = shots & ~self.grid.ships
+        self.grid.dead = dead
+
+    def shoot(self, x: int, y: int) -> int:
+        """Resolve shot on the cell. If the last part of the ship is hit, ship is sunk:
+        all its cells are dead and all empty cells around it are missed
+        (same as Ship.set_sunk). Raise ValueError if cell was already shot.
+
+        Attributes:
+            x - int - cell's x coordinate (row).
+            y - int - cell's y coordinate (column).
+        Return:
+            int - new state of the cell: 2 (hit), 3 (miss) or 4 (ship is sunk).
+        """
+        bit = cell_bit(x, y)
+        if (self.grid.hits | self.grid.misses) & bit:
+            raise ValueError(f"Cell ({x}, {y}) was already shot")
+        if not self.grid.ships & bit:
+            self.grid.misses |= bit
+            return 3
+        self.grid.hits |= bit
+        for idx, mask in enumerate(self.ships):
+            if mask & bit:
+                if not mask & ~self.grid.hits:
+                    self.sunk[idx] = True
+                    self.grid.around_sunk_ship(mask)
+                    return 4
+                break
+        return 2
+
+    def is_defeated(self) -> bool:
+        """Return True if all ships are sunk."""
+        return all(self.sunk)
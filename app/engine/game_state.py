@@ -0,0 +1,45 @@
+"""
+    Class that represents game state of one player without drawing.
+"""
+from engine.board import Board
+
+
+class GameState:
+    """Class that represents game state of one player without drawing
+    (pure Python, without pygame). Has the same flags as Game,
+    used by the server for every player in the room.
+
+    Attributes:
+        player - Board - board of the player.
+        enemy - Board - board of the enemy.
+        player_name - str - username of the player.
+        enemy_name - str - username of the enemy.
+        has_enemy - int - same as Game.has_enemy.
+        enemy_ready - bool - True if enemy is ready for play.
+        player_ready - bool - True if player is ready for play.
+        is_my_move - bool - True if players time to move, False otherwise.
+    """
+    def __init__(self):
+        """Create state of the new game."""
+        self.player = Board()
+        self.enemy = Board()
+        self.player_name = "User0"
+        self.enemy_name = "User1"
+        self.has_enemy = 0
+        self.enemy_ready = False
+        self.player_ready = False
+        self.is_my_move = False
+
+    def is_over(self) -> bool:
+        """Return True if all ships of the player or of the enemy are sunk."""
+        return self.player.is_defeated() or self.enemy.is_defeated()
+
+    def reset(self) -> None:
+        """Full game reset for new game. Ships are not on the boards
+        until players send them."""
+        self.has_enemy = 0
+        self.enemy_ready = False
+        self.player_ready = False
+        self.is_my_move = False
+        self.player = Board()
+        self.enemy = Board()
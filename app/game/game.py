@@ -2,17 +2,40 @@
     Class that represented whole game for one player.
 """
 import sys
+from typing import Tuple
 import pygame as pg
 # utils
-from utils.settings import GRID_PARAMS, COLORS, BASE, FONT_SIZE
+from utils.settings import GRID_PARAMS, BASE, FONT_SIZE, PROFILER
 from utils.helper import get_mouse_pos, is_in_range, draw_coords, draw_text
 from utils.button import Button
 # src objects
 from chat.chat import Chat
+from map.cell import Cell
 from player.player import Player
+from game.layers import LayeredScreen
+from game.profiler import FrameProfiler
 from online.network import Network
+from online.local_network import LocalNetwork
+from online.protocol import EVENTS, StateDelta, unpack_flags
 from menus.end_menu import EndMenu
 
+BOARD_SIZE = GRID_PARAMS["CELL_SIZE"] * GRID_PARAMS["GRID_SIZE"]
+# regions of the game screen, every region is redrawn only if its content was changed
+# (boards are a bit bigger, because crosses in the cells are drawn over the board border)
+REGIONS = {
+    "PLAYER_BOARD": pg.Rect(GRID_PARAMS["FG_OFFSET"], GRID_PARAMS["FG_OFFSET"],
+                            BOARD_SIZE, BOARD_SIZE).inflate(4, 4),
+    "ENEMY_BOARD": pg.Rect(GRID_PARAMS["SG_OFFSET"], GRID_PARAMS["FG_OFFSET"],
+                           BOARD_SIZE, BOARD_SIZE).inflate(4, 4),
+    "PLAYER_STATUS": pg.Rect(0, GRID_PARAMS["FG_OFFSET"], GRID_PARAMS["FG_OFFSET"] - 20, 110),
+    "ENEMY_STATUS": pg.Rect(GRID_PARAMS["SG_OFFSET"] + BOARD_SIZE + 20, GRID_PARAMS["FG_OFFSET"],
+                            BASE["WIDTH"] - GRID_PARAMS["SG_OFFSET"] - BOARD_SIZE - 20, 110),
+    "BUTTONS": pg.Rect(BASE["WIDTH"] - 1230, BASE["HEIGHT"] - 205, 320, 45),
+    "CHAT": pg.Rect(BASE["WIDTH"] // 2 - 160, BASE["HEIGHT"] // 2 + 150,
+                    320, BASE["HEIGHT"] // 2 - 150),
+    "PROFILER": pg.Rect(0, 0, 280, 115)
+}
+
 
 class Game:
     """Class that represented whole game for player.
@@ -29,8 +52,15 @@ class Game:
         enemy_ready - bool - True if enemy is ready for play.
         player_ready - bool - True if player is ready for play.
         is_my_move - bool - True if players time to move, False otherwise.
+        queue_position - int - position in the lobby queue of the server (0 if unknown).
+        reconnecting - bool - True if connection was lost and it is being resumed.
+        enemy_away - bool - True if enemy lost connection and he can still resume.
         ready_button - Button - represented ready button in set phase.
         randomise_button - Button - represented randomise button in set phase.
+        version - int - version of the game state received from the server
+                  (0 if nothing was received).
+        screen - LayeredScreen - cached layers of the game screen.
+        profiler - FrameProfiler - timings of the frame phases, shown after PROFILER["KEY"].
     """
     def __init__(self):
         """Creates game object."""
@@ -42,26 +72,99 @@ class Game:
         self.enemy_ready = False
         self.player_ready = False
         self.is_my_move = False
+        self.queue_position = 0
+        self.reconnecting = False
+        self.enemy_away = False
         self.ready_button = Button((BASE["WIDTH"] - 1060, BASE["HEIGHT"] - 200),
                                    (120, 35), "Ready",
                                    FONT_SIZE["SET_PHASE"])
         self.randomise_button = Button((BASE["WIDTH"] - 1220, BASE["HEIGHT"] - 200),
                                        (120, 35), "Randomise",
                                        FONT_SIZE["SET_PHASE"])
+        self.version = 0
+        self.screen = LayeredScreen()
+        self.profiler = FrameProfiler()
 
-    def update(self, game: 'Game') -> None:
-        """Update current game object by input game object.
+    def update(self, delta: StateDelta) -> None:
+        """Apply changes of the game state received from the server.
         Used for maintaining same game state as on the server.
+        Changes older than current version are ignored.
 
         Attributes:
-            game - Game - input game object.
+            delta - StateDelta - changes of the game state since current version.
         """
-        self.player = game.player
-        self.enemy = game.enemy
-        self.is_my_move = game.is_my_move
-        self.has_enemy = game.has_enemy
-        self.enemy_ready = game.enemy_ready
-        self.player_ready = game.player_ready
+        if delta.version < self.version:
+            return
+        cells_cnt = GRID_PARAMS["GRID_SIZE"] ** 2
+        self.version = delta.version
+        for idx, state in delta.cells:
+            side = self.player if idx < cells_cnt else self.enemy
+            row, col = divmod(idx % cells_cnt, GRID_PARAMS["GRID_SIZE"])
+            side.set_cell_state(row, col, state)
+        for side, layout, sunk in zip((self.player, self.enemy), delta.layouts, delta.sunk):
+            if layout is not None:
+                side.load_fleet(layout)
+            if sunk is not None:
+                side.fleet.load_sunk(sunk)
+        if delta.flags is not None:
+            (self.is_my_move, self.enemy_ready,
+             self.player_ready, self.has_enemy) = unpack_flags(delta.flags)
+
+    def handle_events(self, net: Network) -> None:
+        """Apply all events pushed by the server (changes of the game state,
+        username of the enemy and chat messages) and all answers on posted messages.
+        If connection is lost, leave the game same as if enemy left. After resuming
+        of the lost connection ask for all changes since the current version.
+
+        Attributes:
+            net - Network - player part of online.
+        """
+        with self.profiler.phase("net"):
+            for message in net.get_events():
+                if message is None:
+                    self.has_enemy = 2
+                elif message[0] == "reconnecting":
+                    self.reconnecting = True
+                elif message[0] == "resumed":
+                    self.reconnecting = False
+                    net.post(("subscribe", self.version))
+                    self.chat.resume(net)
+                elif message[0] == "state":
+                    self.update(message[1])
+                elif message[0] in ("chat", "chat_lines"):
+                    self.chat.receive(message[1], message[2], own=message[0] == "chat")
+                elif message[0] == "shot":
+                    self.update(message[4])
+                elif message[0] == "event":
+                    _, kind, delta, texts = message
+                    self.update(delta)
+                    if kind == EVENTS["ENEMY_NAME"]:
+                        self.enemy.username = texts[0]
+                    elif kind == EVENTS["QUEUE"]:
+                        self.queue_position = int(texts[0])
+                    elif kind in (EVENTS["ENEMY_AWAY"], EVENTS["ENEMY_BACK"]):
+                        self.enemy_away = kind == EVENTS["ENEMY_AWAY"]
+
+    def send(self, net: Network, message: tuple) -> tuple:
+        """Send message to the server and wait for the answer (see Network.send).
+
+        Attributes:
+            net - Network - player part of online.
+            message - tuple - message for the server.
+        Return:
+            tuple - answer of the server.
+        """
+        with self.profiler.phase("net"):
+            return net.send(message)
+
+    def handle_key(self, event: pg.event.Event) -> None:
+        """Show or hide the frame profiler overlay after its key (see PROFILER["KEY"]).
+
+        Attributes:
+            event - pg.event.Event - key down event.
+        """
+        if event.key == pg.key.key_code(PROFILER["KEY"]):
+            self.profiler.toggle()
 
     def reset(self) -> None:
         """Full game reset for new game."""
@@ -69,42 +172,110 @@ class Game:
         self.enemy_ready = False
         self.player_ready = False
         self.is_my_move = False
+        self.queue_position = 0
+        self.enemy_away = False
         self.player.reset()
         self.enemy.reset()
 
-    def draw_green_rect(self) -> None:
-        """Draw green rect on possible cell for users move."""
+    def get_green_cell(self) -> Tuple[int, int] | None:
+        """Return row and column of the enemy cell under the mouse
+        if it is possible cell for users move, None otherwise."""
         row, col = get_mouse_pos(self.enemy.offset)
-        if is_in_range(row, col):
-            state = self.enemy.get_cell_state(row, col)
-            if state in (0, 1):
-                self.enemy.set_cell_state(row, col, -1)
-                self.enemy.draw()
-                self.enemy.set_cell_state(row, col, state)
+        if is_in_range(row, col) and self.enemy.get_cell_state(row, col) in (0, 1):
+            return row, col
+        return None
 
-    def all_draw(self, net: Network) -> None:
-        """Draw all game objects.
+    def draw_green_rect(self, cell: Tuple[int, int] | None) -> None:
+        """Draw green rect on possible cell for users move.
 
         Attributes:
-            net - Network - used to draw updated chat.
+            cell - Tuple[int, int] | None - row and column of the cell (see get_green_cell).
         """
-        screen = pg.display.get_surface()
-        screen.fill(COLORS["WHITE"])
-        draw_coords(self.player.username, self.enemy.username)
-        self.player.draw()
-        self.enemy.draw()
-        self.draw_green_rect()
+        if cell is not None:
+            Cell(cell[1], cell[0], -1).draw_cell(self.enemy.offset)
+
+    def get_info_texts(self) -> Tuple[str, ...]:
+        """Return texts about state of the game that are shown on the enemy board."""
+        texts = ()
+        if self.reconnecting:
+            texts += ("Reconnecting...",)
+        elif self.enemy_away:
+            texts += ("Enemy reconnecting...",)
+        if self.has_enemy == 0 or (self.player_ready and not self.enemy_ready):
+            texts += ("Waiting for enemy...",)
+            if self.has_enemy == 0 and self.queue_position:
+                texts += (f"Queue position: {self.queue_position}",)
+        if not self.is_my_move and (self.player_ready and self.enemy_ready):
+            texts += ("Enemy's move...",)
+        return texts
+
+    def draw_enemy_board(self, green: Tuple[int, int] | None, info: Tuple[str, ...]) -> None:
+        """Draw cached enemy board with green rect and text about state of the game on it.
+
+        Attributes:
+            green - Tuple[int, int] | None - cell with green rect (see get_green_cell).
+            info - Tuple[str, ...] - texts about state of the game (see get_info_texts).
+        """
+        states = tuple(cell.get_state() for cell in self.enemy.board.iter_grid())
+        self.screen.layer("ENEMY_GRID", REGIONS["ENEMY_BOARD"], states,
+                          lambda: self.enemy.board.draw_grid(self.enemy.offset))
+        self.draw_green_rect(green)
+        for i, text in enumerate(info):
+            draw_text(text, (BASE["WIDTH"] // 2 + 105, BASE["HEIGHT"] // 2 - 80 + 45 * i), 40)
+
+    def draw_player_board(self) -> None:
+        """Draw player board with his ships."""
+        self.player.board.draw_grid(self.player.offset)
+        self.player.fleet.draw_ships()
+
+    def draw_buttons(self) -> None:
+        """Draw ready and randomise buttons in set phase."""
         if not self.player_ready:
             self.ready_button.draw()
             self.randomise_button.draw(6)
-        if self.has_enemy == 0 or (self.player_ready and not self.enemy_ready):
-            dest = (BASE["WIDTH"] // 2 + 105, BASE["HEIGHT"] // 2 - 80)
-            draw_text("Waiting for enemy...", dest, 40)
-        if not self.is_my_move and (self.player_ready and self.enemy_ready):
-            dest = (BASE["WIDTH"] // 2 + 105, BASE["HEIGHT"] // 2 - 80)
-            draw_text("Enemy's move...", dest, 40)
-        self.chat.draw(net)
-        pg.display.flip()
+
+    def all_draw(self, net: Network) -> None:
+        """Draw all game objects. Coordinates and usernames are pre-rendered background,
+        every region of the screen is redrawn only if its content was changed
+        and only changed regions are updated on the display.
+
+        Attributes:
+            net - Network - used to send new chat messages.
+        """
+        with self.profiler.phase("net"):
+            self.chat.send_messages(net)
+        player, enemy, chat = self.player, self.enemy, self.chat
+        dragging = [ship for ship in player.fleet.itr_fleet() if ship.dragging]
+        with self.profiler.phase("draw_coords"):
+            self.screen.begin((player.username, enemy.username),
+                              lambda: draw_coords(player.username, enemy.username))
+        with self.profiler.phase("Player.draw"):
+            self.screen.region("PLAYER_STATUS", REGIONS["PLAYER_STATUS"],
+                               tuple(ship.sunk for ship in player.fleet.itr_fleet()),
+                               player.draw_status)
+            self.screen.region("ENEMY_STATUS", REGIONS["ENEMY_STATUS"],
+                               tuple(ship.sunk for ship in enemy.fleet.itr_fleet()),
+                               enemy.draw_status)
+            ships = tuple((tuple(ship.rect or ()), ship.sunk)
+                          for ship in player.fleet.itr_fleet())
+            states = tuple(cell.get_state() for cell in player.board.iter_grid())
+            self.screen.region("PLAYER_BOARD", REGIONS["PLAYER_BOARD"], (states, ships),
+                               self.draw_player_board)
+            green, info = self.get_green_cell(), self.get_info_texts()
+            states = tuple(cell.get_state() for cell in enemy.board.iter_grid())
+            self.screen.region("ENEMY_BOARD", REGIONS["ENEMY_BOARD"], (states, green, info),
+                               lambda: self.draw_enemy_board(green, info))
+        self.screen.region("BUTTONS", REGIONS["BUTTONS"], self.player_ready, self.draw_buttons)
+        with self.profiler.phase("Chat.draw"):
+            self.screen.region("CHAT", REGIONS["CHAT"],
+                               (chat.text, len(chat.messages), chat.scroll, chat.input_box_color),
+                               lambda: chat.draw(net))
+        self.screen.region("PROFILER", REGIONS["PROFILER"], self.profiler.lines,
+                           self.profiler.draw)
+        for ship in dragging:
+            self.screen.overlay(ship.draw)
+        with self.profiler.phase("flip"):
+            self.screen.update()
 
     def in_chat(self, net: Network) -> None:
         """If user enters into the chat.
@@ -114,10 +285,12 @@ class Game:
             net - Network - players online part.
         """
         while True:
-            if not self.chat.chat_loop():
-                break
-            self.update(net.send(("get",)))
+            with self.profiler.phase("events"):
+                if not self.chat.chat_loop():
+                    break
+            self.handle_events(net)
             self.all_draw(net)
+            self.profiler.tick()
 
     def set_ships(self, net: Network) -> None:
         """Set ships on player's board. Send it to the server,
@@ -127,104 +300,114 @@ class Game:
         Attributes:
             net - Network - player part of online.
         """
-        self.enemy.username, self.has_enemy = net.send(("set_user_name", self.player.username))
+        self.screen.invalidate()  # screen was used by other menu
+        self.enemy.username, self.has_enemy = self.send(net, ("set_user_name",
+                                                               self.player.username))
         self.player.reset()
 
         current_ship = None
         old_orient = None
         self.chat = Chat()  # reset chat
+        self.chat.post_lines(net)  # get all lines of the chat log
         while True:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    pg.quit()
-                    sys.exit()
-                elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
-                    x, y = pg.mouse.get_pos()
-                    if self.randomise_button.is_pressed(x, y):
-                        self.player.reset()
-                    elif self.ready_button.is_pressed(x, y):
-                        self.update(net.send(("set_user_ships",
-                                              self.player.board, self.player.fleet)))
-                        return
-                    elif self.chat.is_in_chat(x, y):
-                        self.in_chat(net)
-                    else:
-                        current_ship = self.player.fleet.set_dragging()
-                        old_orient = current_ship.orientation if current_ship is not None \
-                            else None
-                elif (event.type == pg.MOUSEBUTTONUP and current_ship is not None
-                      and event.button == 1):
-                    row, col = get_mouse_pos()
-                    current_ship.update_position(row, col, self.player.board, old_orient)
-                    current_ship.dragging = False
-                    current_ship = None
-                elif event.type == pg.MOUSEMOTION and current_ship is not None:
-                    current_ship.rect.topleft = event.pos
-                elif event.type == pg.MOUSEWHEEL and current_ship is not None:
-                    orient = 0 if current_ship.orientation == 1 else 1
-                    y, x = get_mouse_pos()
-                    current_ship.set_orientation(orient, x, y)
-            if self.has_enemy == 0:
-                self.enemy.username, self.has_enemy = net.send(("get_enemy_name",
-                                                                self.player.username))
+            with self.profiler.phase("events"):
+                for event in pg.event.get():
+                    if event.type == pg.QUIT:
+                        pg.quit()
+                        sys.exit()
+                    elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+                        x, y = pg.mouse.get_pos()
+                        if self.randomise_button.is_pressed(x, y):
+                            self.player.reset()
+                        elif self.ready_button.is_pressed(x, y):
+                            net.post(("set_user_ships", self.version,
+                                      self.player.board, self.player.fleet))
+                            self.player_ready = True
+                            return
+                        elif self.chat.is_in_chat(x, y):
+                            self.in_chat(net)
+                        else:
+                            current_ship = self.player.fleet.set_dragging()
+                            old_orient = current_ship.orientation if current_ship is not None \
+                                else None
+                    elif (event.type == pg.MOUSEBUTTONUP and current_ship is not None
+                          and event.button == 1):
+                        row, col = get_mouse_pos()
+                        current_ship.update_position(row, col, self.player.board, old_orient)
+                        current_ship.dragging = False
+                        current_ship = None
+                    elif event.type == pg.MOUSEMOTION and current_ship is not None:
+                        current_ship.rect.topleft = event.pos
+                    elif event.type == pg.MOUSEWHEEL and current_ship is not None:
+                        orient = 0 if current_ship.orientation == 1 else 1
+                        y, x = get_mouse_pos()
+                        current_ship.set_orientation(orient, x, y)
+                    elif event.type == pg.KEYDOWN:
+                        self.handle_key(event)
+            self.handle_events(net)
             self.all_draw(net)
+            self.profiler.tick()
 
     def move(self, net: Network) -> None:
-        """Method that manage players move.
+        """Method that manage players move. Only the shot cell is sent,
+        the server resolves hit, miss and sunk ships.
 
         Attributes:
             net - Network - player part of online.
         """
         row, col = get_mouse_pos(GRID_PARAMS["SG_OFFSET"])
-        if is_in_range(row, col) and self.is_my_move:
-            c_state = self.enemy.get_cell_state(row, col)
-            if c_state == 1:
-                self.enemy.set_cell_state(row, col, 2)  # Hit
-            elif c_state == 0:
-                self.enemy.set_cell_state(row, col, 3)  # Miss
-                self.is_my_move = False
-            self.player.fleet.update_sunk(self.player.board)
-            self.enemy.fleet.update_sunk(self.enemy.board)
-            self.update(net.send(("move", self.enemy, self.is_my_move)))
-
-    def game_loop(self, usr_name) -> int:
+        if (is_in_range(row, col) and self.is_my_move
+                and self.enemy.get_cell_state(row, col) in (0, 1)):
+            # server resolves the shot, result comes as answer (see handle_events)
+            net.post(("shoot", self.version, row, col))
+
+    def game_loop(self, usr_name, single: bool = False) -> int:
         """Main game loop. Connection to the server, setting ships, moves.
 
         Attributes:
             usr_name - str - username of player.
+            single - bool - True for game against the computer (see LocalNetwork).
         Return:
             int - 0 if user wants to return to the main menu.
                   1 if connection error (automatically return to main menu).
                   2 if enemy left after game (automatically return to main menu).
         """
         # connect to the server and set ships.
-        net = Network()
+        net = LocalNetwork() if single else Network()
         if net.connected is False:
             return 1
+        self.version = 0
+        self.update(self.send(net, ("subscribe", self.version)))
         self.player.username = usr_name
         self.set_ships(net)
 
         while True:
             if self.has_enemy == 2:
+                net.close()
                 return 2
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    pg.quit()
-                    sys.exit()
-                elif event.type == pg.MOUSEBUTTONDOWN:
-                    x, y = pg.mouse.get_pos()
-                    # chat
-                    if self.chat.is_in_chat(x, y):
-                        self.in_chat(net)
-                    # players move
-                    elif self.player_ready and self.enemy_ready:
-                        self.move(net)
+            with self.profiler.phase("events"):
+                for event in pg.event.get():
+                    if event.type == pg.QUIT:
+                        pg.quit()
+                        sys.exit()
+                    elif event.type == pg.MOUSEBUTTONDOWN:
+                        x, y = pg.mouse.get_pos()
+                        # chat
+                        if self.chat.is_in_chat(x, y):
+                            self.in_chat(net)
+                        # players move
+                        elif self.player_ready and self.enemy_ready:
+                            self.move(net)
+                    elif event.type == pg.KEYDOWN:
+                        self.handle_key(event)
             # check on sunk
             if self.enemy.fleet.is_sunk_fleet() or self.player.fleet.is_sunk_fleet():
                 if not self.end_menu.run(self.enemy.fleet.is_sunk_fleet()):
+                    net.close()
                     return 0
-                self.update(net.send(("reset",)))
+                self.update(self.send(net, ("reset", self.version)))
                 self.set_ships(net)
             else:
                 self.all_draw(net)
-                self.update(net.send(("get",)))
+                self.handle_events(net)
+            self.profiler.tick()
@@ -0,0 +1,108 @@
+"""
+    Class that represents the screen split on cached layers and regions.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+import pygame as pg
+# utils
+from utils.settings import COLORS
+
+
+class LayeredScreen:
+    """Class that represents the screen split on cached layers and regions.
+    Static background is pre-rendered once, every region is redrawn only if its key
+    was changed and only changed regions are updated on the display.
+
+    Attributes:
+        background - pg.Surface | None - pre-rendered static background, None if it must
+                     be redrawn (for example after other menu was drawn on the screen).
+        background_key - Any - key of the pre-rendered background.
+        keys - Dict[str, Any] - last key of every region.
+        layers - Dict[str, Tuple[Any, pg.Surface]] - cached layers with their keys.
+        dirty - List[pg.Rect] - regions that were changed in the current frame.
+    """
+    def __init__(self):
+        """Create screen without any cached layers."""
+        self.background = None
+        self.background_key = None
+        self.keys: Dict[str, Any] = {}
+        self.layers: Dict[str, Tuple[Any, pg.Surface]] = {}
+        self.dirty: List[pg.Rect] = []
+
+    def invalidate(self) -> None:
+        """Redraw whole screen in the next frame."""
+        self.background = None
+
+    def begin(self, key: Any, draw: Callable[[], None]) -> None:
+        """Begin new frame. If background key was changed or screen was invalidated,
+        draw background again and mark all regions and whole screen as changed.
+
+        Attributes:
+            key - Any - key of the background.
+            draw - Callable - function that draws background on the screen.
+        """
+        if self.background is not None and key == self.background_key:
+            return
+        screen = pg.display.get_surface()
+        screen.fill(COLORS["WHITE"])
+        draw()
+        self.background = screen.copy()
+        self.background_key = key
+        self.keys.clear()
+        self.dirty = [screen.get_rect()]
+
+    def region(self, name: str, rect: pg.Rect, key: Any, draw: Callable[[], None]) -> None:
+        """Redraw region of the screen if its key was changed.
+        Region is cleared by the background and drawing is clipped by the region.
+
+        Attributes:
+            name - str - name of the region.
+            rect - pg.Rect - region on the screen.
+            key - Any - key of the region content.
+            draw - Callable - function that draws region content on the screen.
+        """
+        if name in self.keys and self.keys[name] == key:
+            return
+        screen = pg.display.get_surface()
+        screen.set_clip(rect)
+        screen.blit(self.background, rect, rect)
+        draw()
+        screen.set_clip(None)
+        self.keys[name] = key
+        self.dirty.append(rect)
+
+    def layer(self, name: str, rect: pg.Rect, key: Any, draw: Callable[[], None]) -> None:
+        """Blit cached layer on the screen. If key of the layer was changed,
+        draw layer again and cache it. Used inside region, so other content
+        (overlays) of the region can be redrawn without drawing of the layer.
+
+        Attributes:
+            name - str - name of the layer.
+            rect - pg.Rect - position of the layer on the screen.
+            key - Any - key of the layer content.
+            draw - Callable - function that draws layer content on the screen.
+        """
+        screen = pg.display.get_surface()
+        cached = self.layers.get(name)
+        if cached is not None and cached[0] == key:
+            screen.blit(cached[1], rect)
+            return
+        draw()
+        self.layers[name] = (key, screen.subsurface(rect).copy())
+
+    def overlay(self, draw: Callable[[], None]) -> None:
+        """Draw overlay that isn't bound to any region (for example dragged ship)
+        on top of all regions. Whole screen is updated and in the next frame
+        whole screen is redrawn, so overlay is erased.
+
+        Attributes:
+            draw - Callable - function that draws overlay on the screen.
+        """
+        draw()
+        self.dirty = [pg.display.get_surface().get_rect()]
+        self.background = None
+
+    def update(self) -> None:
+        """Update changed regions on the display and begin new list of changes."""
+        if self.dirty:
+            pg.display.update(self.dirty)
+        self.dirty = []
@@ -0,0 +1,152 @@
+"""
+    Class that measures phases of every frame of the game loop.
+"""
+import csv
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Tuple
+# utils
+from utils.settings import PROFILER, FONT_SIZE, FONT_NAME, COLORS
+from utils.helper import draw_text, tick
+
+# measured phases in the order of the overlay and of the CSV columns
+PHASES = ("events", "net", "Player.draw", "draw_coords", "Chat.draw", "flip")
+
+
+class FrameProfiler:
+    """Class that measures phases of every frame of the game loop.
+    Time of every phase is summed for the whole frame, last frames are kept
+    for rolling percentiles that are shown in the overlay and every frame
+    can be also written as one row of the CSV file.
+
+    Attributes:
+        enabled - bool - True if the overlay is shown.
+        samples - Dict[str, Deque[float]] - milliseconds of every phase (and whole frame)
+                  in the last PROFILER["WINDOW"] frames.
+        current - Dict[str, float] - milliseconds of phases in the current frame.
+        frames - int - number of finished frames.
+        start - float - time when the current frame was started.
+        lines - Tuple[Tuple[str, float, float], ...] - name, p50 and p99 of every phase
+                shown in the overlay, refreshed every PROFILER["REFRESH"] frames.
+        path - str - CSV file for every frame, empty for no file.
+        file - TextIO | None - opened CSV file.
+        writer - csv.writer | None - writer of the CSV file.
+    """
+    def __init__(self, path: str = PROFILER["CSV"]):
+        """Create profiler without any measured frame.
+
+        Attributes:
+            path - str - CSV file for every frame, empty for no file.
+        """
+        self.enabled = False
+        self.samples: Dict[str, Deque[float]] = {
+            name: deque(maxlen=PROFILER["WINDOW"]) for name in PHASES + ("frame",)}
+        self.current: Dict[str, float] = {}
+        self.frames = 0
+        self.start = time.perf_counter()
+        self.lines: Tuple[Tuple[str, float, float], ...] = ()
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def toggle(self) -> None:
+        """Show or hide the overlay."""
+        self.enabled = not self.enabled
+        self.lines = self.get_lines() if self.enabled else ()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure one phase of the current frame. If other loop ran frames inside
+        the phase (for example chat loop after click), measured time is dropped.
+
+        Attributes:
+            name - str - name of the phase (see PHASES).
+        """
+        frames, start = self.frames, time.perf_counter()
+        yield
+        if frames == self.frames:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.current[name] = self.current.get(name, 0.0) + elapsed
+
+    def end_frame(self) -> None:
+        """Finish the current frame, save its phases and start the next one.
+        Frames without any measured phase (menus) are ignored."""
+        now = time.perf_counter()
+        if self.current:
+            row = [self.current.get(name, 0.0) for name in PHASES] + [(now - self.start) * 1000]
+            for name, value in zip(PHASES + ("frame",), row):
+                self.samples[name].append(value)
+            self.write(row)
+            self.current = {}
+            self.frames += 1
+            if self.enabled and self.frames % PROFILER["REFRESH"] == 0:
+                self.lines = self.get_lines()
+
+    def tick(self) -> int:
+        """Finish the current frame and wait until the end of it (see helper.tick).
+        Waiting isn't a part of the frame.
+
+        Return:
+            int - milliseconds since the previous frame.
+        """
+        self.end_frame()
+        elapsed = tick()
+        self.start = time.perf_counter()
+        return elapsed
+
+    def write(self, row: List[float]) -> None:
+        """Write one frame to the CSV file if it is set.
+
+        Attributes:
+            row - List[float] - milliseconds of every phase and of the whole frame.
+        """
+        if not self.path:
+            return
+        if self.writer is None:
+            # file is open until the end of the program, line buffered,
+            # so the log is complete even if the game was killed
+            # pylint: disable-next=consider-using-with
+            self.file = open(self.path, "w", newline="", buffering=1, encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(("frame",) + tuple(f"{name}_ms" for name in PHASES)
+                                 + ("total_ms",))
+        self.writer.writerow([self.frames] + [f"{value:.3f}" for value in row])
+
+    @staticmethod
+    def percentile(values: List[float], share: float) -> float:
+        """Return nearest-rank percentile of the values.
+
+        Attributes:
+            values - List[float] - sorted values.
+            share - float - percentile from 0 to 1.
+        Return:
+            float - percentile, 0 for no values.
+        """
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(share * len(values)))]
+
+    def get_lines(self) -> Tuple[Tuple[str, float, float], ...]:
+        """Return name, p50 and p99 in milliseconds of every phase and of the whole frame."""
+        lines = ()
+        for name, samples in self.samples.items():
+            values = sorted(samples)
+            lines += ((name, self.percentile(values, 0.5), self.percentile(values, 0.99)),)
+        return lines
+
+    def draw(self) -> None:
+        """Draw table with rolling percentiles of the phases (see lines).
+        Nothing is drawn if the overlay is hidden."""
+        if not self.lines:
+            return
+        x, y = PROFILER["DEST"]
+        size, font, color = FONT_SIZE["PROFILER"], FONT_NAME["CHAT"], COLORS["GRAY"]
+        draw_text(f"last {len(self.samples['frame'])} frames", (x, y), size, font, color)
+        draw_text("p50 ms", (x + 110, y), size, font, color)
+        draw_text("p99 ms", (x + 180, y), size, font, color)
+        for name, p50, p99 in self.lines:
+            y += size
+            draw_text(name, (x, y), size, font, color)
+            draw_text(f"{p50:.2f}", (x + 110, y), size, font, color)
+            draw_text(f"{p99:.2f}", (x + 180, y), size, font, color)
@@ -0,0 +1,134 @@
+"""
+    Class that plays back a recorded match on the game screen.
+"""
+import sys
+from typing import Tuple
+import pygame as pg
+# utils
+from utils.settings import BASE, FONT_SIZE, MATCH_LOG, REPLAY
+from utils.button import Button
+# src objects
+from game.game import Game
+from engine.game_state import GameState
+from online.sync import StateSync
+from online.replay import Replay
+from online.match_log import NO_WINNER
+
+
+class ReplayViewer(Game):
+    """Class that plays back a recorded match on the game screen.
+    Uses the same layout as the game: left board is the first player,
+    right board is the second player (with his ships). Boards after every shot
+    are applied as state changes, same as states received from the server.
+
+    Attributes:
+        replay - Replay - opened replay of the match.
+        move - int - count of shown shots.
+        playing - bool - True if shots are shown automatically.
+        elapsed - int - milliseconds since the last automatic shot.
+        state - GameState - boards of both players after the shown shots.
+        sync - StateSync - versioned state for updates of the screen.
+        buttons - Dict[str, Button] - replay buttons by name.
+    """
+    def __init__(self, replay: Replay):
+        """Create viewer of the replay on the first shot.
+
+        Attributes:
+            replay - Replay - opened replay of the match.
+        """
+        super().__init__()
+        self.replay = replay
+        self.move = 0
+        self.playing = False
+        self.elapsed = 0
+        self.state = GameState()
+        self.state.has_enemy = 1
+        self.sync = StateSync(reveal=True)
+        self.player.username, self.enemy.username = "Player 1", "Player 2"
+        x, y = BASE["WIDTH"] - 1225, BASE["HEIGHT"] - 200
+        self.buttons = {
+            name: Button((x + 80 * i, y), (70, 35), name, FONT_SIZE["SET_PHASE"])
+            for i, name in enumerate(("<", "Play", ">", "Back"))
+        }
+        self.seek(0)
+
+    def seek(self, move: int) -> None:
+        """Show boards after the move shots (see Replay.boards).
+
+        Attributes:
+            move - int - count of shots, it is limited to the count of all shots.
+        """
+        self.move = max(0, min(move, self.replay.entry.moves))
+        self.state.player, self.state.enemy = self.replay.boards(self.move)
+        self.state.is_my_move = (self.move < self.replay.entry.moves
+                                 and self.replay.shot(self.move).player == 0)
+        self.sync.commit(self.state)
+        self.update(self.sync.delta(self.version))
+
+    def get_green_cell(self) -> Tuple[int, int] | None:
+        """Nobody moves in the replay."""
+        return None
+
+    def get_info_texts(self) -> Tuple[str, ...]:
+        """Return number of the shown shot and the winner after the last shot."""
+        entry = self.replay.entry
+        texts = (f"Shot {self.move} / {entry.moves}",)
+        if self.move == entry.moves and entry.winner != NO_WINNER:
+            texts = (f"Player {entry.winner + 1} wins",)
+        return texts
+
+    def draw_enemy_board(self, green: Tuple[int, int] | None, info: Tuple[str, ...]) -> None:
+        """Draw enemy board same as in the game and also his ships."""
+        super().draw_enemy_board(green, info)
+        self.enemy.fleet.draw_ships()
+
+    def draw_buttons(self) -> None:
+        """Draw replay buttons."""
+        for button in self.buttons.values():
+            button.draw(4)
+
+    def press(self, name: str) -> bool:
+        """Apply pressed button or key.
+
+        Attributes:
+            name - str - name of the button (see buttons) or of the key.
+        Return:
+            bool - False if user wants to leave the replay, True otherwise.
+        """
+        if name in ("Back", "escape"):
+            return False
+        steps = {"<": -1, ">": 1, "left": -1, "right": 1, "page up": -MATCH_LOG["CHECKPOINT"],
+                 "page down": MATCH_LOG["CHECKPOINT"], "home": -self.move,
+                 "end": self.replay.entry.moves}
+        if name in ("Play", "space"):
+            self.playing = not self.playing
+            self.elapsed = 0
+        elif name in steps:
+            self.playing = False
+            self.seek(self.move + steps[name])
+        return True
+
+    def run(self) -> None:
+        """Replay loop. Run until user pressed back button or escape."""
+        self.screen.invalidate()  # screen was used by other menu
+        while True:
+            for event in pg.event.get():
+                if event.type == pg.QUIT:
+                    pg.quit()
+                    sys.exit()
+                elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+                    x, y = pg.mouse.get_pos()
+                    pressed = [name for name, button in self.buttons.items()
+                               if button.is_pressed(x, y)]
+                    if pressed and not self.press(pressed[0]):
+                        return
+                elif event.type == pg.KEYDOWN:
+                    if not self.press(pg.key.name(event.key)):
+                        return
+                    self.handle_key(event)
+            if self.playing and self.elapsed >= REPLAY["STEP"]:
+                self.elapsed = 0
+                self.seek(self.move + 1)
+                self.playing = self.move < self.replay.entry.moves
+            self.all_draw(None)
+            self.elapsed += self.profiler.tick()
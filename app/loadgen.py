@@ -0,0 +1,314 @@
+"""
+    Load generator: many scripted clients that play against each other on the server.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, NamedTuple
+from utils.settings import NETWORK, GRID_PARAMS
+from engine.board import Board
+from engine.game_state import GameState
+from online.protocol import (PUSHES, CELLS_CNT, StateDelta, unpack_flags,
+                             encode_message, read_message_async)
+
+SIZE = GRID_PARAMS["GRID_SIZE"]
+# seconds to wait for the answer on one request
+TIMEOUT = 10
+
+
+def percentile(values: List[float], part: float) -> float:
+    """Return value below which is input part (from 0 to 1) of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(part * len(values)))]
+
+
+class LoadOptions(NamedTuple):
+    """Options of the load generator and its clients.
+
+    Attributes:
+        duration - float - seconds of every step.
+        think - float - seconds between requests while waiting for the enemy.
+        chat_every - int - send chat message after every chat_every moves, 0 for never.
+        seed - int | None - seed of the clients, None for random seed.
+    """
+    duration: float
+    think: float = 0.05
+    chat_every: int = 10
+    seed: int | None = None
+
+
+class Stats:
+    """Class that collects latencies of the answers and errors of all clients.
+
+    Attributes:
+        latencies - Dict[str, List[float]] - latencies in seconds by name of the request.
+        errors - Counter - count of errors by kind.
+    """
+    def __init__(self):
+        """Create empty statistics."""
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = Counter()
+
+    def add(self, name: str, begin: float) -> None:
+        """Record latency of the request that was sent at begin (see time.perf_counter).
+
+        Attributes:
+            name - str - name of the request.
+            begin - float - time of sending the request.
+        """
+        self.latencies[name].append(time.perf_counter() - begin)
+
+    def report(self, elapsed: float) -> Dict:
+        """Return requests per second, latency percentiles in ms by request and errors.
+
+        Attributes:
+            elapsed - float - duration of the measurement in seconds.
+        """
+        total = sum(len(values) for values in self.latencies.values())
+        messages = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            messages[name] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 0.5) * 1e3,
+                "p90_ms": percentile(values, 0.9) * 1e3,
+                "p99_ms": percentile(values, 0.99) * 1e3,
+                "max_ms": values[-1] * 1e3
+            }
+        return {"requests": total, "rps": total / elapsed if elapsed else 0,
+                "errors": dict(self.errors), "messages": messages}
+
+
+class ScriptedClient:
+    """Class that represents one scripted player. Sends the same messages as the game
+    (subscribe, set_user_name, set_user_ships, shoot or get while waiting for enemy, chat
+    and reset after the end of the game) and keeps the same game state as Game,
+    but with headless boards. Every request waits for its answer, events pushed
+    by the server are applied when they come.
+
+    Attributes:
+        stats - Stats - statistics shared by all clients.
+        rng - random.Random - generator of random numbers.
+        options - LoadOptions - options of the load (think and chat_every are used).
+        game - GameState - game state of the player.
+        version - int - version of the game state.
+        chat_seq - int - sequence number of the last received chat line.
+        moves - int - count of moves of the player.
+        reader - asyncio.StreamReader | None - reading part of the connection.
+        writer - asyncio.StreamWriter | None - writing part of the connection.
+        waiters - deque - futures of the requests that wait for the answer.
+    """
+    def __init__(self, stats: Stats, rng: random.Random, options: LoadOptions):
+        """Create client without connection."""
+        self.stats = stats
+        self.rng = rng
+        self.options = options
+        self.game = GameState()
+        self.version = 0
+        self.chat_seq = 0
+        self.moves = 0
+        self.reader = None
+        self.writer = None
+        self.waiters = deque()
+
+    def update(self, delta: StateDelta) -> None:
+        """Apply changes of the game state received from the server (same as Game.update).
+
+        Attributes:
+            delta - StateDelta - changes of the game state since current version.
+        """
+        if delta.version < self.version:
+            return
+        self.version = delta.version
+        for idx, state in delta.cells:
+            board = self.game.player if idx < CELLS_CNT else self.game.enemy
+            board.grid.set_cell_state(*divmod(idx % CELLS_CNT, SIZE), state)
+        for side, layout, sunk in zip(("player", "enemy"), delta.layouts, delta.sunk):
+            board = getattr(self.game, side)
+            if layout is not None:
+                grid = board.grid
+                board = Board.from_layout(layout)
+                board.grid = grid
+                setattr(self.game, side, board)
+            if sunk is not None:
+                board.sunk = [bool(sunk >> i & 1) for i in range(len(board.sizes))]
+        if delta.flags is not None:
+            (self.game.is_my_move, self.game.enemy_ready,
+             self.game.player_ready, self.game.has_enemy) = unpack_flags(delta.flags)
+
+    def receive(self, message: tuple) -> None:
+        """Apply answer or pushed message to the game state."""
+        if message[0] in ("state", "event"):
+            self.update(message[1] if message[0] == "state" else message[2])
+        elif message[0] == "shot":
+            self.update(message[4])
+        elif message[0] in ("chat", "chat_lines"):
+            self.chat_seq = max(self.chat_seq, message[1] + len(message[2]))
+
+    async def read_loop(self) -> None:
+        """Read all messages from the server. Pushed messages are applied immediately,
+        answers are given to the waiting requests in order of sending."""
+        try:
+            while True:
+                message = await read_message_async(self.reader)
+                if message[0] in PUSHES:
+                    self.receive(message)
+                else:
+                    self.waiters.popleft().set_result(message)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            for waiter in self.waiters:
+                if not waiter.done():
+                    waiter.set_exception(ConnectionError(str(e)))
+
+    async def request(self, *data) -> tuple:
+        """Send message, wait for the answer, record its latency and apply it.
+
+        Attributes:
+            data - Tuple[Any] - name of the message and its data.
+        Return:
+            Tuple[Any] - answer of the server.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        begin = time.perf_counter()
+        self.writer.write(encode_message(*data))
+        await self.writer.drain()
+        answer = await asyncio.wait_for(waiter, TIMEOUT)
+        self.stats.add(data[0], begin)
+        self.receive(answer)
+        return answer
+
+    async def set_ships(self) -> None:
+        """Send username and random ships (same as Game.set_ships)."""
+        await self.request("set_user_name", f"bot{self.rng.randrange(10000)}")
+        await self.request("set_user_ships", self.version, Board.random(self.rng))
+
+    async def move(self) -> None:
+        """Shoot in random not shot cell of the enemy (same as Game.move)."""
+        free = [(x, y) for x in range(SIZE) for y in range(SIZE)
+                if self.game.enemy.get_cell_state(x, y) in (0, 1)]
+        self.moves += 1
+        await self.request("shoot", self.version, *self.rng.choice(free))
+        if self.options.chat_every and self.moves % self.options.chat_every == 0:
+            await self.request("chat", self.chat_seq, [f"> move {self.moves}"])
+
+    async def play(self, host: str, port: int) -> None:
+        """Connect to the server and play games until the task is cancelled or enemy left."""
+        begin = time.perf_counter()
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(encode_message("hello", b""))
+        await read_message_async(self.reader)  # player number and session token
+        self.stats.add("connect", begin)
+        reader = asyncio.create_task(self.read_loop())
+        try:
+            await self.request("subscribe", self.version)
+            await self.set_ships()
+            while self.game.has_enemy != 2:
+                if self.game.is_over():
+                    await self.request("reset", self.version)
+                    await self.set_ships()
+                elif self.game.is_my_move and self.game.enemy_ready and self.game.player_ready:
+                    await self.move()
+                else:
+                    await asyncio.sleep(self.options.think)
+                    await self.request("get", self.version)
+        finally:
+            reader.cancel()
+            self.writer.write(encode_message("leave"))  # same as Network.close
+            self.writer.close()
+
+
+class LoadGenerator:
+    """Class that runs more and more scripted clients against the server
+    and collects statistics for every count of clients.
+
+    Attributes:
+        host - str - address of the server.
+        port - int - port of the server.
+        options - LoadOptions - duration of every step and options of the clients.
+        rng - random.Random - generator of random numbers.
+        results - List[Dict] - report of every step (see Stats.report).
+    """
+    def __init__(self, host: str, port: int, options: LoadOptions):
+        """Create load generator without results."""
+        self.host = host
+        self.port = port
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.results: List[Dict] = []
+
+    async def client(self, stats: Stats) -> None:
+        """Run one client and count its error."""
+        client = ScriptedClient(stats, random.Random(self.rng.random()), self.options)
+        try:
+            await client.play(self.host, self.port)
+        except asyncio.TimeoutError:
+            stats.errors["timeout"] += 1
+        except (OSError, ConnectionError, asyncio.IncompleteReadError):
+            stats.errors["connection"] += 1
+        except ValueError:
+            stats.errors["protocol"] += 1
+
+    async def step(self, clients: int) -> Dict:
+        """Run input count of clients for duration of the step and return their report."""
+        stats = Stats()
+        tasks = [asyncio.create_task(self.client(stats)) for _ in range(clients)]
+        begin = time.perf_counter()
+        await asyncio.sleep(self.options.duration)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        report = stats.report(time.perf_counter() - begin)
+        report["clients"] = clients
+        return report
+
+    async def run(self, steps: List[int]) -> None:
+        """Run all steps one after another and print their reports."""
+        for clients in steps:
+            report = await self.step(clients)
+            self.results.append(report)
+            print(f"{clients} clients: {report['rps']:.1f} req/s, "
+                  f"errors {sum(report['errors'].values())} {report['errors'] or ''}")
+            for name, stats in report["messages"].items():
+                print(f"    {name:16s} {stats['count']:8d}  p50 {stats['p50_ms']:8.2f} ms  "
+                      f"p90 {stats['p90_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  "
+                      f"max {stats['max_ms']:8.2f} ms")
+
+
+def main():
+    """Parse arguments, run load generator and save results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--host", default=NETWORK["SERVER"], help="address of the server")
+    parser.add_argument("--port", type=int, default=NETWORK["PORT"], help="port of the server")
+    parser.add_argument("-c", "--clients", default="2,8,32,128",
+                        help="comma separated counts of clients for every step")
+    parser.add_argument("-d", "--duration", type=float, default=10,
+                        help="seconds of every step")
+    parser.add_argument("--think", type=float, default=0.05,
+                        help="seconds between requests while waiting for the enemy")
+    parser.add_argument("--chat-every", type=int, default=10,
+                        help="send chat message after every N moves, 0 for never")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the clients")
+    parser.add_argument("-o", "--output", help="write reports of all steps to JSON file")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.host, args.port, LoadOptions(args.duration, args.think,
+                                                                args.chat_every, args.seed))
+    steps = [int(count) for count in args.clients.split(",")]
+    try:
+        asyncio.run(generator.run(steps))
+    except KeyboardInterrupt:
+        pass
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(generator.results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+    Class represented a grid stored in bitboards.
+"""
+from typing import Any, List
+# utils
+from utils.settings import GRID_PARAMS
+
+SIZE = GRID_PARAMS["GRID_SIZE"]
+FULL = (1 << SIZE * SIZE) - 1
+# masks of all cells except the first or the last column
+NOT_FIRST_COL = FULL & ~sum(1 << (row * SIZE) for row in range(SIZE))
+NOT_LAST_COL = FULL & ~sum(1 << (row * SIZE + SIZE - 1) for row in range(SIZE))
+
+
+def dilate(mask: int) -> int:
+    """Return mask extended by all neighbouring cells (in 8 directions).
+
+    Attributes:
+        mask - int - mask of the cells.
+    Return:
+        int - mask of the cells and all their neighbours.
+    """
+    row = mask | ((mask << 1) & NOT_FIRST_COL) | ((mask >> 1) & NOT_LAST_COL)
+    return (row | (row << SIZE) | (row >> SIZE)) & FULL
+
+
+# neighbourhood (cell itself and its neighbours) of every cell by cell index
+NEIGHBOURS: List[int] = [dilate(1 << i) for i in range(SIZE * SIZE)]
+
+
+def cell_bit(x: int, y: int) -> int:
+    """Return mask of one cell. Coordinates are the same as in Grid.get_cell_state.
+
+    Attributes:
+        x - int - cell's x coordinate (row).
+        y - int - cell's y coordinate (column).
+    """
+    return 1 << (x * SIZE + y)
+
+
+def cells(mask: int) -> List[int]:
+    """Return indexes (x * GRID_SIZE + y) of all cells from the mask in increasing order.
+
+    Attributes:
+        mask - int - mask of the cells.
+    """
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+
+def random_cell(mask: int, rng: Any) -> int:
+    """Return index of the random cell from the mask (mask must not be empty).
+    Random cells of the board are tried first, so the whole mask is listed
+    (see cells) only if the mask is small.
+
+    Attributes:
+        mask - int - mask of the cells.
+        rng - random.Random - generator of random numbers.
+    """
+    for _ in range(8):
+        idx = rng.randrange(SIZE * SIZE)
+        if mask >> idx & 1:
+            return idx
+    free = cells(mask)
+    return free[rng.randrange(len(free))]
+
+
+def ship_mask(x: int, y: int, size: int, orientation: int) -> int:
+    """Return mask of the ship or 0 if ship is not whole on the board.
+
+    Attributes:
+        x - int - x coordinate of the first cell of the ship.
+        y - int - y coordinate of the first cell of the ship.
+        size - int - size of the ship.
+        orientation - int - 0 if ship goes by x, 1 if by y (same as Ship.orientation).
+    Return:
+        int - mask of all cells of the ship.
+    """
+    last_x = x + (size - 1) * (1 - orientation)
+    last_y = y + (size - 1) * orientation
+    if min(x, y) < 0 or max(last_x, last_y) >= SIZE:
+        return 0
+    step = 1 if orientation == 1 else SIZE
+    return sum(cell_bit(x, y) << (j * step) for j in range(size))
+
+
+class BitGrid:
+    """Class represented a grid stored in bitboards. Every mask has one bit
+    for every cell (index = x * GRID_SIZE + y). States are the same as in Cell
+    (without -1, that is used only for drawing).
+
+    Attributes:
+        ships - int - mask of all ship parts (states 1, 2 and 4).
+        hits - int - mask of hit ship parts (states 2 and 4).
+        misses - int - mask of missed cells (state 3).
+        dead - int - mask of parts of the sunk ships (state 4).
+    """
+    def __init__(self):
+        """Create one empty grid."""
+        self.ships = 0
+        self.hits = 0
+        self.misses = 0
+        self.dead = 0
+
+    @classmethod
+    def from_grid(cls, grid: Any) -> 'BitGrid':
+        """Create bitboard grid with the same states as input grid.
+
+        Attributes:
+            grid - Grid - grid with Cells.
+        Return:
+            BitGrid - new grid.
+        """
+        bit_grid = cls()
+        for cell in grid.iter_grid():
+            if cell.get_state() > 0:
+                bit_grid.set_cell_state(cell.y, cell.x, cell.get_state())
+        return bit_grid
+
+    def get_cell_state(self, x: int, y: int) -> int:
+        """By input x, y coordinates return state of the cell.
+
+        Attributes:
+            x - int - cell's x coordinate.
+            y - int - cell's y coordinate.
+        Return:
+            state - int - cell's state.
+        """
+        bit = cell_bit(x, y)
+        if self.dead & bit:
+            return 4
+        if self.hits & bit:
+            return 2
+        if self.misses & bit:
+            return 3
+        if self.ships & bit:
+            return 1
+        return 0
+
+    def states(self, ships: bool = True) -> List[int]:
+        """Return states of all cells in order of cell indexes (x * GRID_SIZE + y).
+        Only set bits of the masks are visited, so empty grid costs almost nothing.
+
+        Attributes:
+            ships - bool - False if not shot ship parts are returned as empty cells.
+        Return:
+            List[int] - states of all cells.
+        """
+        result = [0] * (SIZE * SIZE)
+        # later masks have priority, same as in get_cell_state
+        for state, mask in ((1, self.ships if ships else 0), (3, self.misses),
+                            (2, self.hits), (4, self.dead)):
+            for idx in cells(mask):
+                result[idx] = state
+        return result
+
+    def set_cell_state(self, x: int, y: int, state: int) -> None:
+        """By input x, y coordinates set state of the cell using input state.
+
+        Attributes:
+            x - int - cell's x coordinate.
+            y - int - cell's y coordinate.
+            state - int (from 0 to 4) - cell's new state.
+        """
+        if state not in range(0, 5):
+            raise ValueError(f"Unknown cell state: {state}")
+        bit = cell_bit(x, y)
+        self.ships &= ~bit
+        self.hits &= ~bit
+        self.misses &= ~bit
+        self.dead &= ~bit
+        if state in (1, 2, 4):
+            self.ships |= bit
+        if state in (2, 4):
+            self.hits |= bit
+        if state == 3:
+            self.misses |= bit
+        if state == 4:
+            self.dead |= bit
+
+    def check_neighbors(self, x: int, y: int) -> bool:
+        """Check all neighbors of cell on position (x, y).
+
+        Attributes:
+            x - int (from 0 to GRID_PARAMS["GRID_SIZE"]-1) - x coordinate.
+            y - int (from 0 to GRID_PARAMS["GRID_SIZE"]-1) - y coordinate.
+
+        Return:
+            bool - True if around cell is not a ship part, False if is.
+        """
+        return not NEIGHBOURS[x * SIZE + y] & self.ships & ~self.hits
+
+    def can_place(self, mask: int) -> bool:
+        """Check if ship can be placed on the cells from the mask
+        (ship is on the board and doesn't touch other ships).
+
+        Attributes:
+            mask - int - mask of the ship (see ship_mask).
+        Return:
+            bool - True if ship can be placed, False otherwise.
+        """
+        return mask != 0 and not dilate(mask) & self.ships
+
+    def place(self, mask: int) -> None:
+        """Set all cells from the mask as ship parts (state 1)."""
+        self.ships |= mask
+
+    def remove(self, mask: int) -> None:
+        """Set all cells from the mask as empty (state 0)."""
+        self.ships &= ~mask
+        self.hits &= ~mask
+        self.misses &= ~mask
+        self.dead &= ~mask
+
+    def around_sunk_ship(self, mask: int) -> None:
+        """Set cells of the sunk ship on state 4 and all empty cells
+        around this ship on state 3.
+
+        Attributes:
+            mask - int - mask of the sunk ship.
+        """
+        self.hits |= mask
+        self.dead |= mask
+        self.misses |= dilate(mask) & ~self.ships
@@ -9,6 +9,9 @@ from utils.helper import is_in_range
 # src.map
 from map.cell import Cell
 
+# offsets of the cell itself and all its neighbours
+NEIGHBOUR_OFFSETS = tuple(product([0, 1, -1], repeat=2))
+
 
 class Grid:
     """Class represented a grid that contains Cells
@@ -32,10 +35,8 @@ class Grid:
         Return:
             tuple - (new_x, new_y) - neighbour position.
         """
-        for i in list(product([0, 1, -1], repeat=2)):
-            new_x = x + i[0]
-            new_y = y + i[1]
-            yield new_x, new_y
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            yield x + dx, y + dy
 
     def around_sunk_ship(self, cell: Cell) -> None:
         """Set all empty cells around input cell on state 3 (cell has part of sunk ship).
@@ -72,8 +73,7 @@ class Grid:
             Generator[Cell, None, None] - yield Cell object.
         """
         for row in self.grid:
-            for cell in row:
-                yield cell
+            yield from row
 
     def draw_grid(self, offset: int) -> None:
         """Draw grid by cells.
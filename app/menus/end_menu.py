@@ -5,7 +5,7 @@ import sys
 import pygame as pg
 # utils
 from utils.settings import BASE, COLORS, FONT_SIZE, FONT_NAME
-from utils.helper import draw_text
+from utils.helper import draw_text, tick
 from utils.button import Button
 
 
@@ -67,3 +67,4 @@ class EndMenu:
             screen.fill(COLORS["WHITE"])
             self.draw(is_win)
             pg.display.flip()
+            tick()
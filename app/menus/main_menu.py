@@ -6,10 +6,11 @@ import time
 import pygame as pg
 # utils
 from utils.settings import BASE, COLORS, FONT_SIZE, FONT_NAME
-from utils.helper import draw_rect, draw_text
+from utils.helper import draw_rect, draw_text, tick
 from utils.button import Button
 # src.game
 from game.game import Game
+from menus.replay_menu import ReplayMenu
 
 
 class MainMenu:
@@ -23,6 +24,8 @@ class MainMenu:
         player_leave - bool - True if after game enemy left.
         input_box - pg.Rect - input box for entering username.
         play_button - Button - button for start the game.
+        computer_button - Button - button for start the game against the computer.
+        replays_button - Button - button for replays of the recorded matches.
         quit_button - Button - button for quit the game.
     """
     def __init__(self):
@@ -34,6 +37,10 @@ class MainMenu:
         self.input_box = pg.Rect(BASE["WIDTH"] // 2 - 50, BASE["HEIGHT"] // 2 - 100, 445, 40)
         self.play_button = Button((self.input_box.x - 50, self.input_box.y + 50),
                                   (200, 50), "Play", FONT_SIZE["USERNAME"])
+        self.computer_button = Button((self.input_box.x + 170, self.input_box.y + 50),
+                                      (200, 50), "Computer", FONT_SIZE["USERNAME"])
+        self.replays_button = Button((self.input_box.x + 170, self.input_box.y + 120),
+                                     (200, 50), "Replays", FONT_SIZE["USERNAME"])
         self.quit_button = Button((self.input_box.x - 50, self.input_box.y + 120),
                                   (200, 50), "Quit", FONT_SIZE["USERNAME"])
 
@@ -53,6 +60,8 @@ class MainMenu:
         draw_text("Battleships", dest, FONT_SIZE["WINNER"], FONT_NAME["GAME"])
         self.draw_username()
         self.play_button.draw()
+        self.computer_button.draw()
+        self.replays_button.draw()
         self.quit_button.draw()
         # draw error message
         if self.not_connect:
@@ -70,6 +79,19 @@ class MainMenu:
             time.sleep(2)
             self.player_leave = False
 
+    def play(self, single: bool = False) -> None:
+        """Run the game and after it show error message if needed.
+
+        Attributes:
+            single - bool - True for game against the computer, False for online game.
+        """
+        status = self.game.game_loop(self.username, single)
+        if status == 1:
+            self.not_connect = True
+        elif status in (2, 0):
+            self.player_leave = True
+            self.game.reset()
+
     def run(self) -> None:
         """Main menu loop. Run until user pressed quit button or close the program."""
         while True:
@@ -83,12 +105,11 @@ class MainMenu:
                         pg.quit()
                         sys.exit()
                     elif self.play_button.is_pressed(x, y):
-                        status = self.game.game_loop(self.username)
-                        if status == 1:
-                            self.not_connect = True
-                        elif status in (2, 0):
-                            self.player_leave = True
-                            self.game.reset()
+                        self.play()
+                    elif self.computer_button.is_pressed(x, y):
+                        self.play(single=True)
+                    elif self.replays_button.is_pressed(x, y):
+                        ReplayMenu().run()
                 elif event.type == pg.KEYDOWN:
                     if event.key == pg.K_BACKSPACE:
                         self.username = self.username[:-1]
@@ -97,3 +118,4 @@ class MainMenu:
                         if len(self.username) < BASE["USERNAME_LEN"] and event.unicode != '\r':
                             self.username += event.unicode
             self.draw()
+            tick()
@@ -0,0 +1,74 @@
+"""
+    Menu with the last recorded matches.
+"""
+import sys
+import time
+from collections import deque
+import pygame as pg
+# utils
+from utils.settings import BASE, COLORS, FONT_SIZE, FONT_NAME, MATCH_LOG, REPLAY
+from utils.helper import draw_text, tick
+from utils.button import Button
+# src
+from game.replay_viewer import ReplayViewer
+from online.match_log import MatchLogReader, ReplayEntry, NO_WINNER
+from online.replay import Replay
+
+
+class ReplayMenu:
+    """Menu with the last recorded matches (see MATCH_LOG).
+    Pressed match is played back in the replay viewer.
+
+    Attributes:
+        entries - List[ReplayEntry] - last REPLAY["LIST"] finished matches from the newest.
+        match_buttons - List[Button] - button for every match.
+        back_button - Button - pressed this button user returns to main menu.
+    """
+    def __init__(self):
+        """Read headers of the last matches from the match log."""
+        reader = MatchLogReader(MATCH_LOG["DIR"])
+        self.entries = list(reversed(deque(reader.replays(), maxlen=REPLAY["LIST"])))
+        self.match_buttons = [Button((BASE["WIDTH"] // 2 - 300, 150 + 55 * i), (600, 45),
+                                     self.describe(entry), FONT_SIZE["CHAT"])
+                              for i, entry in enumerate(self.entries)]
+        self.back_button = Button((BASE["WIDTH"] // 2 - 100, BASE["HEIGHT"] - 120),
+                                  (200, 50), "Back", FONT_SIZE["USERNAME"])
+
+    @staticmethod
+    def describe(entry: ReplayEntry) -> str:
+        """Return text of the match button: start, count of shots and the winner."""
+        start = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.start))
+        winner = "aborted" if entry.winner == NO_WINNER else f"Player {entry.winner + 1} wins"
+        return f"{start}   {entry.moves} shots   {winner}"
+
+    def draw(self) -> None:
+        """Draw all menu objects."""
+        screen = pg.display.get_surface()
+        screen.fill(COLORS["WHITE"])
+        draw_text("Replays", (BASE["WIDTH"] // 2 - 100, 50), FONT_SIZE["WINNER"])
+        if not self.entries:
+            draw_text("No recorded matches", (BASE["WIDTH"] // 2 - 120, 200),
+                      FONT_SIZE["CHAT"], FONT_NAME["CHAT"], COLORS["RED"])
+        for button in self.match_buttons:
+            button.draw(12)
+        self.back_button.draw()
+        pg.display.flip()
+
+    def run(self) -> None:
+        """Menu loop. Run until user pressed back button."""
+        while True:
+            for event in pg.event.get():
+                if event.type == pg.QUIT:
+                    pg.quit()
+                    sys.exit()
+                elif event.type == pg.MOUSEBUTTONDOWN:
+                    x, y = pg.mouse.get_pos()
+                    if self.back_button.is_pressed(x, y):
+                        return
+                    for entry, button in zip(self.entries, self.match_buttons):
+                        if button.is_pressed(x, y):
+                            replay = Replay(entry)
+                            ReplayViewer(replay).run()
+                            replay.close()
+            self.draw()
+            tick()
@@ -0,0 +1,72 @@
+"""
+    Class that represents chat log of one room on the server.
+"""
+from typing import List
+from utils.settings import CHAT
+from online.protocol import U16
+
+
+def line_size(line: str) -> int:
+    """Return bytes of the packed line (see encode_texts)."""
+    return U16.size + len(line.encode("utf-8"))
+
+
+class ChatLog:
+    """Class that represents chat log of one room on the server.
+    Every line has sequence number (1 for the first line), so players send only
+    new lines and get only lines after the last sequence number they have seen.
+    Log is limited by the size of the lines (see trim).
+
+    Attributes:
+        lines - List[str] - all lines in order of sequence numbers.
+        size - int - bytes of all lines (UTF-8 with the length, see encode_texts).
+        limit - int - max bytes of all lines.
+    """
+    def __init__(self, limit: int = CHAT["LOG_SIZE"]):
+        """Create empty chat log."""
+        self.lines = []
+        self.size = 0
+        self.limit = limit
+
+    def last_seq(self) -> int:
+        """Return sequence number of the last line (0 if log is empty)."""
+        return len(self.lines)
+
+    def append(self, lines: List[str]) -> int:
+        """Append new lines to the end of the log.
+
+        Attributes:
+            lines - List[str] - new lines.
+        Return:
+            int - sequence number of the last line.
+        """
+        self.lines.extend(lines)
+        self.size += sum(line_size(line) for line in lines)
+        return self.last_seq()
+
+    def trim(self) -> bool:
+        """If the log is bigger than the limit, drop the oldest lines until it has
+        at most half of the limit. Sequence numbers start again from the first kept line,
+        so players must get the whole log again.
+
+        Return:
+            bool - True if some lines were dropped.
+        """
+        if self.size <= self.limit:
+            return False
+        drop = 0
+        while self.size > self.limit // 2:
+            self.size -= line_size(self.lines[drop])
+            drop += 1
+        del self.lines[:drop]
+        return True
+
+    def since(self, seq: int) -> List[str]:
+        """Return all lines after input sequence number.
+
+        Attributes:
+            seq - int - last sequence number on the player side.
+        Return:
+            List[str] - lines with sequence number bigger than seq.
+        """
+        return self.lines[max(seq, 0):]
@@ -0,0 +1,88 @@
+"""
+    Class that routes connections of the players between worker processes of the server.
+"""
+import os
+import socket
+import selectors
+from typing import List, Set
+# utils
+from utils.settings import SESSION
+
+# kinds of the messages from workers to the coordinator (first byte of the message):
+# ROUTE - accepted connection (its descriptor is attached) and session token from its hello,
+# LEFT - player who waited for the enemy left the worker before he was paired
+ROUTE = 1
+LEFT = 2
+
+
+class Coordinator:
+    """Class that routes connections of the players between worker processes of the server.
+    Workers accept connections on one shared socket and send every connection
+    with its session token here (descriptors are passed over Unix sockets).
+    Resumed session goes back to the worker that has it (first byte of the token),
+    new player goes to the worker where some player waits for the enemy, so both
+    players of the room are always on the same worker. Only new connections
+    go through the coordinator, messages of the game go directly to the workers.
+
+    Attributes:
+        channels - List[socket.socket] - Unix socket of every worker.
+        odd - Set[int] - workers with odd count of players waiting for the enemy.
+        next - int - worker for the next new player if nobody waits.
+        selector - selectors.DefaultSelector - selector of the worker channels.
+    """
+    def __init__(self, channels: List[socket.socket]):
+        """Create coordinator of the workers.
+
+        Attributes:
+            channels - List[socket.socket] - Unix socket (SOCK_SEQPACKET) of every worker.
+        """
+        self.channels = channels
+        self.odd: Set[int] = set()
+        self.next = 0
+        self.selector = selectors.DefaultSelector()
+        for worker, channel in enumerate(channels):
+            self.selector.register(channel, selectors.EVENT_READ, worker)
+
+    def choose(self, token: bytes) -> int:
+        """Return worker for the connection.
+
+        Attributes:
+            token - bytes - session token from the hello, empty for new player.
+        Return:
+            int - number of the worker.
+        """
+        if token:
+            return token[0] % len(self.channels)
+        if self.odd:
+            return self.odd.pop()
+        worker = self.next
+        self.next = (self.next + 1) % len(self.channels)
+        self.odd.add(worker)
+        return worker
+
+    def handle(self, worker: int) -> bool:
+        """Handle one message from the worker.
+
+        Attributes:
+            worker - int - number of the worker.
+        Return:
+            bool - False if the worker has stopped.
+        """
+        data, fds, _, _ = socket.recv_fds(self.channels[worker], 1 + SESSION["TOKEN_SIZE"], 1)
+        if not data:
+            return False
+        if data[0] == ROUTE and fds:
+            token = data[1:]
+            socket.send_fds(self.channels[self.choose(token)], [token], fds)
+        elif data[0] == LEFT:
+            self.odd ^= {worker}
+        for fd in fds:
+            os.close(fd)
+        return True
+
+    def run(self) -> None:
+        """Route connections until all workers have stopped."""
+        while self.selector.get_map():
+            for key, _ in self.selector.select():
+                if not self.handle(key.data):
+                    self.selector.unregister(key.fileobj)
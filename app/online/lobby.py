@@ -0,0 +1,81 @@
+"""
+    Class that represents queue of the players waiting for the enemy on the server.
+"""
+from collections import OrderedDict
+from typing import List, Tuple
+
+
+class Lobby:
+    """Class that represents FIFO queue of the players waiting for the enemy.
+    Count of rooms with two players is limited, so during peaks new players wait
+    in the queue until some match ends. Every operation except updates
+    takes constant time, so joins and leaves are cheap even for long queues.
+
+    Attributes:
+        max_rooms - int - max count of rooms with two players.
+        rooms - int - count of rooms with two players.
+        queue - OrderedDict[int, int] - ids of the waiting players in order of joining
+                and their last shown position in the queue (0 if it wasn't shown yet).
+    """
+    def __init__(self, max_rooms: int):
+        """Create empty lobby.
+
+        Attributes:
+            max_rooms - int - max count of rooms with two players.
+        """
+        self.max_rooms = max_rooms
+        self.rooms = 0
+        self.queue: OrderedDict[int, int] = OrderedDict()
+
+    def join(self, player_id: int) -> int | None:
+        """Pair the new player with the first waiting player if some room is free,
+        else append him to the end of the queue.
+
+        Attributes:
+            player_id - int - unique id of the new player.
+        Return:
+            int | None - id of the paired waiting player, None if new player waits.
+        """
+        if self.queue and self.rooms < self.max_rooms:
+            self.rooms += 1
+            return self.queue.popitem(last=False)[0]
+        self.queue[player_id] = 0
+        return None
+
+    def leave(self, player_id: int) -> bool:
+        """Remove the player from the queue if he is waiting.
+
+        Attributes:
+            player_id - int - unique id of the player.
+        Return:
+            bool - True if the player was waiting.
+        """
+        return self.queue.pop(player_id, None) is not None
+
+    def finish(self) -> List[Tuple[int, int]]:
+        """Free the room of the finished pair and pair the first waiting players
+        while some room is free.
+
+        Return:
+            List[Tuple[int, int]] - ids of the new pairs, the first of the pair waits longer.
+        """
+        self.rooms -= 1
+        pairs = []
+        while len(self.queue) >= 2 and self.rooms < self.max_rooms:
+            self.rooms += 1
+            pairs.append((self.queue.popitem(last=False)[0], self.queue.popitem(last=False)[0]))
+        return pairs
+
+    def updates(self) -> List[Tuple[int, int]]:
+        """Return position (from 1) of every waiting player whose position
+        was changed since the last call.
+
+        Return:
+            List[Tuple[int, int]] - ids of the players and their new positions.
+        """
+        changed = [(player_id, position)
+                   for position, (player_id, shown) in enumerate(self.queue.items(), 1)
+                   if shown != position]
+        for player_id, position in changed:
+            self.queue[player_id] = position
+        return changed
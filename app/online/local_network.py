@@ -0,0 +1,120 @@
+"""
+    Network part for single player game against the computer.
+"""
+import queue
+import random
+from typing import Any, List, Tuple
+from utils.settings import MATCH_LOG
+from engine.board import Board
+from bots.density_bot import DensityBot
+from online.room import Room
+from online.match_log import MatchLog
+from online.protocol import HEADER, encode_message, decode_message
+
+# player numbers in the local room
+HUMAN, COMPUTER = 0, 1
+
+
+def loopback(message: Tuple) -> Tuple:
+    """Encode message same as for sending over the network and decode it back,
+    so both sides get exactly the same data as with the real server.
+
+    Attributes:
+        message - Tuple[Any] - name of the message and its data.
+    Return:
+        Tuple[Any] - decoded message.
+    """
+    frame = encode_message(*message)
+    _, msg_type = HEADER.unpack_from(frame)
+    return decode_message(msg_type, frame[HEADER.size:])
+
+
+class LocalNetwork:
+    """Network part for single player game against the computer. Has the same interface
+    as Network, but instead of the server uses room in the same process, where the enemy
+    is DensityBot. Computer moves right after the player's message that gave him the move.
+
+    Attributes:
+        room - Room - local room, player is the first and computer the second player.
+                      Matches are recorded to the local match log for replays.
+        bot - DensityBot - computer player.
+        rng - random.Random - generator of random numbers for computer's ships.
+        connected - int - player number in the room (same as Network.connected).
+        events - queue.Queue - events pushed by the room and answers on posted messages.
+    """
+    def __init__(self, rng: random.Random = None):
+        """Create local room, join player and computer and set computer's ships."""
+        self.rng = rng or random.Random()
+        self.bot = DensityBot(self.rng)
+        self.room = Room(0, MatchLog(MATCH_LOG["DIR"]) if MATCH_LOG["DIR"] else None)
+        self.events = queue.Queue()
+        self.room.join(HUMAN)
+        self.room.join(COMPUTER)
+        self.room.handle(COMPUTER, ("set_user_name", "Computer"))
+        self.set_bot_ships()
+        self.connected = HUMAN
+
+    def set_bot_ships(self) -> None:
+        """Set random ships of the computer."""
+        self.room.handle(COMPUTER, ("set_user_ships", self.room.sync[COMPUTER].version,
+                                    Board.random(self.rng).layout()))
+
+    def bot_moves(self) -> None:
+        """Make all computer's moves while it is his time to move.
+        Stop if the room rejected the shot, so the same shot is not chosen forever."""
+        game = self.room.game[COMPUTER]
+        while game.is_my_move and game.player_ready and game.enemy_ready and not game.is_over():
+            x, y = self.bot.choose_shot(game.enemy)
+            answer = self.room.handle(COMPUTER, ("shoot", self.room.sync[COMPUTER].version, x, y))
+            if not answer[3]:
+                break
+
+    def close(self) -> None:
+        """Leave the local room and close the match log."""
+        self.room.leave(HUMAN)
+        if self.room.match_log is not None:
+            self.room.match_log.close()
+
+    def get_events(self) -> List[Tuple]:
+        """Return all events pushed by the room and all answers on posted messages
+        since the last call. Never blocks.
+
+        Return:
+            List[Tuple[Any]] - messages (name and data of the message).
+        """
+        events = []
+        while not self.events.empty():
+            events.append(self.events.get_nowait())
+        return events
+
+    def post(self, data: Any, waiter: queue.Queue = None) -> None:
+        """Handle data from player in the local room. If player reset the game,
+        computer also resets it and sets new ships. Then computer makes his moves.
+
+        Attributes:
+            data - Tuple[Any] - name of the message and data that player sends to server.
+            waiter - queue.Queue - queue for the answer,
+                     by default None (answer goes to the events queue).
+        """
+        data = loopback(data)
+        if data[0] == "subscribe":
+            self.room.subscribe(HUMAN, lambda message: self.events.put(loopback(message)))
+        answer = loopback(self.room.handle(HUMAN, data))
+        (self.events if waiter is None else waiter).put(answer)
+        if data[0] == "reset":
+            self.room.handle(COMPUTER, ("reset", self.room.sync[COMPUTER].version))
+            self.set_bot_ships()
+        self.bot_moves()
+
+    def send(self, data: Any) -> Any:
+        """Handle data from player in the local room and return the answer.
+
+        Attributes:
+            data - Tuple[Any] - name of the message and data that player sends to server.
+        Return:
+            Any - answer of the room.
+        """
+        waiter = queue.Queue(maxsize=1)
+        self.post(data, waiter)
+        answer = waiter.get()
+        return answer[1] if len(answer) == 2 else answer[1:]
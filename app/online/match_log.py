@@ -0,0 +1,358 @@
+"""
+    Append-only binary log of all matches played on the server.
+"""
+import os
+import mmap
+import time
+import struct
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+# utils
+from utils.settings import MATCH_LOG
+# src
+from map.bitgrid import SIZE
+from engine.board import Board, NO_SHIP
+from online.protocol import MASK_SIZE, SHIPS_CNT, U16
+
+# match id, unix time in seconds, kind of the record, player and two values of the record
+RECORD = struct.Struct("!QIBBBB")
+# kinds of the records, values of the records:
+# START - nothing, PLACE - index of the ship and its packed position (see Board.positions),
+# SHOT - index of the cell (row * 10 + col) and its new state (2, 3 or 4),
+# END - player is the winner, ABORT - player left or reset the game before the end
+RECORDS = {
+    "START": 1,
+    "PLACE": 2,
+    "SHOT": 3,
+    "END": 4,
+    "ABORT": 5
+}
+SEGMENT_SUFFIX = ".matches"
+# index of finished matches of the segment: match id, start time, winner (NO_WINNER if match
+# was aborted), count of shots and checkpoint interval, then positions of the ships
+# of both players, offsets of all shot records in the segment and checkpoints
+INDEX = struct.Struct("!QIBHB")
+INDEX_SUFFIX = ".index"
+NO_WINNER = 0xFF
+OFFSET = struct.Struct("!I")
+# mask of the shot cells and mask of the sunk ships for both boards
+CHECKPOINT_SIZE = 2 * (MASK_SIZE + U16.size)
+
+
+class MatchRecord(NamedTuple):
+    """One record of the match log (see RECORD).
+
+    Attributes:
+        match_id - int - unique id of the match.
+        time - int - unix time of the record in seconds.
+        kind - int - kind of the record (see RECORDS).
+        player - int - player number.
+        first - int - first value of the record.
+        second - int - second value of the record.
+    """
+    match_id: int
+    time: int
+    kind: int
+    player: int
+    first: int
+    second: int
+
+
+class Match(NamedTuple):
+    """One match assembled from the records of the log.
+
+    Attributes:
+        match_id - int - unique id of the match.
+        start - int - unix time of the start in seconds.
+        layouts - Tuple[bytes, bytes] - packed positions of the ships of both players
+                  (see Board.layout).
+        shots - List[Tuple[int, int, int]] - all shots in order as (player, cell index, state).
+        winner - int | None - number of the winner, None if match was aborted.
+    """
+    match_id: int
+    start: int
+    layouts: Tuple[bytes, bytes]
+    shots: List[Tuple[int, int, int]]
+    winner: int | None
+
+
+class ReplayEntry(NamedTuple):
+    """Finished match in the index of the segment (see INDEX).
+
+    Attributes:
+        path - str - path to the segment file (index has the same name with INDEX_SUFFIX).
+        offset - int - offset of the match in the index.
+        match_id - int - unique id of the match.
+        start - int - unix time of the start in seconds.
+        winner - int - number of the winner, NO_WINNER if match was aborted.
+        moves - int - count of shots.
+        interval - int - count of shots between checkpoints.
+    """
+    path: str
+    offset: int
+    match_id: int
+    start: int
+    winner: int
+    moves: int
+    interval: int
+
+
+class RunningMatch(NamedTuple):
+    """Match that is not finished yet, used for the index of the match.
+
+    Attributes:
+        start - int - unix time of the start in seconds.
+        boards - List[Board] - current boards of both players.
+        offsets - array - offsets of all shot records in the segment.
+        checkpoints - bytearray - packed boards after every MATCH_LOG["CHECKPOINT"] shots.
+    """
+    start: int
+    boards: List[Board]
+    offsets: array
+    checkpoints: bytearray
+
+
+def segment_name(match_id: int) -> str:
+    """Return name (without suffix) of the segment for the match. Match is whole in
+    the segment of the day (UTC) when it was started, even if it ends on the next day.
+
+    Attributes:
+        match_id - int - id of the match (microseconds since epoch, see MatchLog.start).
+    """
+    return time.strftime("%Y-%m-%d", time.gmtime(match_id // 1000000))
+
+
+def pack_checkpoint(boards: List[Board]) -> bytes:
+    """Pack shot cells and sunk ships of both boards."""
+    return b"".join((board.grid.hits | board.grid.misses).to_bytes(MASK_SIZE, "big")
+                    + U16.pack(board.sunk_mask()) for board in boards)
+
+
+class MatchLog:
+    """Append-only binary log of all matches played on the server.
+    Every placement, shot and result is one fixed-size record (see RECORD),
+    records are appended to the segment file of the day when the match was started.
+    Records of simultaneous matches are interleaved, every record has id of its match.
+    When the match is finished, offsets of its shots and periodic checkpoints
+    of the boards are appended to the index of the segment (see INDEX),
+    so replay can jump to any shot without reading the whole match.
+
+    Attributes:
+        directory - str - directory with segment files.
+        shard - int - number of the server worker that writes this log.
+        shards - int - count of the server workers, every worker has its own segment files
+                 and ids of its matches have remainder shard after division by shards.
+        files - Dict[str, BinaryIO] - opened segment and index files by segment name.
+        running - Dict[int, RunningMatch] - matches that are not finished yet by match id.
+        last_id - int - last given match id.
+    """
+    def __init__(self, directory: str, shard: int = 0, shards: int = 1):
+        """Create log in the directory (directory is created if it doesn't exist).
+
+        Attributes:
+            directory - str - directory with segment files.
+            shard - int - number of the server worker that writes this log.
+            shards - int - count of the server workers.
+        """
+        self.directory = directory
+        self.shard = shard
+        self.shards = shards
+        self.files = {}
+        self.running: Dict[int, RunningMatch] = {}
+        self.last_id = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def name(self, match_id: int) -> str:
+        """Return name of the segment of the match (see segment_name) for this worker."""
+        name = segment_name(match_id)
+        return f"{name}.{self.shard}" if self.shards > 1 else name
+
+    def open(self, name: str) -> Tuple:
+        """Return opened segment and index files, open them if needed.
+
+        Attributes:
+            name - str - name of the segment (see segment_name).
+        """
+        if name not in self.files:
+            path = os.path.join(self.directory, name)
+            # pylint: disable-next=consider-using-with
+            self.files[name] = (open(path + SEGMENT_SUFFIX, "ab"), open(path + INDEX_SUFFIX, "ab"))
+        return self.files[name]
+
+    def append(self, match_id: int, kind: str, player: int = 0,
+               first: int = 0, second: int = 0) -> int:
+        """Append one record to the segment of the match.
+
+        Attributes:
+            match_id - int - id of the match.
+            kind - str - kind of the record (see RECORDS).
+            player - int - player number.
+            first - int - first value of the record.
+            second - int - second value of the record.
+        Return:
+            int - offset of the record in the segment.
+        """
+        file = self.open(self.name(match_id))[0]
+        offset = file.tell()
+        file.write(RECORD.pack(match_id, int(time.time()), RECORDS[kind], player, first, second))
+        return offset
+
+    def start(self) -> int:
+        """Start new match.
+
+        Return:
+            int - unique id of the match (microseconds since epoch, increasing).
+        """
+        now = time.time_ns() // 1000
+        self.last_id = max(self.last_id + self.shards, now + (self.shard - now) % self.shards)
+        self.append(self.last_id, "START")
+        self.running[self.last_id] = RunningMatch(int(time.time()), [Board(), Board()],
+                                                  array("I"), bytearray())
+        return self.last_id
+
+    def place(self, match_id: int, player: int, layout: bytes) -> None:
+        """Append positions of all ships of the player.
+
+        Attributes:
+            match_id - int - id of the match.
+            player - int - player number.
+            layout - bytes - packed positions of the ships (see Board.layout).
+        """
+        for idx, pos in enumerate(layout):
+            self.append(match_id, "PLACE", player, idx, pos)
+        self.running[match_id].boards[player] = Board.from_layout(layout)
+
+    def shot(self, match_id: int, player: int, cell: int, state: int) -> None:
+        """Append shot of the player. After every MATCH_LOG["CHECKPOINT"] shots
+        boards are saved for the index.
+
+        Attributes:
+            match_id - int - id of the match.
+            player - int - player who shot.
+            cell - int - index of the cell (row * 10 + col).
+            state - int - new state of the cell: 2 (hit), 3 (miss) or 4 (ship is sunk).
+        """
+        match = self.running[match_id]
+        match.offsets.append(self.append(match_id, "SHOT", player, cell, state))
+        match.boards[1 - player].shoot(*divmod(cell, SIZE))
+        if len(match.offsets) % MATCH_LOG["CHECKPOINT"] == 0:
+            match.checkpoints.extend(pack_checkpoint(match.boards))
+
+    def finish(self, match_id: int, kind: str, player: int) -> None:
+        """Append the last record of the match and its index and flush the files,
+        so finished matches are on the disk. Segments of previous days are closed
+        when their last match is finished.
+
+        Attributes:
+            match_id - int - id of the match.
+            kind - str - END (player is the winner) or ABORT (player left the match).
+            player - int - player number.
+        """
+        self.append(match_id, kind, player)
+        match = self.running.pop(match_id)
+        name = self.name(match_id)
+        segment, index = self.open(name)
+        index.write(INDEX.pack(match_id, match.start, player if kind == "END" else NO_WINNER,
+                               len(match.offsets), MATCH_LOG["CHECKPOINT"])
+                    + b"".join(board.layout() for board in match.boards)
+                    + b"".join(OFFSET.pack(offset) for offset in match.offsets)
+                    + match.checkpoints)
+        segment.flush()
+        index.flush()
+        today = self.name(time.time_ns() // 1000)
+        if name != today and all(self.name(other) != name for other in self.running):
+            segment.close()
+            index.close()
+            del self.files[name]
+
+    def close(self) -> None:
+        """Close all opened segment and index files."""
+        for segment, index in self.files.values():
+            segment.close()
+            index.close()
+        self.files = {}
+
+
+class MatchLogReader:
+    """Reader of the match log. Segments are memory-mapped and records are read
+    one by one, so only unfinished matches are kept in memory.
+
+    Attributes:
+        directory - str - directory with segment files.
+    """
+    def __init__(self, directory: str):
+        """Create reader of the log in the directory.
+
+        Attributes:
+            directory - str - directory with segment files.
+        """
+        self.directory = directory
+
+    def segments(self) -> List[str]:
+        """Return paths of all segment files from the oldest day."""
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if name.endswith(SEGMENT_SUFFIX)]
+
+    @staticmethod
+    def records(path: str) -> Iterator[MatchRecord]:
+        """Read all records of the segment. Incomplete record at the end
+        (server was killed during writing) is skipped.
+
+        Attributes:
+            path - str - path to the segment file.
+        """
+        size = os.path.getsize(path) // RECORD.size * RECORD.size
+        if size == 0:
+            return
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0,
+                                                  access=mmap.ACCESS_READ) as data:
+            for offset in range(0, size, RECORD.size):
+                yield MatchRecord(*RECORD.unpack_from(data, offset))
+
+    def replays(self) -> Iterator[ReplayEntry]:
+        """Read all entries of the segment indexes in order of the end of the match.
+        Only headers of the entries are read (see Replay for the whole match)."""
+        for path in self.segments():
+            index = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+            if not os.path.isfile(index) or os.path.getsize(index) == 0:
+                continue
+            with open(index, "rb") as file, mmap.mmap(file.fileno(), 0,
+                                                       access=mmap.ACCESS_READ) as data:
+                offset = 0
+                while offset + INDEX.size <= len(data):
+                    entry = ReplayEntry(path, offset, *INDEX.unpack_from(data, offset))
+                    offset += (INDEX.size + 2 * SHIPS_CNT + entry.moves * OFFSET.size
+                               + entry.moves // entry.interval * CHECKPOINT_SIZE)
+                    if offset > len(data):
+                        break  # incomplete entry, server was killed during writing
+                    yield entry
+
+    def matches(self, aborted: bool = False) -> Iterator[Match]:
+        """Read matches in order of their last record.
+
+        Attributes:
+            aborted - bool - True if also aborted matches are returned.
+        """
+        started: Dict[int, Tuple[int, List[bytearray], List[Tuple[int, int, int]]]] = {}
+        for path in self.segments():
+            for record in self.records(path):
+                if record.kind == RECORDS["START"]:
+                    started[record.match_id] = (record.time, [bytearray([NO_SHIP]) * SHIPS_CNT
+                                                              for _ in range(2)], [])
+                elif record.match_id not in started:
+                    continue  # start of the match is in the removed segment
+                elif record.kind == RECORDS["PLACE"]:
+                    started[record.match_id][1][record.player][record.first] = record.second
+                elif record.kind == RECORDS["SHOT"]:
+                    started[record.match_id][2].append(
+                        (record.player, record.first, record.second))
+                else:
+                    start, layouts, shots = started.pop(record.match_id)
+                    if record.kind == RECORDS["END"]:
+                        yield Match(record.match_id, start, tuple(map(bytes, layouts)),
+                                    shots, record.player)
+                    elif aborted:
+                        yield Match(record.match_id, start, tuple(map(bytes, layouts)),
+                                    shots, None)
@@ -0,0 +1,158 @@
+"""
+    Class that collects metrics of the server and shows them as text.
+"""
+import os
+import time
+import asyncio
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List
+
+# upper bounds of the histogram buckets in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PREFIX = "battleships"
+
+
+class Histogram:
+    """Class that represents histogram of durations with fixed buckets (see BUCKETS).
+
+    Attributes:
+        counts - List[int] - count of values in every bucket, the last bucket is for values
+                 bigger than all bounds.
+        total - float - sum of all values.
+    """
+    def __init__(self):
+        """Create empty histogram."""
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one value (in seconds) to the histogram."""
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        """Return lines of the histogram in the text format (cumulative buckets, sum, count).
+
+        Attributes:
+            name - str - name of the metric.
+            labels - str - labels of the metric without braces.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Class that collects metrics of the server and shows them in the Prometheus text format.
+    Metrics are only counted in memory, so they are cheap enough for every message.
+
+    Attributes:
+        started - float - time of the server start.
+        connections - int - count of connected players.
+        rooms - int - count of rooms on the server.
+        waiting - int - count of players in the lobby queue.
+        messages - Counter - count of received messages by name.
+        bytes_in - Counter - received bytes by name of the message.
+        bytes_out - Counter - sent bytes by name of the message.
+        latency - Dict[str, Histogram] - time from reading the message to the encoded answer
+                  by name of the message.
+        encode - Dict[str, Histogram] - encoding time of sent messages by name.
+    """
+    def __init__(self):
+        """Create empty metrics."""
+        self.started = time.time()
+        self.connections = 0
+        self.rooms = 0
+        self.waiting = 0
+        self.messages = Counter()
+        self.bytes_in = Counter()
+        self.bytes_out = Counter()
+        self.latency: Dict[str, Histogram] = {}
+        self.encode: Dict[str, Histogram] = {}
+
+    def observe_request(self, name: str, size: int, seconds: float) -> None:
+        """Count one received message.
+
+        Attributes:
+            name - str - name of the message.
+            size - int - size of the frame in bytes.
+            seconds - float - time of the handling (decoding, handler and encoding of answer).
+        """
+        self.messages[name] += 1
+        self.bytes_in[name] += size
+        self.latency.setdefault(name, Histogram()).observe(seconds)
+
+    def observe_send(self, name: str, size: int, seconds: float) -> None:
+        """Count one sent message (answer or pushed event).
+
+        Attributes:
+            name - str - name of the message.
+            size - int - size of the frame in bytes.
+            seconds - float - time of the encoding.
+        """
+        self.bytes_out[name] += size
+        self.encode.setdefault(name, Histogram()).observe(seconds)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text format."""
+        lines = [
+            f"# TYPE {PREFIX}_uptime_seconds gauge",
+            f"{PREFIX}_uptime_seconds {time.time() - self.started:.0f}",
+            f"# TYPE {PREFIX}_connections gauge",
+            f"{PREFIX}_connections {self.connections}",
+            f"# TYPE {PREFIX}_rooms gauge",
+            f"{PREFIX}_rooms {self.rooms}",
+            f"# TYPE {PREFIX}_waiting gauge",
+            f"{PREFIX}_waiting {self.waiting}"
+        ]
+        for metric, counter in (("messages_total", self.messages),
+                                ("bytes_in_total", self.bytes_in),
+                                ("bytes_out_total", self.bytes_out)):
+            lines.append(f"# TYPE {PREFIX}_{metric} counter")
+            lines += [f'{PREFIX}_{metric}{{message="{name}"}} {value}'
+                      for name, value in sorted(counter.items())]
+        for metric, histograms in (("latency_seconds", self.latency),
+                                   ("encode_seconds", self.encode)):
+            lines.append(f"# TYPE {PREFIX}_{metric} histogram")
+            for name, histogram in sorted(histograms.items()):
+                lines += histogram.lines(f"{PREFIX}_{metric}", f'message="{name}"')
+        return "\n".join(lines) + "\n"
+
+    async def handle_http(self, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP request by all metrics (path of the request is not checked).
+
+        Attributes:
+            reader - asyncio.StreamReader - reading part of the connection.
+            writer - asyncio.StreamWriter - writing part of the connection.
+        """
+        try:
+            while (await reader.readline()).strip():
+                pass  # skip request line and headers
+            body = self.render().encode()
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    def dump(self, path: str) -> None:
+        """Write all metrics to the file. File is replaced at once,
+        so readers never see half-written metrics."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(tmp_path, path)
+
+    async def dump_loop(self, path: str, interval: float) -> None:
+        """Dump metrics to the file every interval seconds until the task is cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.dump(path)
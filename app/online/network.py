@@ -1,51 +1,229 @@
 """
     Network part for player.
 """
+import time
+import queue
 import socket
-import pickle
-from typing import Any
-from utils.settings import NETWORK
+import threading
+from collections import deque
+from typing import Any, List, Tuple
+from utils.settings import NETWORK, SESSION
+from online.protocol import PUSHES, encode_message, read_message
 
 
 class Network:
-    """Network part for player.
+    """Network part for player. All socket operations are done by background threads,
+    so the game loop never waits for the network: messages are sent by post and
+    answers on them come together with events pushed by the server (see get_events).
+    If connection is lost, it is connected again and the session is resumed
+    (see reconnect), so the match goes on.
 
     Attributes:
         client - socket - socket.
         addr - Tuple[int, int] - IPv4 of server and server's port.
+        token - bytes - session token from the server (empty before the first connection).
         connected - Any - data that returned server after connection.
+        outgoing - queue.Queue - generation and encoded message that wait for sending
+                   (None stops writer).
+        events - queue.Queue - events pushed by the server and answers on posted messages,
+                 None if connection is lost.
+        waiters - deque - for every sent message in order of sending None if answer goes
+                  to the events queue or queue.Queue if send waits for this answer.
+        generation - int - number of the current connection, messages posted
+                     before reconnection are not sent to the new connection.
+        lock - threading.Lock - lock for the client, waiters and generation.
+        closed - bool - True if connection is lost or closed.
+        stopped - bool - True if player closed the connection.
+        reader - threading.Thread - background thread that reads all server messages.
+        writer - threading.Thread - background thread that sends all player messages.
     """
     def __init__(self):
         """Set up client network part for player and connect to server."""
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.addr = (NETWORK['SERVER'], NETWORK['PORT'])
+        self.token = b""
+        self.outgoing = queue.Queue()
+        self.events = queue.Queue()
+        self.waiters = deque()
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stopped = False
+        self.reader = threading.Thread(target=self.read_loop, daemon=True)
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
         self.connected = self.connect()
+        if self.connected is not False:
+            self.reader.start()
+            self.writer.start()
+
+    def hello(self, client: socket.socket) -> Tuple[int, bytes, bool]:
+        """Connect the socket to the server and start new session
+        or resume the session of the token.
+
+        Attributes:
+            client - socket - new socket.
+        Return:
+            Tuple[int, bytes, bool] - player number in the room, session token (empty if
+            the session can't be resumed) and True if the session was resumed.
+        """
+        client.connect(self.addr)
+        client.sendall(encode_message("hello", self.token))
+        return read_message(client)[1:]
 
     def connect(self) -> Any:
         """First connection to server. Connect to server and get first data from server.
 
         Return:
-            Any - server answer (global user id on server).
-            bool - False if server has already maximum count of connections
-            or server part raise error.
+            Any - server answer (player number in the room).
+            bool - False if server part raise error.
         """
         try:
-            self.client.connect(self.addr)
-        except (ConnectionRefusedError, ConnectionResetError):
+            player, self.token, _ = self.hello(self.client)
+        except (ConnectionError, ValueError):
             print('Connection lost')
             return False
-        server_out = pickle.loads(self.client.recv(NETWORK["MSG_SIZE"]))
-        if server_out == "max_player_count":
-            return False
-        return server_out
+        return player
+
+    def reconnect(self) -> bool:
+        """Connect again and resume the session. Attempts are repeated every SESSION["RETRY"]
+        seconds until SESSION["GRACE"] ends. Messages posted before are not sent anymore
+        and their answers don't come, so the game gets ("reconnecting",) event at the start
+        and ("resumed",) event at the end and it asks for the missed changes.
+
+        Return:
+            bool - True if the session was resumed.
+        """
+        self.events.put(("reconnecting",))
+        deadline = time.monotonic() + SESSION["GRACE"]
+        while not self.stopped and time.monotonic() < deadline:
+            time.sleep(SESSION["RETRY"])
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.settimeout(SESSION["RETRY"])
+            try:
+                _, token, resumed = self.hello(client)
+            except (OSError, ValueError):
+                client.close()
+                continue
+            if not resumed or self.stopped:
+                client.close()
+                return False
+            client.settimeout(None)
+            with self.lock:
+                old, self.client, self.token = self.client, client, token
+                self.generation += 1
+                waiters, self.waiters = self.waiters, deque()
+            old.close()
+            for waiter in waiters:
+                if waiter is not None:
+                    waiter.put(None)
+            self.events.put(("resumed",))
+            return True
+        return False
+
+    def read_loop(self) -> None:
+        """Background thread. Read messages from the server, put events and answers
+        on posted messages to the events queue and give other answers to waiting send.
+        If connection is lost and it can't be resumed, put None to the events queue
+        and to all waiting sends.
+        """
+        while True:
+            try:
+                message = read_message(self.client)
+            except (OSError, ValueError):
+                if not self.stopped and self.reconnect():
+                    continue
+                break
+            if message[0] in PUSHES:
+                self.events.put(message)
+                continue
+            with self.lock:
+                waiter = self.waiters.popleft() if self.waiters else None
+            if waiter is None:
+                self.events.put(message)
+            else:
+                waiter.put(message)
+        self.closed = True
+        self.events.put(None)
+        with self.lock:
+            waiters, self.waiters = self.waiters, deque()
+        for waiter in waiters:
+            if waiter is not None:
+                waiter.put(None)
+
+    def write_loop(self) -> None:
+        """Background thread. Send all posted messages to the server.
+        If sending fails, socket is shut down, so reader starts reconnection."""
+        while True:
+            item = self.outgoing.get()
+            if item is None:
+                return
+            generation, frame = item
+            with self.lock:
+                client = self.client if generation == self.generation else None
+            if client is None:
+                continue
+            try:
+                client.sendall(frame)
+            except OSError:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        """Leave the game and close connection to the server (session ends immediately).
+        Background threads stop after that."""
+        self.stopped = True
+        if not self.closed:
+            self.post(("leave",))
+        self.outgoing.put(None)
+        if self.writer.is_alive():
+            self.writer.join(SESSION["RETRY"])  # leave is sent before closing
+        try:
+            self.client.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.client.close()
+
+    def get_events(self) -> List[Tuple]:
+        """Return all events pushed by the server and all answers on posted messages
+        since the last call. Never blocks.
+
+        Return:
+            List[Tuple[Any] | None] - messages (name and data of the message),
+            None if connection is lost.
+        """
+        events = []
+        while not self.events.empty():
+            events.append(self.events.get_nowait())
+        return events
+
+    def post(self, data: Any, waiter: queue.Queue = None) -> None:
+        """Send data from player to server without waiting. Data are encoded immediately,
+        so the caller can change them after that.
+
+        Attributes:
+            data - Tuple[Any] - name of the message and data that player sends to server.
+            waiter - queue.Queue - queue for the server answer,
+                     by default None (answer goes to the events queue).
+        """
+        frame = encode_message(*data)
+        with self.lock:
+            self.waiters.append(waiter)
+            self.outgoing.put((self.generation, frame))
 
     def send(self, data: Any) -> Any:
-        """Send data from player to server and get and return server answer.
+        """Send data from player to server and wait for the server answer.
+        Used only for short handshakes outside the game loop (see post).
 
         Attributes:
-            data - Any - data that player sends to server.
+            data - Tuple[Any] - name of the message and data that player sends to server.
         Return:
             Any - server answer.
         """
-        self.client.send(pickle.dumps(data))
-        return pickle.loads(self.client.recv(NETWORK["MSG_SIZE"]))
+        waiter = queue.Queue(maxsize=1)
+        self.post(data, waiter)
+        answer = None if self.closed else waiter.get()
+        if answer is None:
+            raise ConnectionError("Connection lost")
+        return answer[1] if len(answer) == 2 else answer[1:]
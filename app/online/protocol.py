@@ -0,0 +1,444 @@
+"""
+    Length-prefixed binary protocol between players and the server.
+"""
+import socket
+import struct
+import asyncio
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+# utils
+from utils.settings import NETWORK, GRID_PARAMS
+# src
+from ships.placement import FLEET_SIZES
+from engine.board import Board, NO_SHIP, VERTICAL
+
+# payload length and message type
+HEADER = struct.Struct("!IB")
+U8 = struct.Struct("!B")
+U16 = struct.Struct("!H")
+U32 = struct.Struct("!I")
+CELLS_CNT = GRID_PARAMS["GRID_SIZE"] ** 2
+MASK_SIZE = (CELLS_CNT + 7) // 8
+SHIP_SIZES = FLEET_SIZES
+SHIPS_CNT = len(SHIP_SIZES)
+# sections of the state delta, every section is sent only if it was changed
+SECTIONS = {
+    "CELLS": 1,
+    "PLAYER_LAYOUT": 1 << 1,
+    "ENEMY_LAYOUT": 1 << 2,
+    "PLAYER_SUNK": 1 << 3,
+    "ENEMY_SUNK": 1 << 4,
+    "FLAGS": 1 << 5
+}
+# kinds of the events that server pushes to subscribed players
+EVENTS = {
+    "ENEMY_JOINED": 1,
+    "ENEMY_NAME": 2,
+    "ENEMY_READY": 3,
+    "ENEMY_MOVE": 4,
+    "ENEMY_RESET": 5,
+    "ENEMY_LEFT": 6,
+    "QUEUE": 7,  # texts are position of the player in the lobby queue (see Lobby)
+    "ENEMY_AWAY": 8,  # enemy lost connection, he can resume the session (see SESSION)
+    "ENEMY_BACK": 9
+}
+
+
+class StateDelta(NamedTuple):
+    """Changes of the game state of one player since some version.
+
+    Attributes:
+        version - int - version of the state after these changes.
+        cells - List[Tuple[int, int]] - changed cells as (index, state). Indexes from 0
+                to CELLS_CNT - 1 are cells of the player, next are cells of the enemy.
+        layouts - Tuple[bytes | None, bytes | None] - packed positions of player's
+                  and enemy's ships, None if not changed.
+        sunk - Tuple[int | None, int | None] - masks of sunk ships of the player
+               and the enemy, None if not changed.
+        flags - int | None - packed flags of the game (see pack_flags), None if not changed.
+    """
+    version: int
+    cells: List[Tuple[int, int]]
+    layouts: Tuple[bytes | None, bytes | None]
+    sunk: Tuple[int | None, int | None]
+    flags: int | None
+
+    def is_empty(self) -> bool:
+        """Return True if nothing was changed."""
+        return (not self.cells and self.flags is None
+                and self.layouts == (None, None) and self.sunk == (None, None))
+
+
+def encode_layout(fleet: Any) -> bytes:
+    """Pack positions of all ships in the fleet.
+    Every ship is one byte with index of its first cell (row * 10 + col)
+    and orientation in the highest bit (same as Board.layout).
+
+    Attributes:
+        fleet - Fleet - fleet of the player.
+    Return:
+        bytes - packed positions of the ships.
+    """
+    size = GRID_PARAMS["GRID_SIZE"]
+    layout = bytearray()
+    for ship in fleet.itr_fleet():
+        if len(ship.pos) == 0:
+            layout.append(NO_SHIP)
+            continue
+        first = min(ship.pos, key=lambda cell: (cell.y, cell.x))
+        orient = VERTICAL if ship.orientation == 1 else 0
+        layout.append((first.y * size + first.x) | orient)
+    return bytes(layout)
+
+
+def check_layout(layout: bytes) -> Board:
+    """Check packed positions of the ships received from the player and create the board.
+    Raise ValueError if some ship is not on the board, is not whole on the board
+    or touches other ship.
+
+    Attributes:
+        layout - bytes - packed positions of the ships (see encode_layout).
+    Return:
+        Board - board with the whole fleet.
+    """
+    if NO_SHIP in layout:
+        raise ValueError("Fleet is not complete")
+    return Board.from_layout(layout)
+
+
+def pack_flags(game: Any) -> int:
+    """Pack is_my_move, enemy_ready, player_ready and has_enemy of the game to one byte."""
+    return (game.is_my_move | game.enemy_ready << 1 | game.player_ready << 2
+            | game.has_enemy << 3)
+
+
+def unpack_flags(flags: int) -> Tuple[bool, bool, bool, int]:
+    """Unpack flags packed by pack_flags.
+
+    Return:
+        Tuple[bool, bool, bool, int] - is_my_move, enemy_ready, player_ready and has_enemy.
+    """
+    return bool(flags & 1), bool(flags & 2), bool(flags & 4), flags >> 3 & 3
+
+
+def encode_state(delta: StateDelta) -> bytes:
+    """Pack state delta. Firstly goes version and mask of sections, then only
+    sections that were changed: cells as (index, state) pairs, ships layouts,
+    sunk masks and flags.
+
+    Attributes:
+        delta - StateDelta - changes of the game state.
+    Return:
+        bytes - packed state delta.
+    """
+    sections = 0
+    body = bytearray()
+    if delta.cells:
+        sections |= SECTIONS["CELLS"]
+        body += U8.pack(len(delta.cells))
+        for idx, state in delta.cells:
+            body += bytes((idx, state))
+    for layout, section in zip(delta.layouts, ("PLAYER_LAYOUT", "ENEMY_LAYOUT")):
+        if layout is not None:
+            sections |= SECTIONS[section]
+            body += layout
+    for sunk, section in zip(delta.sunk, ("PLAYER_SUNK", "ENEMY_SUNK")):
+        if sunk is not None:
+            sections |= SECTIONS[section]
+            body += U16.pack(sunk)
+    if delta.flags is not None:
+        sections |= SECTIONS["FLAGS"]
+        body += U8.pack(delta.flags)
+    return U32.pack(delta.version) + U8.pack(sections) + bytes(body)
+
+
+def decode_state(payload: bytes) -> Tuple[StateDelta]:
+    """Unpack state delta packed by encode_state."""
+    (version,) = U32.unpack_from(payload)
+    sections = payload[U32.size]
+    ofs = U32.size + U8.size
+    cells = []
+    if sections & SECTIONS["CELLS"]:
+        cnt = payload[ofs]
+        cells = [(payload[ofs + 1 + 2 * i], payload[ofs + 2 + 2 * i]) for i in range(cnt)]
+        ofs += U8.size + 2 * cnt
+    layouts = []
+    for section in ("PLAYER_LAYOUT", "ENEMY_LAYOUT"):
+        layouts.append(payload[ofs:ofs + SHIPS_CNT] if sections & SECTIONS[section] else None)
+        ofs += SHIPS_CNT if sections & SECTIONS[section] else 0
+    sunk = []
+    for section in ("PLAYER_SUNK", "ENEMY_SUNK"):
+        sunk.append(U16.unpack_from(payload, ofs)[0] if sections & SECTIONS[section] else None)
+        ofs += U16.size if sections & SECTIONS[section] else 0
+    flags = payload[ofs] if sections & SECTIONS["FLAGS"] else None
+    return (StateDelta(version, cells, tuple(layouts), tuple(sunk), flags),)
+
+
+def encode_since(since: int) -> bytes:
+    """Pack version of the state that player already has (0 if player has nothing)."""
+    return U32.pack(since)
+
+
+def decode_since(payload: bytes) -> Tuple[int]:
+    """Unpack version of the state packed by encode_since."""
+    return U32.unpack_from(payload)
+
+
+def encode_texts(texts: List[str]) -> bytes:
+    """Pack list of texts. Every text is UTF-8 with its length before."""
+    out = bytearray(U16.pack(len(texts)))
+    for text in texts:
+        raw = text.encode("utf-8")
+        out += U16.pack(len(raw)) + raw
+    return bytes(out)
+
+
+def decode_texts(payload: bytes) -> Tuple[List[str]]:
+    """Unpack list of texts packed by encode_texts."""
+    (cnt,) = U16.unpack_from(payload)
+    ofs = U16.size
+    texts = []
+    for _ in range(cnt):
+        (length,) = U16.unpack_from(payload, ofs)
+        ofs += U16.size
+        texts.append(payload[ofs:ofs + length].decode("utf-8"))
+        ofs += length
+    return (texts,)
+
+
+def encode_chat(seq: int, lines: List[str]) -> bytes:
+    """Pack chat lines with sequence number. From player it is the last sequence number
+    the player has seen and his new lines, from server it is sequence number
+    before the first line and all lines after it (see ChatLog).
+
+    Attributes:
+        seq - int - sequence number.
+        lines - List[str] - chat lines.
+    """
+    return U32.pack(seq) + encode_texts(lines)
+
+
+def decode_chat(payload: bytes) -> Tuple[int, List[str]]:
+    """Unpack chat lines packed by encode_chat."""
+    return (U32.unpack_from(payload)[0], *decode_texts(payload[U32.size:]))
+
+
+def encode_event(kind: int, delta: StateDelta, texts: List[str]) -> bytes:
+    """Pack event pushed by the server: kind of the event, changes of the state
+    and texts of the event (username of the enemy).
+
+    Attributes:
+        kind - int - kind of the event (see EVENTS).
+        delta - StateDelta - changes of the game state since the last answer or event.
+        texts - List[str] - texts of the event, can be empty.
+    """
+    state = encode_state(delta)
+    return U8.pack(kind) + U16.pack(len(state)) + state + encode_texts(texts)
+
+
+def decode_event(payload: bytes) -> Tuple[int, StateDelta, List[str]]:
+    """Unpack event packed by encode_event."""
+    (length,) = U16.unpack_from(payload, U8.size)
+    ofs = U8.size + U16.size
+    return (payload[0], *decode_state(payload[ofs:ofs + length]),
+            *decode_texts(payload[ofs + length:]))
+
+
+def encode_shoot(since: int, row: int, col: int) -> bytes:
+    """Pack players shot: version of his state and index of the shot enemy cell."""
+    return U32.pack(since) + U8.pack(row * GRID_PARAMS["GRID_SIZE"] + col)
+
+
+def decode_shoot(payload: bytes) -> Tuple[int, int, int]:
+    """Unpack players shot packed by encode_shoot."""
+    return (U32.unpack_from(payload)[0], *divmod(payload[U32.size], GRID_PARAMS["GRID_SIZE"]))
+
+
+def encode_shot(row: int, col: int, state: int, delta: StateDelta) -> bytes:
+    """Pack result of the shot resolved by the server: index of the cell, its new state
+    (2 - hit, 3 - miss, 4 - ship is sunk, 0 - shot was rejected) and changes of the state
+    (cells around the sunk ship, sunk masks and flags).
+    """
+    return U8.pack(row * GRID_PARAMS["GRID_SIZE"] + col) + U8.pack(state) + encode_state(delta)
+
+
+def decode_shot(payload: bytes) -> Tuple[int, int, int, StateDelta]:
+    """Unpack result of the shot packed by encode_shot."""
+    return (*divmod(payload[0], GRID_PARAMS["GRID_SIZE"]), payload[U8.size],
+            *decode_state(payload[2 * U8.size:]))
+
+
+def encode_ships(since: int, board: Any, fleet: Any = None) -> bytes:
+    """Pack positions of the players ships after the set phase. Shots are resolved
+    only by the server, so board is sent without them.
+
+    Attributes:
+        since - int - version of the state on the player side.
+        board - Grid | Board - board of the player (Board contains also the fleet).
+        fleet - Fleet - fleet of the player, None if board is Board.
+    """
+    return U32.pack(since) + (board.layout() if fleet is None else encode_layout(fleet))
+
+
+def decode_ships(payload: bytes) -> Tuple[int, bytes]:
+    """Unpack positions of the players ships packed by encode_ships. Layout is not
+    checked here, the room rejects invalid fleet (see check_layout)."""
+    return U32.unpack_from(payload)[0], payload[U32.size:]
+
+
+def encode_name(name: str) -> bytes:
+    """Pack username as UTF-8."""
+    return name.encode("utf-8")
+
+
+def decode_name(payload: bytes) -> Tuple[str]:
+    """Unpack username packed by encode_name."""
+    return (payload.decode("utf-8"),)
+
+
+def encode_enemy_name(name: str, has_enemy: int) -> bytes:
+    """Pack username of the enemy and has_enemy status."""
+    return U8.pack(has_enemy) + name.encode("utf-8")
+
+
+def decode_enemy_name(payload: bytes) -> Tuple[str, int]:
+    """Unpack username of the enemy and has_enemy status."""
+    return payload[U8.size:].decode("utf-8"), payload[0]
+
+
+def encode_token(token: bytes) -> bytes:
+    """Pack session token (empty for new session)."""
+    return token
+
+
+def decode_token(payload: bytes) -> Tuple[bytes]:
+    """Unpack session token packed by encode_token."""
+    return (bytes(payload),)
+
+
+def encode_session(player: int, token: bytes, resumed: bool) -> bytes:
+    """Pack answer on the hello: player number, True if the session was resumed
+    and session token (empty if session can't be resumed)."""
+    return U8.pack(player) + U8.pack(resumed) + token
+
+
+def decode_session(payload: bytes) -> Tuple[int, bytes, bool]:
+    """Unpack answer on the hello packed by encode_session."""
+    return payload[0], bytes(payload[2 * U8.size:]), bool(payload[U8.size])
+
+
+def encode_empty() -> bytes:
+    """Pack message without data."""
+    return b""
+
+
+def decode_empty(_payload: bytes) -> Tuple:
+    """Unpack message without data."""
+    return ()
+
+
+# message name: (message type, encoder, decoder)
+MESSAGES: Dict[str, Tuple[int, Callable[..., bytes], Callable[[bytes], Tuple]]] = {
+    "set_user_name": (2, encode_name, decode_name),
+    "get_enemy_name": (3, encode_name, decode_name),
+    "enemy_name": (4, encode_enemy_name, decode_enemy_name),
+    "set_user_ships": (5, encode_ships, decode_ships),
+    "get": (7, encode_since, decode_since),
+    "reset": (8, encode_since, decode_since),
+    "state": (9, encode_state, decode_state),
+    "chat": (10, encode_chat, decode_chat),
+    "subscribe": (11, encode_since, decode_since),
+    "event": (12, encode_event, decode_event),
+    "chat_lines": (13, encode_chat, decode_chat),
+    "shoot": (14, encode_shoot, decode_shoot),
+    "shot": (15, encode_shot, decode_shot),
+    "hello": (16, encode_token, decode_token),
+    "session": (17, encode_session, decode_session),
+    "leave": (18, encode_empty, decode_empty),
+}
+NAMES = {msg_type: name for name, (msg_type, _, _) in MESSAGES.items()}
+# messages that server sends without request
+PUSHES = ("event", "chat_lines")
+
+
+def encode_message(name: str, *args: Any) -> bytes:
+    """Create one frame (header and payload) of the message.
+
+    Attributes:
+        name - str - name of the message.
+        args - Any - data of the message.
+    Return:
+        bytes - frame of the message.
+    """
+    msg_type, encoder, _ = MESSAGES[name]
+    payload = encoder(*args)
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+def decode_message(msg_type: int, payload: bytes) -> Tuple:
+    """Decode payload of one frame. Raise ValueError if the type is unknown
+    or the payload is malformed (too short or not valid data of the message).
+
+    Attributes:
+        msg_type - int - type of the message from the header.
+        payload - bytes - payload of the frame.
+    Return:
+        Tuple[Any] - name of the message and its data.
+    """
+    if msg_type not in NAMES:
+        raise ValueError(f"Unknown message type: {msg_type}")
+    name = NAMES[msg_type]
+    try:
+        return (name, *MESSAGES[name][2](payload))
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"Malformed message {name}: {e}") from e
+
+
+def check_header(header: bytes) -> Tuple[int, int]:
+    """Unpack header and check size of the payload.
+
+    Return:
+        Tuple[int, int] - payload length and message type.
+    """
+    length, msg_type = HEADER.unpack(header)
+    if length > NETWORK["MSG_SIZE"]:
+        raise ValueError(f"Message is too long: {length}")
+    return length, msg_type
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Receive exactly size bytes from the socket.
+
+    Attributes:
+        sock - socket - connected socket.
+        size - int - count of bytes.
+    Return:
+        bytes - received bytes.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def read_message(sock: socket.socket) -> Tuple:
+    """Read and decode one message from the socket."""
+    length, msg_type = check_header(recv_exact(sock, HEADER.size))
+    return decode_message(msg_type, recv_exact(sock, length))
+
+
+async def read_frame_async(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Read one frame from the asyncio stream without decoding.
+
+    Return:
+        Tuple[int, bytes] - message type and payload.
+    """
+    length, msg_type = check_header(await reader.readexactly(HEADER.size))
+    return msg_type, await reader.readexactly(length)
+
+
+async def read_message_async(reader: asyncio.StreamReader) -> Tuple:
+    """Read and decode one message from the asyncio stream."""
+    return decode_message(*await read_frame_async(reader))
@@ -0,0 +1,77 @@
+"""
+    Class that represents replay of one finished match from the match log.
+"""
+import mmap
+from typing import List
+# src
+from map.bitgrid import SIZE
+from engine.board import Board
+from online.protocol import MASK_SIZE, SHIPS_CNT, U16
+from online.match_log import (RECORD, INDEX, INDEX_SUFFIX, OFFSET, SEGMENT_SUFFIX,
+                              CHECKPOINT_SIZE, MatchRecord, ReplayEntry)
+
+
+class Replay:
+    """Class that represents replay of one finished match from the match log.
+    Index and segment of the match are memory-mapped, so only read parts
+    of the files are loaded. Boards after any shot are restored from the nearest
+    checkpoint before it and at most interval - 1 shots, so seeking takes
+    the same time in any place of any long match.
+
+    Attributes:
+        entry - ReplayEntry - entry of the match in the index.
+        index - mmap.mmap - memory-mapped index of the segment.
+        segment - mmap.mmap - memory-mapped segment with records of the match.
+        layouts - List[bytes] - packed positions of the ships of both players.
+        offsets - int - offset of the shot offsets of the match in the index.
+        checkpoints - int - offset of the checkpoints of the match in the index.
+    """
+    def __init__(self, entry: ReplayEntry):
+        """Open replay of the match.
+
+        Attributes:
+            entry - ReplayEntry - entry of the match in the index (see MatchLogReader.replays).
+        """
+        self.entry = entry
+        with open(entry.path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX, "rb") as file:
+            self.index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(entry.path, "rb") as file:
+            self.segment = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        base = entry.offset + INDEX.size
+        self.layouts = [self.index[base:base + SHIPS_CNT],
+                        self.index[base + SHIPS_CNT:base + 2 * SHIPS_CNT]]
+        self.offsets = base + 2 * SHIPS_CNT
+        self.checkpoints = self.offsets + entry.moves * OFFSET.size
+
+    def shot(self, move: int) -> MatchRecord:
+        """Return record of the shot.
+
+        Attributes:
+            move - int - number of the shot from 0.
+        """
+        (offset,) = OFFSET.unpack_from(self.index, self.offsets + move * OFFSET.size)
+        return MatchRecord(*RECORD.unpack_from(self.segment, offset))
+
+    def boards(self, move: int) -> List[Board]:
+        """Return boards of both players after the first move shots.
+
+        Attributes:
+            move - int - count of shots from 0 to count of all shots.
+        """
+        boards = [Board.from_layout(layout) for layout in self.layouts]
+        checkpoint = move // self.entry.interval
+        if checkpoint:
+            ofs = self.checkpoints + (checkpoint - 1) * CHECKPOINT_SIZE
+            for board in boards:
+                shots = int.from_bytes(self.index[ofs:ofs + MASK_SIZE], "big")
+                board.load_shots(shots, U16.unpack_from(self.index, ofs + MASK_SIZE)[0])
+                ofs += MASK_SIZE + U16.size
+        for idx in range(checkpoint * self.entry.interval, move):
+            record = self.shot(idx)
+            boards[1 - record.player].shoot(*divmod(record.first, SIZE))
+        return boards
+
+    def close(self) -> None:
+        """Close memory-mapped files."""
+        self.index.close()
+        self.segment.close()
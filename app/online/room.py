@@ -0,0 +1,391 @@
+"""
+    Class that represents one room (one match for two players) on the server.
+"""
+from typing import Callable, List, Tuple
+from map.bitgrid import SIZE
+from engine.game_state import GameState
+from online.sync import StateSync
+from online.chat_log import ChatLog
+from online.match_log import MatchLog
+from online.protocol import EVENTS, check_layout
+
+# event that is pushed to the enemy after the players message
+MESSAGE_EVENTS = {
+    "set_user_name": "ENEMY_NAME",
+    "set_user_ships": "ENEMY_READY",
+    "shoot": "ENEMY_MOVE",
+    "reset": "ENEMY_RESET",
+    "chat": "CHAT"
+}
+
+
+class Room:
+    """Class that represents one room on the server. Room is for max 2 players.
+
+    Attributes:
+        id - int - unique id of the room on the server.
+        game - List[GameState, GameState] - game for first and second player.
+        sync - List[StateSync, StateSync] - versioned game state for first and second player.
+        chat_log - ChatLog - all sent messages in chat.
+        chat_seen - List[int, int] - last sequence number of the chat log sent to the player.
+        connected - List[bool, bool] - True if player with this number is connected.
+        away - List[bool, bool] - True if player lost connection and can still resume
+               his session (he is connected to the room until then).
+        listeners - List[Callable | None] - callbacks that send pushed events to subscribed
+                    players, None if player is not subscribed.
+        pushed - List[int, int] - last version of the game state sent to the player.
+        handlers - Dict[str, Callable] - handlers of the players messages by message name.
+        match_log - MatchLog | None - log of all matches on the server, None for no log.
+        match_id - int | None - id of the current match in the log, None if no match runs.
+    """
+    def __init__(self, room_id: int, match_log: MatchLog | None = None):
+        """Create one empty room.
+
+        Attributes:
+            room_id - int - unique id of the room on the server.
+            match_log - MatchLog | None - log of all matches on the server, None for no log.
+        """
+        self.id = room_id
+        self.game = [GameState(), GameState()]
+        self.sync = [StateSync(), StateSync()]
+        self.chat_log = ChatLog()
+        self.chat_seen = [0, 0]
+        self.connected = [False, False]
+        self.away = [False, False]
+        self.listeners = [None, None]
+        self.pushed = [0, 0]
+        self.handlers = {
+            "chat": self.chat,
+            "set_user_name": self.set_get_username,
+            "get_enemy_name": self.set_get_username,
+            "set_user_ships": self.set_ships,
+            "shoot": self.shoot,
+            "get": self.get_move,
+            "reset": self.reset_game,
+            "subscribe": self.get_move
+        }
+        self.match_log = match_log
+        self.match_id = None
+        self.commit()
+
+    @staticmethod
+    def get_enemy(player: int) -> int:
+        """Return enemy number for the player number."""
+        return 0 if player == 1 else 1
+
+    def commit(self) -> None:
+        """Create new versions of the game states of both players if they were changed."""
+        for sync, game in zip(self.sync, self.game):
+            sync.commit(game)
+
+    def get_state(self, player: int, since: int) -> Tuple:
+        """Return answer with changes of the player's game state since input version.
+
+        Attributes:
+            player - int - player number.
+            since - int - version of the state on the player side.
+        Return:
+            Tuple[str, StateDelta] - name of the answer and changes of the state.
+        """
+        delta = self.sync[player].delta(since)
+        self.pushed[player] = max(self.pushed[player], delta.version)
+        return "state", delta
+
+    def subscribe(self, player: int, listener: Callable[[Tuple], None] | None) -> None:
+        """Subscribe player to pushed events or unsubscribe if listener is None.
+
+        Attributes:
+            player - int - player number.
+            listener - Callable | None - callback that sends event message to the player.
+        """
+        self.listeners[player] = listener
+
+    def notify(self, player: int, event: str, texts: List[str] | None = None) -> None:
+        """Push event to the player if he is subscribed. Event contains changes of the
+        game state since the last answer or event and texts of the event.
+        For CHAT event push only chat lines that the player hasn't seen.
+
+        Attributes:
+            player - int - player number.
+            event - str - name of the event (see EVENTS) or CHAT.
+            texts - List[str] | None - texts of the event, None for default texts
+                    (username of the enemy for ENEMY_NAME, nothing for other events).
+        """
+        listener = self.listeners[player]
+        if listener is None:
+            return
+        if event == "CHAT":
+            seen = self.chat_seen[player]
+            if seen < self.chat_log.last_seq():
+                self.chat_seen[player] = self.chat_log.last_seq()
+                listener(("chat_lines", seen, self.chat_log.since(seen)))
+            return
+        if texts is None:
+            texts = [self.game[player].enemy_name] if event == "ENEMY_NAME" else []
+        delta = self.sync[player].delta(self.pushed[player])
+        self.pushed[player] = delta.version
+        listener(("event", EVENTS[event], delta, texts))
+
+    def log_start(self) -> None:
+        """Start new match in the match log with ships of both players
+        if log is enabled. Match starts when both players are ready."""
+        if self.match_log is not None:
+            self.match_id = self.match_log.start()
+            for player, game in enumerate(self.game):
+                self.match_log.place(self.match_id, player, game.player.layout())
+
+    def log_finish(self, kind: str, player: int) -> None:
+        """Write the end of the current match to the match log if some match runs.
+
+        Attributes:
+            kind - str - END (player is the winner) or ABORT (player left the match).
+            player - int - player number.
+        """
+        if self.match_log is not None and self.match_id is not None:
+            self.match_log.finish(self.match_id, kind, player)
+        self.match_id = None
+
+    def is_full(self) -> bool:
+        """Return True if both players are connected to the room."""
+        return all(self.connected)
+
+    def is_empty(self) -> bool:
+        """Return True if no player is connected to the room."""
+        return not any(self.connected)
+
+    def join(self, player: int) -> None:
+        """Connect player to the room. If the second player connected,
+        set has_enemy on 1 for both players.
+
+        Attributes:
+            player - int - player number.
+        """
+        self.connected[player] = True
+        if self.is_full():
+            self.game[player].has_enemy = 1
+            self.game[self.get_enemy(player)].has_enemy = 1
+        self.commit()
+        self.notify(self.get_enemy(player), "ENEMY_JOINED")
+
+    def adopt(self, player: int, other: "Room", other_player: int) -> None:
+        """Move the waiting player from other room to this room (see Lobby).
+        His game state is moved with its versions, so he gets only changes
+        same as in the old room. His username and ships (if he already set them)
+        are shared with the enemy. Chat lines written in the old room are not moved.
+
+        Attributes:
+            player - int - player number in this room.
+            other - Room - old room of the player, it is not used after that.
+            other_player - int - player number in the old room.
+        """
+        enemy = self.get_enemy(player)
+        game, host = other.game[other_player], self.game[enemy]
+        self.game[player] = game
+        self.sync[player] = other.sync[other_player]
+        self.pushed[player] = other.pushed[other_player]
+        self.listeners[player] = other.listeners[other_player]
+        other.listeners[other_player] = None
+        self.away[player] = other.away[other_player]
+        game.enemy, game.enemy_ready = host.player, host.player_ready
+        host.enemy, host.enemy_ready = game.player, game.player_ready
+        game.enemy_name, host.enemy_name = host.player_name, game.player_name
+        if game.player_ready and host.player_ready:
+            host.is_my_move = True
+            self.log_start()
+        self.chat_seen[player] = 0
+        self.join(player)
+        self.notify(player, "ENEMY_NAME")
+        self.notify(enemy, "ENEMY_NAME")
+        self.notify(player, "CHAT")
+        for side in (player, enemy):
+            if self.away[side]:
+                self.notify(self.get_enemy(side), "ENEMY_AWAY")
+
+    def set_away(self, player: int, away: bool) -> None:
+        """Player lost connection or resumed his session. Game of the away player
+        is kept, events aren't pushed to him until he subscribes again after resuming.
+
+        Attributes:
+            player - int - player number.
+            away - bool - True if connection was lost, False if session was resumed.
+        """
+        if away:
+            self.listeners[player] = None
+        self.away[player] = away
+        self.notify(self.get_enemy(player), "ENEMY_AWAY" if away else "ENEMY_BACK")
+
+    def leave(self, player: int) -> None:
+        """Disconnect player from the room. Reset game of this player,
+        for enemy set has_enemy on 2 (enemy leave) and clear chat.
+
+        Attributes:
+            player - int - player number.
+        """
+        enemy = self.get_enemy(player)
+        self.log_finish("ABORT", player)
+        self.connected[player] = False
+        self.away[player] = False
+        self.listeners[player] = None
+        self.game[player].reset()
+        if self.game[enemy].has_enemy != 0:
+            self.game[enemy].has_enemy = 2
+        self.chat_log = ChatLog()
+        self.chat_seen = [0, 0]
+        self.commit()
+        self.notify(enemy, "ENEMY_LEFT")
+
+    def handle(self, player: int, data: Tuple) -> Tuple | None:
+        """Call handler by name of the message from the player
+        and push event about this message to the enemy.
+
+        Attributes:
+            player - int - player number.
+            data - Tuple[Any] - data from player. First element is name of the message.
+        Return:
+            Tuple[Any] | None - name of the answer and its data or None if message is unknown.
+        """
+        handler = self.handlers.get(data[0])
+        if handler is None:
+            return None
+        answer = handler(player, self.get_enemy(player), data)
+        if data[0] in MESSAGE_EVENTS:
+            self.notify(self.get_enemy(player), MESSAGE_EVENTS[data[0]])
+        return answer
+
+    def chat(self, player: int, _enemy: int, data: Tuple) -> Tuple:
+        """Append new lines of the player to the chat log and return
+        all lines after the last sequence number the player has seen.
+        If the sequence number is from the replaced log (see leave and adopt)
+        or the log was trimmed (see ChatLog.trim), return the whole log.
+
+        Attributes:
+            player - int - player number.
+            data - Tuple[Any] - data from player: last seen sequence number and new lines.
+        Return:
+            Tuple[str, int, List[str]] - name of the answer, sequence number before
+            the first returned line and lines after it.
+        """
+        seq = data[1] if data[1] <= self.chat_log.last_seq() else 0
+        self.chat_log.append(data[2])
+        if self.chat_log.trim():
+            # enemy gets the whole log too (see notify)
+            seq = 0
+            self.chat_seen = [0, 0]
+        self.chat_seen[player] = self.chat_log.last_seq()
+        return "chat", seq, self.chat_log.since(seq)
+
+    def get_move(self, player: int, _enemy: int, data: Tuple) -> Tuple:
+        """Return changes of the player's game state since version from data.
+
+        Attributes:
+            player - int - player number.
+            data - Tuple[Any] - data from player.
+        Return:
+            Tuple[str, StateDelta] - name of the answer and changes of the state.
+        """
+        return self.get_state(player, data[1])
+
+    def shoot(self, player: int, enemy: int, data: Tuple) -> Tuple:
+        """Resolve players shot on the enemy board (same board object is the enemy's
+        own board, see set_ships). After miss, it is enemy's time to move.
+        Shot is rejected if it is not players time to move or the cell was already shot.
+
+        Attributes:
+            player - int - player number.
+            enemy - int - enemy number.
+            data - Tuple[Any] - data from player: version, row and column of the cell.
+        Return:
+            Tuple[str, int, int, int, StateDelta] - name of the answer, row and column
+            of the cell, its new state (0 if shot was rejected) and changes of the state.
+        """
+        _, since, row, col = data
+        game = self.game[player]
+        state = 0
+        if (game.is_my_move and game.player_ready and game.enemy_ready
+                and not game.is_over() and row < SIZE):
+            try:
+                state = game.enemy.shoot(row, col)
+            except ValueError:
+                state = 0
+        if state:
+            if self.match_log is not None and self.match_id is not None:
+                self.match_log.shot(self.match_id, player, row * SIZE + col, state)
+            if state == 3:
+                game.is_my_move = False
+                self.game[enemy].is_my_move = True
+            if game.enemy.is_defeated():
+                self.log_finish("END", player)
+            self.commit()
+        return ("shot", row, col, state) + self.get_state(player, since)[1:]
+
+    def set_ships(self, player: int, enemy: int, data: Tuple) -> Tuple:
+        """Set player's board and fleet (player0) and set enemy's board and fleet (player1).
+        At the end, check if both players are ready and if are
+        set is_my_move on True for the last ready player and start the match in the log.
+        Ships are rejected if the player is already ready (until reset_game)
+        or if some ship is not on the board (see check_layout).
+
+        Attributes:
+            player - int - player number.
+            enemy - int - enemy number.
+            data - Tuple[Any] - data from player (version and packed positions of the ships).
+        Return:
+            Tuple[str, StateDelta] - name of the answer and changes of the state.
+        """
+        if self.game[player].player_ready:
+            return self.get_state(player, data[1])
+        # shots are resolved only by the server (see shoot), so both players share
+        # one board without shots from the client
+        try:
+            board = check_layout(data[2])
+        except ValueError:
+            return self.get_state(player, data[1])
+        self.game[player].player = board
+        self.game[enemy].enemy = board
+        self.game[player].player_ready = True
+        self.game[enemy].enemy_ready = True
+        if self.game[player].player_ready and self.game[player].enemy_ready:
+            self.game[player].is_my_move = True
+            self.log_start()
+        self.commit()
+        return self.get_state(player, data[1])
+
+    def reset_game(self, player: int, enemy: int, data: Tuple) -> Tuple:
+        """Reset game for the player. For enemy set has_enemy on 1,
+        so enemy connected (reset set it on 0) and save enemy username.
+
+        Attributes:
+            player - int - player number.
+            enemy - int - enemy number.
+            data - Tuple[Any] - data from player.
+        Return:
+            Tuple[str, StateDelta] - name of the answer and changes of the state.
+        """
+        self.game[player].reset()
+        self.game[player].has_enemy = 1
+        self.game[enemy].has_enemy = 1
+        self.game[player].enemy_name = self.game[enemy].player_name
+        # if other enemy already press restart button and set his ships,
+        # his new board is the enemy board again (reset replaced it by the empty board).
+        if self.game[enemy].player_ready and not self.game[enemy].enemy_ready:
+            self.game[player].enemy_ready = True
+            self.game[player].enemy = self.game[enemy].player
+        self.commit()
+        return self.get_state(player, data[1])
+
+    def set_get_username(self, player: int, enemy: int, data: Tuple) -> Tuple[str, str, int]:
+        """Return username of the enemy. If set_user_name, in additional
+        save username of the player and set it to enemy game as username of enemy.
+
+        Attributes:
+            player - int - player number.
+            enemy - int - enemy number.
+            data - Tuple[Any] - data from player.
+        Return:
+            Tuple[str, str, int] - name of the answer, enemy username
+            and has_enemy status of the player.
+        """
+        if data[0] == "set_user_name":
+            self.game[player].player_name = data[1]
+            self.game[enemy].enemy_name = data[1]
+        return "enemy_name", self.game[enemy].player_name, self.game[player].has_enemy
@@ -0,0 +1,95 @@
+"""
+    Class that represents versioned game state of one player on the server.
+"""
+from typing import Any, List
+from online.protocol import StateDelta, CELLS_CNT, pack_flags
+
+# indexes of the state parts after the cells of both boards
+PARTS = {
+    "PLAYER_LAYOUT": 2 * CELLS_CNT,
+    "ENEMY_LAYOUT": 2 * CELLS_CNT + 1,
+    "PLAYER_SUNK": 2 * CELLS_CNT + 2,
+    "ENEMY_SUNK": 2 * CELLS_CNT + 3,
+    "FLAGS": 2 * CELLS_CNT + 4
+}
+
+
+class StateSync:
+    """Class that represents versioned game state of one player on the server.
+    Remembers version of the last change of every part of the state,
+    so the player gets only parts that were changed since his version.
+    Until the match is over, player sees only shot cells and sunk ships of the enemy,
+    so the client can't show the enemy fleet.
+
+    Attributes:
+        reveal - bool - True if the enemy ships are always visible (replay of the match).
+        version - int - version of the last change (0 if nothing was committed).
+        values - List[Any] - last committed parts of the state: states of all cells
+                 (player's, then enemy's), ships layouts, sunk masks and flags.
+        versions - List[int] - version of the last change of every part of the state.
+    """
+    def __init__(self, reveal: bool = False):
+        """Create empty state.
+
+        Attributes:
+            reveal - bool - True if the enemy ships are always visible.
+        """
+        self.reveal = reveal
+        self.version = 0
+        self.values = []
+        self.versions = []
+
+    def snapshot(self, game: Any) -> List[Any]:
+        """Return all parts of the game state in order of the values attribute.
+        Enemy ships that are not sunk are hidden until the match is over.
+
+        Attributes:
+            game - GameState - game of the player.
+        """
+        reveal = self.reveal or game.is_over()
+        values: List[Any] = game.player.states() + game.enemy.states(reveal)
+        values += [game.player.layout(),
+                   game.enemy.layout() if reveal else game.enemy.sunk_layout(),
+                   game.player.sunk_mask(), game.enemy.sunk_mask(), pack_flags(game)]
+        return values
+
+    def commit(self, game: Any) -> None:
+        """Compare game state with the last committed state and
+        if something was changed, create new version.
+
+        Attributes:
+            game - GameState - game of the player.
+        """
+        values = self.snapshot(game)
+        if values == self.values:
+            return
+        self.version += 1
+        if not self.values:
+            self.versions = [self.version] * len(values)
+        else:
+            for i, (old, new) in enumerate(zip(self.values, values)):
+                if old != new:
+                    self.versions[i] = self.version
+        self.values = values
+
+    def delta(self, since: int) -> StateDelta:
+        """Return all changes of the state since input version.
+        If ships layout was changed, also sends sunk mask of these ships.
+
+        Attributes:
+            since - int - version of the state on the player side (0 if player has nothing).
+        Return:
+            StateDelta - changes since input version, empty if nothing was changed.
+        """
+        if since >= self.version:
+            return StateDelta(self.version, [], (None, None), (None, None), None)
+
+        def changed(part: str) -> Any:
+            idx = PARTS[part]
+            return self.values[idx] if self.versions[idx] > since else None
+
+        cells = [(i, self.values[i]) for i in range(2 * CELLS_CNT) if self.versions[i] > since]
+        layouts = (changed("PLAYER_LAYOUT"), changed("ENEMY_LAYOUT"))
+        sunk = tuple(self.values[PARTS[part]] if layout is not None else changed(part)
+                     for part, layout in zip(("PLAYER_SUNK", "ENEMY_SUNK"), layouts))
+        return StateDelta(self.version, cells, layouts, sunk, changed("FLAGS"))
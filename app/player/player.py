@@ -1,13 +1,14 @@
 """
     Class represented one player.
 """
-import random
 import pygame as pg
 # utils
 from utils.settings import USER, GRID_PARAMS
 # src
 from ships.fleet import Fleet
+from ships.placement import PLACEMENT
 from map.grid import Grid
+from engine.board import NO_SHIP, VERTICAL
 
 
 class Player:
@@ -64,33 +65,37 @@ class Player:
 
     def random_set_ships(self) -> None:
         """Create random distribution of ships on the board.
-        In first step randomly select orientation for ship. Then generate random
-        coordinates (x, y) and try to set this ships. If position is not valid,
-        generate new orientation and coordinates. Else set this ship on positions on the board.
+        Positions of all ships are sampled by placement engine from cached legal positions,
+        then every ship is set on its position on the board.
         """
-        for i in range(1, 5):
-            size = i
-            count = 5 - size
-            while count > 0:
-                direction = random.randint(0, 1)
-                if direction == 0:
-                    x = random.randint(0, 10 - size)
-                    y = random.randint(0, 9)
-                    if all(self.board.check_neighbors(x + j, y) for j in range(size)):
-                        for j in range(size):
-                            self.board.grid[x + j][y].set_state(1)
-                            self.fleet.ships[i - 1][count - 1].add_pos(self.board.grid[x + j][y])
-                        self.fleet.ships[i - 1][count - 1].set_orientation(direction)
-                        count -= 1
-                else:
-                    x = random.randint(0, 9)
-                    y = random.randint(0, 10 - size)
-                    if all(self.board.check_neighbors(x, y + j) for j in range(size)):
-                        for j in range(size):
-                            self.board.grid[x][y + j].set_state(1)
-                            self.fleet.ships[i - 1][count - 1].add_pos(self.board.grid[x][y + j])
-                        self.fleet.ships[i - 1][count - 1].set_orientation(direction)
-                        count -= 1
+        for ship, place in zip(self.fleet.itr_fleet(), PLACEMENT.sample()):
+            for j in range(ship.size):
+                x = place.x + j * (1 - place.orientation)
+                y = place.y + j * place.orientation
+                cell = self.board.grid[x][y]
+                cell.set_state(1)
+                ship.add_pos(cell)
+            ship.set_orientation(place.orientation)
+
+    def load_fleet(self, layout: bytes, sunk: int = 0) -> None:
+        """Create new fleet from packed positions of the ships (see Board.positions).
+        Ships are placed on cells of the board, states of the cells are not changed.
+
+        Attributes:
+            layout - bytes - packed positions of the ships.
+            sunk - int - mask of sunk ships.
+        """
+        size = GRID_PARAMS["GRID_SIZE"]
+        self.fleet = Fleet(self.offset)
+        for ship, pos in zip(self.fleet.itr_fleet(), layout):
+            if pos == NO_SHIP:
+                continue
+            orient = 1 if pos & VERTICAL else 0
+            row, col = divmod(pos & ~VERTICAL, size)
+            for j in range(ship.size):
+                ship.add_pos(self.board.grid[row + j * (1 - orient)][col + j * orient])
+            ship.set_orientation(orient)
+        self.fleet.load_sunk(sunk)
 
     def get_cell_state(self, x: int, y: int) -> int:
         """By input x, y coordinates return state of the cell.
@@ -1,199 +1,403 @@
 """
-    Class for server side. Server is for max 2 players.
+    Asyncio server that hosts many independent rooms. Every room is one match for 2 players.
 """
 
+import os
+import sys
+import time
 import socket
-import pickle
-import copy
-from typing import Tuple
-from _thread import start_new_thread
-from utils.settings import NETWORK
-from game.game import Game
+import signal
+import asyncio
+import secrets
+import argparse
+import multiprocessing
+from itertools import count
+from typing import Dict, Set, Tuple
+from utils.settings import NETWORK, METRICS, MATCH_LOG, LOBBY, SESSION
+from online.room import Room
+from online.lobby import Lobby
+from online.coordinator import Coordinator, ROUTE, LEFT
+from online.metrics import Metrics
+from online.match_log import MatchLog
+from online.protocol import HEADER, encode_message, decode_message, read_frame_async
 
 
 class Server:
-    """Class for server side. Server is for max 2 players.
+    """Asyncio server that hosts many independent rooms. Every room is one match for 2 players.
+    Server can run as one of the worker processes (see run_workers), then it gets
+    accepted connections from the coordinator and it has only its part of the rooms.
 
     Attributes:
-        s - socket - server socket.
-        game - List[Game, Game] - game for first and second player.
-        current_player - int - last input player number. First player = 0.
-        chat_msg - List[str] - list of all sent messages in chat.
+        worker - int - number of the worker process (first byte of its session tokens).
+        workers - int - count of the worker processes.
+        channel - socket.socket | None - Unix socket to the coordinator, None for one process.
+        rooms - Dict[int, Room] - all active rooms by room id.
+        lobby - Lobby - queue of the players waiting for the enemy.
+        seats - Dict[int, Tuple[Room, int]] - room and player number of every connected
+                player by his id (waiting player is moved to other room when he is paired).
+        room_ids - count - generator of unique room ids.
+        player_ids - count - generator of unique player ids.
+        sessions - Dict[bytes, int] - id of the player by his session token.
+        tokens - Dict[int, bytes] - session token by id of the player.
+        writers - Dict[int, asyncio.StreamWriter] - current connection by id of the player,
+                  players who lost connection are not here.
+        expiry - Dict[int, asyncio.TimerHandle] - end of the session by id of the player
+                 who lost connection (see SESSION["GRACE"]).
+        routed - Set[asyncio.Task] - running handlers of the clients from the coordinator.
+        metrics - Metrics - metrics of the server.
+        match_log - MatchLog | None - log of all matches, None if disabled in settings.
     """
-    def __init__(self):
-        """Create one server."""
-        self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # IPv4 with TCP
-        # bind server IPv4 address to port
-        try:
-            self.s.bind(("0.0.0.0", NETWORK["PORT"]))
-        except socket.error as e:
-            print(e)
-        self.s.listen()
-        print("Server up...")
-        self.game = [Game(), Game()]
-        self.curr_player = 0
-        self.chat_msg = []
+    def __init__(self, worker: int = 0, workers: int = 1, channel: socket.socket | None = None):
+        """Create one server.
+
+        Attributes:
+            worker - int - number of the worker process.
+            workers - int - count of the worker processes.
+            channel - socket.socket | None - Unix socket to the coordinator, None for one process.
+        """
+        self.worker = worker
+        self.workers = workers
+        self.channel = channel
+        self.rooms = {}
+        self.lobby = Lobby(max(1, LOBBY["MAX_ROOMS"] // workers))
+        self.seats: Dict[int, Tuple[Room, int]] = {}
+        self.room_ids = count()
+        self.player_ids = count()
+        self.sessions: Dict[bytes, int] = {}
+        self.tokens: Dict[int, bytes] = {}
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        self.expiry: Dict[int, asyncio.TimerHandle] = {}
+        self.routed: Set[asyncio.Task] = set()
+        self.metrics = Metrics()
+        self.match_log = MatchLog(MATCH_LOG["DIR"], worker, workers) if MATCH_LOG["DIR"] else None
+
+    def join_room(self) -> Tuple[int, int]:
+        """Find room for the new player. If he is paired with the waiting player
+        (see Lobby.join), join his room, else create new room where he waits.
+
+        Return:
+            Tuple[int, int] - id of the player and his player number.
+        """
+        player_id = next(self.player_ids)
+        paired = self.lobby.join(player_id)
+        if paired is None:
+            room, player = Room(next(self.room_ids), self.match_log), 0
+            self.rooms[room.id] = room
+        else:
+            room, player = self.seats[paired][0], 1
+        self.seats[player_id] = (room, player)
+        room.join(player)
+        self.metrics.connections += 1
+        self.metrics.rooms = len(self.rooms)
+        self.metrics.waiting = len(self.lobby.queue)
+        return player_id, player
+
+    def pair(self, first: int, second: int) -> None:
+        """Move the second waiting player to the room of the first waiting player.
+
+        Attributes:
+            first - int - id of the player who waits longer.
+            second - int - id of the moved player.
+        """
+        room = self.seats[first][0]
+        old, player = self.seats[second]
+        room.adopt(1, old, player)
+        del self.rooms[old.id]
+        self.seats[second] = (room, 1)
 
-    def begin_conn(self, conn: socket.socket, player: int) -> bool:
-        """Check count of connected players.
+    def leave_room(self, player_id: int) -> None:
+        """Disconnect player from his room and remove the room if it is empty.
+        If the room had two players, it is free for the next waiting players.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
+            player_id - int - id of the player.
+        """
+        room, player = self.seats.pop(player_id)
+        if self.lobby.leave(player_id) and self.channel is not None:
+            self.channel.send(bytes([LEFT]))  # coordinator counts waiting players
+        pairs = self.lobby.finish() if room.is_full() else []
+        room.leave(player)
+        if room.is_empty():
+            del self.rooms[room.id]
+        for first, second in pairs:
+            self.pair(first, second)
+        self.metrics.connections -= 1
+        self.metrics.rooms = len(self.rooms)
+        self.metrics.waiting = len(self.lobby.queue)
+
+    def open_session(self, token: bytes,
+                     writer: asyncio.StreamWriter) -> Tuple[int, bool] | None:
+        """Start new session for the empty token (player joins the lobby),
+        else resume the session of the token if it didn't end. If the player
+        of the resumed session is still connected, his old connection is closed.
+
+        Attributes:
+            token - bytes - session token from the hello of the client.
+            writer - asyncio.StreamWriter - writing part of the new client connection.
         Return:
-            bool - True if count of connected players is greater than 2.
+            Tuple[int, bool] | None - id of the player and True if the session was resumed,
+            None if the session of the token doesn't exist (anymore).
         """
-        if player > 1:
-            conn.send(pickle.dumps("max_player_count"))
-            print(f"[ERROR] Max player count for the server is 2, now: {player + 1}")
-            self.curr_player -= 1
-            conn.close()
-            return False
-        conn.send(pickle.dumps(player))
-        return True
-
-    def get_move(self, conn: socket.socket, player: int, enemy: int, data: Tuple):
-        """Send Game object to player by player number.
-        If input is 'move', in additional update enemy (player1) for player
-        and update fleet and board for enemy.
-        At the end, set is_my_move for enemy on True.
+        if not token:
+            player_id = self.join_room()[0]
+            self.tokens[player_id] = (bytes([self.worker])
+                                      + secrets.token_bytes(SESSION["TOKEN_SIZE"] - 1))
+            self.sessions[self.tokens[player_id]] = player_id
+        elif token in self.sessions:
+            player_id = self.sessions[token]
+            room, player = self.seats[player_id]
+            if player_id in self.expiry:
+                self.expiry.pop(player_id).cancel()
+                room.set_away(player, False)
+            else:
+                room.subscribe(player, None)
+                self.writers[player_id].close()
+        else:
+            return None
+        self.writers[player_id] = writer
+        return player_id, bool(token)
+
+    def close_session(self, player_id: int, writer: asyncio.StreamWriter, leave: bool) -> None:
+        """Connection of the player was closed. If he left the game, end his session,
+        else wait SESSION["GRACE"] seconds for resuming before the end.
+        Nothing is done if the session was already resumed by other connection.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
-            enemy - int - enemy number.
-            data - Tuple[Any] - data from player.
+            player_id - int - id of the player.
+            writer - asyncio.StreamWriter - writing part of the closed connection.
+            leave - bool - True if the player left the game.
         """
-        if data[0] == "move":
-            self.game[player].enemy = copy.deepcopy(data[1])
-            self.game[player].is_my_move = data[2]
-            self.game[enemy].player.fleet = data[1].fleet
-            self.game[enemy].player.board = data[1].board
-            self.game[enemy].player.invert_player()
-            if self.game[player].is_my_move is False:
-                self.game[enemy].is_my_move = True
-        conn.sendall(pickle.dumps(self.game[player]))
-
-    def set_ships(self, conn: socket.socket, player: int, enemy: int, data: Tuple):
-        """Set player's board and fleet (player0) and set enemy's board and fleet (player1).
-        Invert fleet for redraw ships on another board (board player1).
-        At the end, check if both players are ready and if are
-        set is_my_move on True for the last ready player. Send Game object to player
-        by his global id on server.
+        if self.writers.get(player_id) is not writer:
+            return
+        del self.writers[player_id]
+        if leave or not SESSION["GRACE"]:
+            self.end_session(player_id)
+            return
+        room, player = self.seats[player_id]
+        room.set_away(player, True)
+        self.expiry[player_id] = asyncio.get_running_loop().call_later(
+            SESSION["GRACE"], self.end_session, player_id)
+
+    def end_session(self, player_id: int) -> None:
+        """End session of the player and disconnect him from his room.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
-            enemy - int - enemy number.
-            data - Tuple[Any] - data from player.
+            player_id - int - id of the player.
         """
-        self.game[player].player.board = copy.deepcopy(data[1])
-        self.game[player].player.fleet = copy.deepcopy(data[2])
-        self.game[enemy].enemy.board = data[1]
-        self.game[enemy].enemy.fleet = data[2]
-        self.game[enemy].enemy.invert_player()
-        self.game[player].player_ready = True
-        self.game[enemy].enemy_ready = True
-        if self.game[player].player_ready and self.game[player].enemy_ready:
-            self.game[player].is_my_move = True
-        conn.sendall(pickle.dumps((self.game[player])))
-
-    def reset_game(self, conn: socket.socket, player: int, enemy: int) -> None:
-        """Reset game for the player. For enemy set has_enemy on 1,
-        so enemy connected (reset set it on 0) and save enemy username.
+        self.expiry.pop(player_id, None)
+        del self.sessions[self.tokens.pop(player_id)]
+        self.leave_room(player_id)
+
+    async def lobby_loop(self, interval: float) -> None:
+        """Periodically push changed positions in the queue to the waiting players.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
-            enemy - int - enemy number.
+            interval - float - seconds between pushes.
         """
-        self.game[player].reset()
-        self.game[player].has_enemy = 1
-        self.game[enemy].has_enemy = 1
-        self.game[player].enemy.username = self.game[enemy].player.username
-        # if other enemy already press restart button and set his ships.
-        if self.game[enemy].player_ready and not self.game[enemy].enemy_ready:
-            self.game[player].enemy_ready = True
-        conn.sendall(pickle.dumps(self.game[player]))
-
-    def set_get_username(self, conn: socket.socket, player: int, enemy: int, data: Tuple):
-        """Send username of the enemy to player. If set_user_name, in additional
-        save username of the player and set it to enemy game as username of enemy.
+        while True:
+            await asyncio.sleep(interval)
+            for player_id, position in self.lobby.updates():
+                room, player = self.seats[player_id]
+                room.notify(player, "QUEUE", [str(position)])
+
+    def send(self, writer: asyncio.StreamWriter, message: Tuple) -> None:
+        """Encode message, count it in metrics and write it to the client.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
-            enemy - int - enemy number.
-            data - Tuple[Any] - data from player.
+            writer - asyncio.StreamWriter - writing part of the client connection.
+            message - Tuple[Any] - name of the message and its data.
         """
-        if data[0] == "set_user_name":
-            self.game[player].player.username = data[1]
-            self.game[enemy].enemy.username = data[1]
-        conn.sendall(pickle.dumps((self.game[enemy].player.username,
-                                   self.game[player].has_enemy)))
+        begin = time.perf_counter()
+        frame = encode_message(*message)
+        self.metrics.observe_send(message[0], len(frame), time.perf_counter() - begin)
+        writer.write(frame)
 
-    def client_thread(self, conn, player: int):
-        """Thread for one client.
+    async def client_handler(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        """Coroutine for one accepted client. Read his hello and serve him,
+        or send the connection to the coordinator if the server is one of the workers.
 
         Attributes:
-            conn - socket - socket.
-            player - int - player number.
+            reader - asyncio.StreamReader - reading part of the client connection.
+            writer - asyncio.StreamWriter - writing part of the client connection.
         """
-        if not self.begin_conn(conn, player):
+        try:
+            data = decode_message(*await read_frame_async(reader))
+            if data[0] != "hello":
+                raise ValueError(f"Unexpected message: {data[0]}")
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            print(e)
+            writer.close()
             return
-        enemy = 0 if player == 1 else 1
-        if player == 1:
-            self.game[player].has_enemy = 1
-            self.game[enemy].has_enemy = 1
-        while True:
-            try:
-                data = pickle.loads(conn.recv(NETWORK["MSG_SIZE"]))
-                if not data:
-                    print("Disconnected")
-                    break
+        if self.channel is None:
+            await self.serve_client(reader, writer, data[1])
+            return
+        # descriptor is duplicated to the coordinator, so closing keeps the connection
+        sock = writer.get_extra_info("socket")
+        socket.send_fds(self.channel, [bytes([ROUTE]) + data[1]], [sock.fileno()])
+        writer.close()
+
+    def receive_routed(self) -> None:
+        """Take connection that the coordinator gave to this worker and serve it."""
+        token, fds, _, _ = socket.recv_fds(self.channel, SESSION["TOKEN_SIZE"], 1)
+        if not fds:
+            asyncio.get_running_loop().remove_reader(self.channel)  # coordinator stopped
+            return
+        task = asyncio.create_task(self.routed_client(socket.socket(fileno=fds[0]), token))
+        self.routed.add(task)
+        task.add_done_callback(self.routed.discard)
 
-                if data[0] == "chat":
-                    if len(data[1]) > len(self.chat_msg):
-                        self.chat_msg = data[1]
-                    conn.sendall(pickle.dumps(self.chat_msg))
-                elif data[0] in ("set_user_name", "get_enemy_name"):
-                    self.set_get_username(conn, player, enemy, data)
-                elif data[0] == "set_user_ships":
-                    self.set_ships(conn, player, enemy, data)
-                elif data[0] in ("move", "get"):
-                    self.get_move(conn, player, enemy, data)
-                elif data[0] == "reset":
-                    self.reset_game(conn, player, enemy)
-            except EOFError as e:
-                print(e)
-                break
+    async def routed_client(self, sock: socket.socket, token: bytes) -> None:
+        """Coroutine for one client from the coordinator (his hello was already read).
+
+        Attributes:
+            sock - socket.socket - connected socket of the client.
+            token - bytes - session token from his hello.
+        """
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await self.serve_client(reader, writer, token)
+
+    async def serve_client(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter, token: bytes) -> None:
+        """Open session of the client and handle all his messages until he disconnects.
+
+        Attributes:
+            reader - asyncio.StreamReader - reading part of the client connection.
+            writer - asyncio.StreamWriter - writing part of the client connection.
+            token - bytes - session token from his hello.
+        """
+        player_id, leave = None, False
+        try:
+            session = self.open_session(token, writer)
+            if session is None:
+                self.send(writer, ("session", 0, b"", False))
+            else:
+                player_id = session[0]
+                self.send(writer, ("session", self.seats[player_id][1],
+                                   self.tokens[player_id], session[1]))
+            await writer.drain()
+            while player_id is not None:
+                msg_type, payload = await read_frame_async(reader)
+                begin = time.perf_counter()
+                data = decode_message(msg_type, payload)
+                if data[0] == "leave":
+                    leave = True
+                    break
+                room, player = self.seats[player_id]
+                if data[0] == "subscribe":
+                    room.subscribe(player, lambda message: self.send(writer, message))
+                answer = room.handle(player, data)
+                if answer is None:
+                    raise ValueError(f"Unexpected message: {data[0]}")
+                self.send(writer, answer)
+                self.metrics.observe_request(data[0], HEADER.size + len(payload),
+                                             time.perf_counter() - begin)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            print("Disconnected")
+        except ConnectionError as e:
+            print(e)
+        except ValueError as e:
+            print(e)
+            leave = True  # client that breaks the protocol can't resume the session
 
         print("Lost connection")
-        self.game[player].reset()
-        if self.game[enemy].has_enemy != 0:
-            self.game[enemy].has_enemy = 2
-        self.chat_msg = []
-        self.curr_player = 0
-        conn.close()
-
-    def server_thread(self):
-        """Server thread"""
-        while True:
-            conn, _ = self.s.accept()
-            start_new_thread(self.client_thread, (conn, self.curr_player))
-            self.curr_player += 1
+        if player_id is not None:
+            self.close_session(player_id, writer, leave)
+        writer.close()
 
-    def run(self) -> None:
-        """Main method that runs the server."""
-        start_new_thread(self.server_thread, ())
-        while True:
-            try:
-                pass
-            except KeyboardInterrupt:
-                print("Server down...")
-                self.s.close()
+    async def serve(self, sock: socket.socket | None = None) -> None:
+        """Start listening and serve clients until the server is stopped.
+        If enabled in settings, serve also metrics over HTTP and dump them to the file
+        (every worker on its own port and to its own file).
+
+        Attributes:
+            sock - socket.socket | None - listening socket shared by the workers,
+                   None for one process (server opens its own socket).
+        """
+        if sock is None:
+            listener = await asyncio.start_server(self.client_handler, "0.0.0.0",
+                                                  NETWORK["PORT"], backlog=NETWORK["BACKLOG"])
+        else:
+            listener = await asyncio.start_server(self.client_handler, sock=sock)
+        if self.channel is not None:
+            asyncio.get_running_loop().add_reader(self.channel, self.receive_routed)
+        if METRICS["PORT"]:
+            port = METRICS["PORT"] + self.worker
+            await asyncio.start_server(self.metrics.handle_http, METRICS["HOST"], port)
+            print(f"Metrics on http://{METRICS['HOST']}:{port}/metrics")
+        asyncio.create_task(self.lobby_loop(LOBBY["UPDATE_INTERVAL"]))
+        if METRICS["FILE"]:
+            path = METRICS["FILE"] if self.workers == 1 else f"{METRICS['FILE']}.{self.worker}"
+            asyncio.create_task(self.metrics.dump_loop(path, METRICS["DUMP_INTERVAL"]))
+        print("Server up..." if sock is None else f"Worker {self.worker} up...")
+        async with listener:
+            await listener.serve_forever()
+
+    def run(self, sock: socket.socket | None = None) -> None:
+        """Main method that runs the server.
+
+        Attributes:
+            sock - socket.socket | None - same as in serve.
+        """
+        try:
+            asyncio.run(self.serve(sock))
+        except KeyboardInterrupt:
+            print("Server down...")
+        if self.match_log is not None:
+            self.match_log.close()
+
+
+def run_worker(worker: int, workers: int, sock: socket.socket, channel: socket.socket) -> None:
+    """Run one worker process of the server (see run_workers)."""
+    Server(worker, workers, channel).run(sock)
+
+
+def run_workers(workers: int) -> None:
+    """Run the server in worker processes, so it uses more CPU cores. Workers are forked
+    after the listening socket is opened and they accept connections on it.
+    This process is the coordinator (see Coordinator) that gives every connection
+    to the worker of its room. Needs Unix (passing of descriptors over Unix sockets).
+
+    Attributes:
+        workers - int - count of the worker processes.
+    """
+    sock = socket.create_server(("0.0.0.0", NETWORK["PORT"]), backlog=NETWORK["BACKLOG"])
+    context = multiprocessing.get_context("fork")
+    channels, processes = [], []
+    for worker in range(workers):
+        channel, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        process = context.Process(target=run_worker, args=(worker, workers, sock, child),
+                                  daemon=True)
+        process.start()
+        child.close()
+        channels.append(channel)
+        processes.append(process)
+    print(f"Server up with {workers} workers...")
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # same as Ctrl+C
+    try:
+        Coordinator(channels).run()
+    except KeyboardInterrupt:
+        print("Server down...")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+def main():
+    """Parse arguments and run the server in one or more processes."""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="count of worker processes, 0 for one per CPU core")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count()
+    if workers == 1:
+        Server().run()
+    else:
+        run_workers(workers)
+    return 0
 
 
 if __name__ == "__main__":
-    server = Server()
-    server.run()
+    sys.exit(main())
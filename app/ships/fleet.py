@@ -48,8 +48,7 @@ class Fleet:
             Generator[Ship, None, None] - yield one ship from ships List.
         """
         for ship_type in self.ships:
-            for ship in ship_type:
-                yield ship
+            yield from ship_type
 
     def draw_ships(self) -> None:
         """Draw all ship on the screen."""
@@ -65,6 +64,15 @@ class Fleet:
         for ship in self.itr_fleet():
             ship.set_sunk(grid)
 
+    def load_sunk(self, sunk: int) -> None:
+        """Set sunk attribute of all ships by mask of sunk ships (see Board.sunk_mask).
+
+        Attributes:
+            sunk - int - mask of sunk ships.
+        """
+        for i, ship in enumerate(self.itr_fleet()):
+            ship.sunk = bool(sunk & (1 << i))
+
     def set_dragging(self) -> Ship | None:
         """Check if mouse is on the part of the ship and if is,
            set dragging attribute for this ship to True.
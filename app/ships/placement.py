@@ -0,0 +1,119 @@
+"""
+    Class that generates random legal placements of the whole fleet.
+"""
+import random
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+# utils
+from utils.settings import GRID_PARAMS
+# src.map
+from map.bitgrid import dilate, ship_mask
+
+# sizes of all ships in the same order as Fleet.itr_fleet
+FLEET_SIZES = tuple(size for size in range(1, 5) for _ in range(5 - size))
+
+
+class Placement(NamedTuple):
+    """One legal position of the ship on the empty board.
+
+    Attributes:
+        mask - int - mask of the ship cells (see BitGrid).
+        halo - int - mask of the ship cells and all their neighbours.
+        x - int - x coordinate of the first cell of the ship.
+        y - int - y coordinate of the first cell of the ship.
+        orientation - int - orientation of the ship (same as Ship.orientation).
+    """
+    mask: int
+    halo: int
+    x: int
+    y: int
+    orientation: int
+
+
+@lru_cache(maxsize=None)
+def ship_placements(size: int) -> Tuple[Placement, ...]:
+    """Return all positions of the ship with input size on the empty board.
+    Result is computed only once for every size.
+
+    Attributes:
+        size - int - size of the ship.
+    Return:
+        Tuple[Placement, ...] - all legal positions of the ship.
+    """
+    placements = []
+    orientations = (0,) if size == 1 else (0, 1)
+    for orientation in orientations:
+        for x in range(GRID_PARAMS["GRID_SIZE"]):
+            for y in range(GRID_PARAMS["GRID_SIZE"]):
+                mask = ship_mask(x, y, size, orientation)
+                if mask:
+                    placements.append(Placement(mask, dilate(mask), x, y, orientation))
+    return tuple(placements)
+
+
+class PlacementEngine:
+    """Class that generates random legal placements of the whole fleet.
+    Every ship is chosen only from cached positions that don't touch already placed ships,
+    so there is no rejection sampling. If the fleet cannot be placed
+    (custom fleet that doesn't fit the board), ValueError is raised after max_steps.
+
+    Attributes:
+        sizes - Tuple[int, ...] - sizes of all ships in the fleet.
+        max_steps - int - maximal count of tried positions for one fleet.
+    """
+    def __init__(self, sizes: Tuple[int, ...] = FLEET_SIZES, max_steps: int = 10000):
+        """Create placement engine for the fleet with input sizes of ships."""
+        self.sizes = sizes
+        self.max_steps = max_steps
+
+    def sample(self, rng: random.Random = None) -> Tuple[Placement, ...]:
+        """Create random placement of the whole fleet. Bigger ships are placed first,
+        if some ship has no free position, previous ship is moved (backtracking).
+
+        Attributes:
+            rng - random.Random - generator of random numbers, by default random module.
+        Return:
+            Tuple[Placement, ...] - positions of the ships in the same order as sizes.
+        """
+        rng = rng or random
+        order = sorted(range(len(self.sizes)), key=lambda i: -self.sizes[i])
+        result: List[Placement | None] = [None] * len(self.sizes)
+        steps = 0
+
+        def place(depth: int, blocked: int) -> bool:
+            nonlocal steps
+            if depth == len(order):
+                return True
+            free = [p for p in ship_placements(self.sizes[order[depth]]) if not p.mask & blocked]
+            while free and steps < self.max_steps:
+                steps += 1
+                # take random free position without shuffling the whole list
+                idx = rng.randrange(len(free))
+                placement = free[idx]
+                free[idx] = free[-1]
+                free.pop()
+                result[order[depth]] = placement
+                if place(depth + 1, blocked | placement.halo):
+                    return True
+            return False
+
+        if not place(0, 0):
+            raise ValueError(f"Fleet {self.sizes} cannot be placed on the board")
+        return tuple(result)
+
+    def generate_fleets(self, n: int, seed: int = None) -> List[Tuple[Placement, ...]]:
+        """Create n random placements of the whole fleet.
+        The same seed always gives the same placements.
+
+        Attributes:
+            n - int - count of the fleets.
+            seed - int - seed of the random generator, None for random seed.
+        Return:
+            List[Tuple[Placement, ...]] - positions of the ships for every fleet.
+        """
+        rng = random.Random(seed)
+        return [self.sample(rng) for _ in range(n)]
+
+
+# placement engine of the standard fleet shared by all boards and players
+PLACEMENT = PlacementEngine()
@@ -21,7 +21,11 @@ class Ship:
         pos - list of Cell - position of the ship on the table.
         sunk - boolean - True if ship is sunk, False otherwise.
         orientation - int - 0 if horizontal, 1 if vertical.
-        rect - Rect - pygame Rect for drawing the ship.
+        rect - Rect - pygame Rect for drawing the ship, created only when it's used
+               (see set_rect), None if ship is not on the board.
+        rect_coords - Tuple[int, int] | None - coordinates of the rect if they are not
+                      coordinates of the first part of the ship (during dragging).
+        cached_rect - Rect | None - created rect.
         dragging - bool - True if ship is dragging, False otherwise.
         offset - int - can be FG_OFFSET or SG_OFFSET (left or right table).
     """
@@ -31,25 +35,35 @@ class Ship:
         self.pos = []
         self.sunk = False
         self.orientation = 0
-        self.rect = None
+        self.rect_coords = None
+        self.cached_rect = None
         self.dragging = False
         self.offset = offset
 
+    @property
+    def rect(self) -> pg.Rect | None:
+        """Return ship rect. Rect is created only for the first use after set_rect."""
+        if self.cached_rect is None and (self.rect_coords is not None or self.pos):
+            c_size = GRID_PARAMS["CELL_SIZE"]
+            x, y = self.rect_coords or self.pos[0].get_coords()
+            if self.orientation == 0:
+                self.cached_rect = get_rect(self.offset, (x, y), (c_size, c_size * self.size))
+            else:
+                self.cached_rect = get_rect(self.offset, (x, y), (c_size * self.size, c_size))
+        return self.cached_rect
+
     def set_rect(self, x: int = None, y: int = None) -> None:
         """Set or update ship rect.
-         Use input position of the first cell in pos list (first part of the ship)
+         Use input position of the first cell in pos list (first part of the ship).
+         Rect itself is created lazily (see rect), so ships that are never drawn
+         don't create it.
 
         Attributes:
             x - int - x coordinate (if None => current first element pos)
             y - int - y coordinate (if None => current first element pos)
         """
-        c_size = GRID_PARAMS["CELL_SIZE"]
-        if x is None or y is None:
-            x, y = self.pos[0].get_coords()
-        if self.orientation == 0:
-            self.rect = get_rect(self.offset, (x, y), (c_size, c_size * self.size))
-        else:
-            self.rect = get_rect(self.offset, (x, y), (c_size * self.size, c_size))
+        self.rect_coords = None if x is None or y is None else (x, y)
+        self.cached_rect = None
 
     def update_offset(self, offset: int) -> None:
         """Set new offset and redrew rect.
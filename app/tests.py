@@ -1,7 +1,12 @@
 """
     Unit tests for game.
 """
+import random
+import socket
+import asyncio
 import subprocess
+from itertools import product
+import numpy as np
 import pygame as pg
 import pytest
 
@@ -12,10 +17,38 @@ import pytest
 
 from map.cell import Cell
 from map.grid import Grid
+from map.bitgrid import BitGrid, cell_bit, cells as bitgrid_cells, ship_mask
 from ships.ship import Ship
+from ships.placement import PlacementEngine, FLEET_SIZES
 from player.player import Player
-from utils.settings import GRID_PARAMS, BASE
-from utils.helper import get_rect, is_in_range
+from online.room import Room
+from online.lobby import Lobby
+from online.coordinator import Coordinator, ROUTE, LEFT
+from online.protocol import (HEADER, EVENTS, encode_message, decode_message,
+                             SHIPS_CNT, MESSAGES, check_layout, encode_layout,
+                             read_frame_async)
+from online.sync import StateSync
+from online.metrics import Metrics
+from online.chat_log import ChatLog
+from online.local_network import LocalNetwork, HUMAN, COMPUTER
+from online.match_log import MatchLog, MatchLogReader, RECORD
+from online.replay import Replay
+from game.game import Game
+from game.layers import LayeredScreen
+from game.profiler import FrameProfiler, PHASES
+from engine.board import Board, NO_SHIP
+from engine.game_state import GameState
+from engine.batch_board import BatchBoards
+from chat.chat import Chat
+from bots.density_bot import DensityBot
+from bots.hunt_target_bot import HuntTargetBot
+from bots.batch_bots import BatchHuntTargetBot
+from tournament import play_chunk, play_batch
+from server import Server
+from benchmarks import BenchmarkSuite
+from utils.settings import GRID_PARAMS, BASE, FONT_NAME, MATCH_LOG, NETWORK
+from utils.helper import get_rect, is_in_range, get_font, render_text
+from utils.text_wrapper import TextWrapper
 
 
 def test_codestyle():
@@ -24,7 +57,7 @@ def test_codestyle():
         R0801: Similar lines in 2 files
         E1101: Module 'pygame' has no 'QUIT' member (no-member)
     """
-    command = "pylint ./**/*.py --disable=R0902,R0801,E1101"
+    command = "pylint ./*.py ./**/*.py --disable=R0902,R0801,E1101"
     result = subprocess.run(command, shell=True, stdout=subprocess.PIPE, text=True, check=False)
     result_list = result.stdout.split('\n')[1:-5]
     assert len(result_list) == 0, "Project has PEP8 errors."
@@ -61,6 +94,28 @@ def test_grid():
     assert grid.check_neighbors(5, 5) is True
 
 
+def test_bitgrid():
+    """Test for BitGrid class. It must give the same answers as Grid."""
+    grid = BitGrid()
+    grid.set_cell_state(0, 0, 1)
+    assert grid.check_neighbors(1, 1) is False
+    assert grid.can_place(ship_mask(0, 2, 3, 0)) is True
+    assert grid.can_place(ship_mask(0, 1, 3, 0)) is False
+    assert grid.can_place(ship_mask(8, 5, 3, 0)) is False
+    grid.around_sunk_ship(cell_bit(0, 0))
+    assert grid.get_cell_state(0, 0) == 4
+    assert grid.get_cell_state(1, 1) == 3
+    assert grid.get_cell_state(0, 2) == 0
+    assert grid.states()[:3] == [4, 3, 0] and grid.states()[11] == 3
+    player = Player(0)
+    player.random_set_ships()
+    bit_grid = BitGrid.from_grid(player.board)
+    size = GRID_PARAMS["GRID_SIZE"]
+    for x, y in product(range(size), repeat=2):
+        assert bit_grid.get_cell_state(x, y) == player.get_cell_state(x, y)
+        assert bit_grid.check_neighbors(x, y) == player.board.check_neighbors(x, y)
+
+
 def test_ship():
     """Test for Ship class."""
     # create grid
@@ -118,6 +173,208 @@ def test_fleet():
     assert fleet.set_dragging() is None
 
 
+def test_board():
+    """Test for headless Board class: shot resolution, sunk detection and win check."""
+    board = Board.random(random.Random(3))
+    player = Player(0)
+    player.load_fleet(board.layout())
+    assert encode_layout(player.fleet) == board.layout()
+    row, col = divmod(board.positions[-1] & 0x7F, GRID_PARAMS["GRID_SIZE"])
+    with pytest.raises(ValueError):
+        board.place(0, row, col, 0)
+    row, col = divmod(board.positions[0], GRID_PARAMS["GRID_SIZE"])
+    assert board.shoot(row, col) == 4
+    assert board.sunk[0] is True
+    with pytest.raises(ValueError):
+        board.shoot(row, col)
+    assert board.is_defeated() is False
+    for x, y in product(range(GRID_PARAMS["GRID_SIZE"]), repeat=2):
+        if board.get_cell_state(x, y) in (0, 1):
+            assert board.shoot(x, y) in (2, 3, 4)
+    assert board.is_defeated() is True
+
+
+def test_density_bot():
+    """Test for DensityBot class. Bot must never shoot twice in one cell
+    and sink the whole fleet much faster than by shooting all cells."""
+    bot = DensityBot(random.Random(0))
+    for seed in range(5):
+        board = Board.random(random.Random(seed))
+        shots = 0
+        while not board.is_defeated():
+            x, y = bot.choose_shot(board)
+            assert board.shoot(x, y) in (2, 3, 4)
+            shots += 1
+        assert shots < 80
+
+
+def test_tournament():
+    """Test for tournament games. Results must depend only on the seed and game numbers."""
+    wins, shots = play_chunk(("random", "hunt-target"), 1, 0, 20)
+    assert sum(wins) == 20
+    assert [sum(cnt.values()) for cnt in shots] == wins
+    assert play_chunk(("random", "hunt-target"), 1, 0, 20) == (wins, shots)
+    assert wins[1] > wins[0]
+    wins, shots = play_batch(("random", "hunt-target"), 1, 0, 50)
+    assert sum(wins) == 50
+    assert play_batch(("random", "hunt-target"), 1, 0, 50) == (wins, shots)
+
+
+def test_benchmark_compare(tmp_path):
+    """Test for BenchmarkSuite class. Only cases slower than threshold are regressions."""
+    suite = BenchmarkSuite(repeat=1)
+    suite.case("grid")(lambda: Grid)
+    suite.run()
+    path = str(tmp_path / "baseline.json")
+    suite.save(path)
+    assert suite.compare(path) is False
+    suite.results["grid"]["best_us"] *= 2
+    assert suite.compare(path) is True
+    assert suite.compare(path, threshold=3) is False
+
+
+def test_batch_board():
+    """Test for BatchBoards class. Shots must be resolved same as by Board."""
+    rng = random.Random(4)
+    boards = [Board.random(rng) for _ in range(20)]
+    batch = BatchBoards.from_boards(boards)
+    games = np.arange(len(boards))
+    while not all(board.is_defeated() for board in boards):
+        games = np.array([k for k in games if not boards[k].is_defeated()])
+        cells = [rng.choice([cell for cell in product(range(GRID_PARAMS["GRID_SIZE"]), repeat=2)
+                             if boards[k].get_cell_state(*cell) in (0, 1)]) for k in games]
+        expected = [boards[k].shoot(x, y) for k, (x, y) in zip(games, cells)]
+        x, y = np.array(cells).T
+        assert batch.shoot(games, x, y).tolist() == expected
+        assert [batch.states[k].ravel().tolist() for k in games] == \
+               [boards[k].states() for k in games]
+    assert batch.is_defeated().all()
+    with pytest.raises(ValueError):
+        batch.shoot(games[:1], x[:1], y[:1])
+    batch = BatchBoards.random(30, np.random.default_rng(2))
+    for k in range(30):
+        board = Board()
+        for idx in range(len(FLEET_SIZES)):
+            (x, y), *rest = np.argwhere(batch.ship_ids[k] == idx)
+            board.place(idx, int(x), int(y), 1 if rest and rest[0][0] == x else 0)
+        assert board.states() == batch.states[k].ravel().tolist()
+
+
+def test_batch_hunt_target_bot():
+    """Test for BatchHuntTargetBot. Targets are the same as candidates of HuntTargetBot."""
+    rng = random.Random(5)
+    bot, boards = HuntTargetBot(rng), [Board.random(rng) for _ in range(10)]
+    for _ in range(60):
+        for board in boards:
+            if not board.is_defeated():
+                board.shoot(*bot.choose_shot(board))
+        batch = BatchBoards.from_boards(boards)
+        target = np.flatnonzero(((batch.left > 0) & (batch.left < batch.sizes)).any(axis=1))
+        states = batch.states[target].reshape(len(target), GRID_PARAMS["GRID_SIZE"] ** 2)
+        found, cells = BatchHuntTargetBot.targets(states)
+        for i, k in enumerate(target):
+            assert sorted(cells[found == i]) == sorted(bitgrid_cells(bot.candidates(boards[k])))
+
+
+def test_placement():
+    """Test for PlacementEngine class. All fleets must be legal and seed must repeat them."""
+    engine = PlacementEngine()
+    fleets = engine.generate_fleets(50, seed=7)
+    assert fleets == engine.generate_fleets(50, seed=7)
+    for fleet in fleets:
+        grid = BitGrid()
+        for size, place in zip(FLEET_SIZES, fleet):
+            assert place.mask.bit_count() == size
+            assert grid.can_place(place.mask) is True
+            grid.place(place.mask)
+    with pytest.raises(ValueError):
+        PlacementEngine((4,) * 20, max_steps=500).sample()
+
+
+def test_text_cache():
+    """Test for font and rendered text caches."""
+    pg.init()
+    assert get_font(FONT_NAME["CHAT"], 24) is get_font(FONT_NAME["CHAT"], 24)
+    surface = render_text("Ready", 18, FONT_NAME["GAME"], (0, 0, 0))
+    assert render_text("Ready", 18, FONT_NAME["GAME"], (0, 0, 0)) is surface
+    assert render_text("Ready", 18, FONT_NAME["GAME"], (255, 0, 0)) is not surface
+
+
+def test_text_wrapper():
+    """Test for TextWrapper class. Lines fit into the width and keep all characters."""
+    pg.init()
+    wrapper = TextWrapper(FONT_NAME["CHAT"], 18, 100)
+    text = "short words and averyveryverylongwordthatdoesnotfit"
+    lines = wrapper.wrap(text)
+    assert "".join(lines) == text
+    assert lines[0].endswith(" ")
+    assert all(get_font(FONT_NAME["CHAT"], 18).size(line)[0] <= 100 for line in lines)
+    assert wrapper.wrap(text) is lines
+    assert wrapper.wrap("") == ("",)
+    # changed text reuses unchanged lines and is split same as new text
+    text = "every key press splits again only the last lines of the message"
+    for end in range(len(text) + 1):
+        lines = wrapper.wrap(text[:end])
+        assert lines == TextWrapper(FONT_NAME["CHAT"], 18, 100).wrap(text[:end])
+    assert wrapper.wrap(text + " x")[0] is lines[0]
+    edited = text.replace("key", "long key")
+    assert wrapper.wrap(edited) == TextWrapper(FONT_NAME["CHAT"], 18, 100).wrap(edited)
+
+
+def test_layered_screen():
+    """Test for LayeredScreen class. Only changed regions are redrawn."""
+    pg.init()
+    pg.display.set_mode((100, 100))
+    screen = LayeredScreen()
+    drawn = []
+    rect = pg.Rect(10, 10, 20, 20)
+    screen.begin("background", lambda: drawn.append("background"))
+    screen.region("board", rect, 1, lambda: drawn.append("board"))
+    assert screen.dirty == [pg.display.get_surface().get_rect(), rect]
+    screen.update()
+    screen.begin("background", lambda: drawn.append("background"))
+    screen.region("board", rect, 1, lambda: drawn.append("board"))
+    assert not screen.dirty
+    screen.region("board", rect, 2, lambda: drawn.append("board"))
+    assert screen.dirty == [rect]
+    screen.layer("grid", rect, 1, lambda: drawn.append("grid"))
+    screen.layer("grid", rect, 1, lambda: drawn.append("grid"))
+    assert drawn == ["background", "board", "board", "grid"]
+    screen.invalidate()
+    screen.begin("background", lambda: drawn.append("background"))
+    assert drawn[-1] == "background"
+
+
+def test_frame_profiler(tmp_path):
+    """Test for FrameProfiler class. Phases are summed per frame and logged to CSV,
+    phases with nested frames are dropped."""
+    path = tmp_path / "frames.csv"
+    profiler = FrameProfiler(str(path))
+    profiler.end_frame()
+    assert profiler.frames == 0
+    for _ in range(3):
+        with profiler.phase("net"):
+            profiler.current["flip"] = 1.0
+        with profiler.phase("net"):
+            pass
+        profiler.end_frame()
+    with profiler.phase("events"):
+        profiler.current["flip"] = 2.0
+        profiler.end_frame()  # frame of the nested loop
+    profiler.end_frame()
+    assert profiler.frames == 4
+    assert list(profiler.samples["flip"]) == [1.0, 1.0, 1.0, 2.0]
+    assert list(profiler.samples["events"]) == [0.0] * 4
+    assert all(value > 0 for value in list(profiler.samples["net"])[:3])
+    profiler.toggle()
+    assert [line[0] for line in profiler.lines] == list(PHASES) + ["frame"]
+    assert dict((name, p50) for name, p50, _ in profiler.lines)["flip"] == 1.0
+    profiler.file.close()
+    rows = path.read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 5 and rows[0].startswith("frame,events_ms,net_ms")
+    assert FrameProfiler.percentile([1, 2, 3, 4], 0.5) == 3
+
+
 @pytest.mark.parametrize(
     'x, y, expected',
     [
@@ -131,6 +388,366 @@ def test_is_in_range(x, y, expected):
     assert is_in_range(x, y) == expected
 
 
+def test_chat_receive():
+    """Test for Chat.receive. Lines from the server are inserted before unconfirmed lines."""
+    chat = Chat()
+    chat.messages = ["> mine"]
+    chat.unsent = 1
+    chat.sent.append(chat.unsent)
+    chat.unsent = 0
+    chat.receive(0, ["> enemy"])
+    assert chat.messages == ["> enemy", "> mine"]
+    chat.receive(0, ["> enemy", "> mine"], own=True)
+    assert chat.messages == ["> enemy", "> mine"]
+    assert chat.last_seq == 2 and not chat.sent
+    # chat log was replaced in the room, lines from 0 replace all received lines
+    chat.messages.append("> new")
+    chat.sent.append(1)
+    chat.receive(0, ["> other"])
+    assert chat.messages == ["> other", "> new"] and chat.last_seq == 1
+    chat.receive(0, ["> other", "> new"], own=True)
+    assert chat.messages == ["> other", "> new"] and chat.last_seq == 2
+
+
+def test_local_network_rejected_shot(monkeypatch):
+    """Test for LocalNetwork.bot_moves. Computer stops moving when the room rejects his shot."""
+    monkeypatch.setitem(MATCH_LOG, "DIR", "")
+    net = LocalNetwork(random.Random(0))
+    net.room.handle(HUMAN, ("set_user_ships", 0, Board.random(random.Random(1)).layout()))
+    net.room.game[COMPUTER].is_my_move = True
+    net.room.game[HUMAN].player.shoot(0, 0)
+    monkeypatch.setattr(net.bot, "choose_shot", lambda board: (0, 0))
+    net.bot_moves()
+    assert net.room.game[COMPUTER].is_my_move
+
+
+def test_chat_log_limit():
+    """Test for ChatLog.trim with Room.chat. Log keeps the newest lines under the limit
+    and both players get the whole trimmed log from sequence number 0."""
+    room, events = Room(0), []
+    room.chat_log = ChatLog(40)
+    room.join(0)
+    room.join(1)
+    room.subscribe(1, events.append)
+    lines = [f"> line {i}" for i in range(6)]  # 10 bytes with the length
+    assert room.handle(0, ("chat", 0, lines[:4])) == ("chat", 0, lines[:4])
+    assert room.handle(0, ("chat", 4, lines[4:])) == ("chat", 0, lines[4:])
+    assert events[-1] == ("chat_lines", 0, lines[4:])
+    assert room.chat_log.size == 20 and room.chat_seen == [2, 2]
+    room.handle(0, ("chat", 2, ["x" * 100]))
+    assert not room.chat_log.lines and room.chat_log.size == 0
+    frame = encode_message("chat", 0, ["x" * 1000] * 100)
+    log = ChatLog()
+    log.append(decode_message(frame[4], frame[HEADER.size:])[2])
+    log.trim()
+    assert len(encode_message("chat", 0, log.since(0))) < NETWORK["MSG_SIZE"]
+
+
+def test_chat_replaced_log():
+    """Test for Room.chat with Chat. After the enemy left, client gets the new chat log
+    from sequence number 0, also when he sends the number from the old log."""
+    room, chat, events = Room(0), Chat(), []
+    room.join(0)
+    room.join(1)
+    room.subscribe(0, events.append)
+    room.handle(1, ("chat", 0, ["> a", "> b", "> c"]))
+    chat.receive(*events[-1][1:])
+    room.leave(1)
+    room.join(1)
+    room.handle(1, ("chat", 0, ["> new"]))
+    chat.receive(*events[-1][1:])
+    assert chat.messages == ["> new"] and chat.last_seq == 1
+    room.leave(1)
+    chat.messages.append("> mine")
+    chat.sent.append(1)
+    assert room.handle(0, ("chat", chat.last_seq, ["> mine"])) == ("chat", 0, ["> mine"])
+    chat.receive(0, ["> mine"], own=True)
+    assert chat.messages == ["> mine"] and chat.last_seq == 1
+
+
+def test_room():
+    """Test for Room class."""
+    room = Room(0)
+    events = []
+    room.join(0)
+    room.subscribe(0, events.append)
+    assert room.game[0].has_enemy == 0
+    room.join(1)
+    assert room.is_full() is True
+    assert events[-1][1] == EVENTS["ENEMY_JOINED"]
+    assert room.handle(0, ("set_user_name", "first")) == ("enemy_name", "User0", 1)
+    assert room.handle(1, ("get_enemy_name", "second")) == ("enemy_name", "first", 1)
+    assert room.handle(1, ("set_user_name", "second")) == ("enemy_name", "first", 1)
+    assert events[-1][1] == EVENTS["ENEMY_NAME"] and events[-1][3] == ["second"]
+    assert room.handle(0, ("chat", 0, ["> hi"])) == ("chat", 0, ["> hi"])
+    assert room.handle(1, ("chat", 0, ["> hey"])) == ("chat", 0, ["> hi", "> hey"])
+    assert events[-1] == ("chat_lines", 1, ["> hey"])
+    assert room.handle(1, ("unknown",)) is None
+    assert room.handle(0, ("shoot", 0, 0, 0))[3] == 0  # ships are not set yet
+    boards = [Board.random(random.Random(seed)) for seed in range(3)]
+    boards[2].positions[0] = NO_SHIP
+    room.handle(1, ("set_user_ships", 0, boards[2].layout()))  # fleet is not complete
+    assert not room.game[1].player_ready
+    room.handle(1, ("set_user_ships", 0, boards[1].layout()))
+    room.handle(0, ("set_user_ships", 0, boards[0].layout()))
+    assert room.handle(0, ("shoot", 0, 0, 0))[3] != 0
+    shots = room.game[1].player.states()
+    room.handle(1, ("set_user_ships", 0, boards[0].layout()))  # match runs
+    assert room.game[1].player.states() == shots and room.game[0].enemy is room.game[1].player
+    room.subscribe(1, events.append)
+    room.set_away(1, True)
+    assert events[-1][1] == EVENTS["ENEMY_AWAY"] and room.listeners[1] is None
+    room.set_away(1, False)
+    assert events[-1][1] == EVENTS["ENEMY_BACK"] and not room.away[1]
+    room.leave(0)
+    assert room.game[1].has_enemy == 2
+    assert room.chat_log.last_seq() == 0
+    room.leave(1)
+    assert room.is_empty() is True
+
+
+def test_lobby():
+    """Test for Lobby class and for moving of the waiting player to other room."""
+    lobby = Lobby(1)
+    assert lobby.join(0) is None
+    assert lobby.join(1) == 0 and lobby.rooms == 1
+    for player_id in range(2, 6):
+        assert lobby.join(player_id) is None
+    assert lobby.leave(3) and not lobby.leave(3)
+    assert lobby.updates() == [(2, 1), (4, 2), (5, 3)]
+    assert not lobby.updates()
+    assert lobby.finish() == [(2, 4)] and lobby.rooms == 1
+    assert lobby.updates() == [(5, 1)]
+    # both waiting players set ships in their own rooms, then they are paired
+    rooms, events = [Room(0), Room(1)], []
+    boards = [Board.random(random.Random(seed)) for seed in range(2)]
+    for room, name, board in zip(rooms, ("first", "second"), boards):
+        room.join(0)
+        room.handle(0, ("set_user_name", name))
+        room.handle(0, ("set_user_ships", 0, board.layout()))
+    rooms[1].subscribe(0, events.append)
+    rooms[1].notify(0, "QUEUE", ["1"])
+    assert events[-1][1] == EVENTS["QUEUE"] and events[-1][3] == ["1"]
+    version = events[-1][2].version
+    rooms[0].adopt(1, rooms[1], 0)
+    assert events[-1][1] == EVENTS["ENEMY_NAME"] and events[-1][3] == ["first"]
+    delta = events[-1][2]
+    assert delta.version > version and delta.flags is not None
+    assert delta.layouts[1] is None  # enemy ships are hidden
+    game = rooms[0].game
+    assert game[0].has_enemy == game[1].has_enemy == 1 and game[0].is_my_move
+    assert game[0].enemy_name == "second" and game[0].enemy is game[1].player
+    assert rooms[0].handle(0, ("shoot", 0, 0, 0))[3] != 0
+
+
+def test_coordinator():
+    """Test for Coordinator. New players are routed to the same worker in pairs,
+    resumed session to the worker of its token, connection is passed to the worker."""
+    channels = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(2)]
+    coordinator = Coordinator([channel for channel, _ in channels])
+    workers = [worker for _, worker in channels]
+    assert [coordinator.choose(b"") for _ in range(4)] == [0, 0, 1, 1]
+    assert coordinator.choose(bytes([1]) + bytes(15)) == 1
+    assert coordinator.choose(b"") == 0 and coordinator.odd == {0}
+    workers[0].send(bytes([LEFT]))  # waiting player left worker 0
+    assert coordinator.handle(0) and not coordinator.odd
+    client, accepted = socket.socketpair()
+    socket.send_fds(workers[1], [bytes([ROUTE, 0]) + bytes(15)], [accepted.fileno()])
+    accepted.close()
+    assert coordinator.handle(1)
+    token, fds, _, _ = socket.recv_fds(workers[0], 16, 1)
+    assert token == bytes(16)
+    with socket.socket(fileno=fds[0]) as routed:
+        client.sendall(b"hi")
+        assert routed.recv(2) == b"hi"
+    workers[1].close()
+    assert coordinator.handle(1) is False
+    for sock in [client, workers[0]] + [channel for channel, _ in channels]:
+        sock.close()
+
+
+def play_logged_match(directory: str) -> tuple:
+    """Play one match in the room with the match log in the directory.
+
+    Return:
+        Tuple[List[Board], List[tuple], List[List[int]]] - boards of both players,
+        all accepted shots as (player, cell, state) and final states of both boards.
+    """
+    match_log = MatchLog(directory)
+    room = Room(0, match_log)
+    room.join(0)
+    room.join(1)
+    boards = [Board.random(random.Random(seed)) for seed in range(2)]
+    room.handle(0, ("set_user_ships", 0, boards[0].layout()))
+    room.handle(1, ("set_user_ships", 0, boards[1].layout()))
+    shots = []
+    order = [list(range(GRID_PARAMS["GRID_SIZE"] ** 2)) for _ in range(2)]
+    while not room.game[0].is_over():
+        player = 0 if room.game[0].is_my_move else 1
+        cell = order[player].pop(0)
+        answer = room.handle(player, ("shoot", 0, *divmod(cell, GRID_PARAMS["GRID_SIZE"])))
+        if answer[3] != 0:  # cells around sunk ships are rejected
+            shots.append((player, cell, answer[3]))
+    assert room.handle(0, ("shoot", 0, 9, 9))[3] == 0
+    final = [game.player.states() for game in room.game]
+    room.join(0)
+    room.leave(0)  # no match runs, nothing is aborted
+    match_log.close()
+    return boards, shots, final
+
+
+def test_match_log(tmp_path):
+    """Test for MatchLog and MatchLogReader. Placements, shots and the winner
+    of the match played in the room are read back, incomplete record is skipped."""
+    boards, shots, _ = play_logged_match(str(tmp_path))
+    segment = MatchLogReader(str(tmp_path)).segments()[0]
+    with open(segment, "ab") as file:
+        file.write(RECORD.pack(1, 0, 1, 0, 0, 0)[:5])
+    matches = list(MatchLogReader(str(tmp_path)).matches(aborted=True))
+    assert len(matches) == 1
+    assert matches[0].layouts == (boards[0].layout(), boards[1].layout())
+    assert matches[0].shots == shots and matches[0].winner == shots[-1][0]
+    # every worker of the server has its own segments and ids
+    sharded = MatchLog(str(tmp_path), 1, 4)
+    assert sharded.start() % 4 == 1 and sharded.start() % 4 == 1
+    assert sharded.name(0) == "1970-01-01.1"
+    sharded.close()
+
+
+def test_match_log_index(tmp_path):
+    """Test for the index of the match log. Every finished match has one entry
+    with count of shots and the winner."""
+    _, shots, _ = play_logged_match(str(tmp_path))
+    (entry,) = MatchLogReader(str(tmp_path)).replays()
+    assert entry.moves == len(shots) and entry.winner == shots[-1][0]
+
+
+def test_replay_checkpoints(tmp_path):
+    """Test for Replay class. Boards after any shot are restored from the checkpoints."""
+    _, shots, final = play_logged_match(str(tmp_path))
+    (entry,) = MatchLogReader(str(tmp_path)).replays()
+    replay = Replay(entry)
+    for move, shot in enumerate(shots):
+        assert tuple(replay.shot(move))[3:] == shot
+        enemy = replay.boards(move)[1 - shot[0]]
+        assert enemy.shoot(*divmod(shot[1], GRID_PARAMS["GRID_SIZE"])) == shot[2]
+    assert [board.states() for board in replay.boards(len(shots))] == final
+    replay.close()
+
+
+def test_protocol():
+    """Test for binary protocol. Encoded messages must be decoded to the same data."""
+    player = Player(0)
+    player.random_set_ships()
+    frame = encode_message("set_user_ships", 7, player.board, player.fleet)
+    length, msg_type = HEADER.unpack_from(frame)
+    assert length == len(frame) - HEADER.size == 4 + SHIPS_CNT
+    name, since, layout = decode_message(msg_type, frame[HEADER.size:])
+    assert (name, since) == ("set_user_ships", 7)
+    board = check_layout(layout)
+    assert board.states() == [cell.get_state() for cell in player.board.iter_grid()]
+    # headless board is encoded same as client board and fleet
+    assert encode_message("set_user_ships", 7, board) == frame
+    assert encode_layout(player.fleet) == layout
+    assert board.layout() == layout
+    with pytest.raises(ValueError):
+        check_layout(bytes(len(layout)))  # ships touch each other
+    with pytest.raises(ValueError):
+        check_layout(layout[:-1] + bytes([NO_SHIP]))  # fleet is not complete
+    # invalid fleet is decoded and rejected by the room, so the player can send it again
+    room = Room(0)
+    room.join(0)
+    message = decode_message(msg_type, frame[HEADER.size:-1] + bytes([NO_SHIP]))
+    assert room.handle(0, message)[0] == "state" and not room.game[0].player_ready
+    room.handle(0, decode_message(msg_type, frame[HEADER.size:]))
+    assert room.game[0].player_ready
+    frame = encode_message("chat", 3, ["> hello", "   world"])
+    assert decode_message(frame[4], frame[HEADER.size:]) == ("chat", 3, ["> hello", "   world"])
+    token = bytes(range(16))
+    for message in (("hello", b""), ("hello", token), ("session", 1, token, True), ("leave",)):
+        frame = encode_message(*message)
+        assert decode_message(frame[4], frame[HEADER.size:]) == message
+
+
+def test_server_malformed_frame(monkeypatch):
+    """Test for Server. Client that sends malformed frame is disconnected
+    and his seat, session and place in the lobby are released."""
+    monkeypatch.setitem(MATCH_LOG, "DIR", "")
+
+    async def play(server: Server) -> None:
+        listener = await asyncio.start_server(server.client_handler, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname())
+        writer.write(encode_message("hello", b""))
+        assert decode_message(*await read_frame_async(reader))[0] == "session"
+        assert len(server.seats) == len(server.lobby.queue) == 1
+        writer.write(HEADER.pack(0, MESSAGES["get"][0]))  # get without version
+        assert not await reader.read()  # server closed the connection
+        writer.close()
+        listener.close()
+
+    server = Server()
+    asyncio.run(play(server))
+    assert not server.seats and not server.lobby.queue and not server.sessions
+
+
+def test_metrics(tmp_path):
+    """Test for Metrics class. Histograms are cumulative and metrics are dumped as text."""
+    metrics = Metrics()
+    metrics.observe_request("move", 40, 0.0003)
+    metrics.observe_request("move", 40, 2.0)
+    metrics.observe_send("state", 30, 0.00001)
+    metrics.rooms = 1
+    text = metrics.render()
+    assert 'battleships_messages_total{message="move"} 2' in text
+    assert 'battleships_bytes_in_total{message="move"} 80' in text
+    assert 'battleships_latency_seconds_bucket{message="move",le="0.0005"} 1' in text
+    assert 'battleships_latency_seconds_bucket{message="move",le="+Inf"} 2' in text
+    assert 'battleships_encode_seconds_count{message="state"} 1' in text
+    assert "battleships_rooms 1" in text
+    path = tmp_path / "metrics.txt"
+    metrics.dump(str(path))
+    assert path.read_text(encoding="utf-8").endswith(text.split("\n", 2)[2])
+
+
+def test_state_sync():
+    """Test for StateSync class. Player gets only changes since his version."""
+    game = GameState()
+    game.player = Board.random(random.Random(1))
+    sync = StateSync()
+    sync.commit(game)
+    assert len(sync.delta(0).cells) == 2 * GRID_PARAMS["GRID_SIZE"] ** 2
+    version = sync.version
+    sync.commit(game)
+    assert sync.delta(version).is_empty() is True
+    game.player.grid.set_cell_state(2, 3, 3)
+    game.is_my_move = True
+    sync.commit(game)
+    delta = sync.delta(version)
+    assert delta.cells == [(23, 3)]
+    assert delta.layouts == (None, None)
+    assert delta.flags is not None
+    client = Game()
+    client.update(sync.delta(0))
+    assert client.player.get_cell_state(2, 3) == 3
+    assert client.is_my_move is True
+    assert encode_layout(client.player.fleet) == game.player.layout()
+    # enemy ships are hidden until they are sunk or the match is over
+    game.enemy = Board.random(random.Random(2))
+    sync.commit(game)
+    client.update(sync.delta(client.version))
+    assert all(cell.get_state() == 0 for cell in client.enemy.board.iter_grid())
+    assert set(encode_layout(client.enemy.fleet)) == {NO_SHIP}
+    for idx in range(SHIPS_CNT):
+        for cell in bitgrid_cells(game.enemy.ships[idx]):
+            game.enemy.shoot(*divmod(cell, GRID_PARAMS["GRID_SIZE"]))
+        sync.commit(game)
+        client.update(sync.delta(client.version))
+        if idx == 0:
+            assert encode_layout(client.enemy.fleet) == game.enemy.sunk_layout()
+    assert encode_layout(client.enemy.fleet) == game.enemy.layout()
+    assert sync.delta(0).layouts[1] == game.enemy.layout()
+
+
 # only if server is DOWN
 # def test_negative_network():
 #     """Negative test for Network class. Cannot connect to the server."""
@@ -0,0 +1,259 @@
+"""
+    Tournament of computer players: plays many headless games between two strategies.
+"""
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+from engine.board import Board
+from engine.batch_board import BatchBoards
+from bots.random_bot import RandomBot
+from bots.hunt_target_bot import HuntTargetBot
+from bots.density_bot import DensityBot
+from bots.batch_bots import BatchRandomBot, BatchHuntTargetBot, BatchDensityBot
+
+STRATEGIES = {
+    "random": RandomBot,
+    "hunt-target": HuntTargetBot,
+    "density": DensityBot
+}
+# same strategies for many boards at once (see play_batch)
+BATCH_STRATEGIES = {
+    "random": BatchRandomBot,
+    "hunt-target": BatchHuntTargetBot,
+    "density": BatchDensityBot
+}
+# games played by one task of the process pool
+CHUNK_SIZE = 1000
+# games played by one task of the process pool in lockstep
+BATCH_SIZE = 20000
+
+
+def play_game(bots: Tuple, first: int, rng: random.Random) -> Tuple[int, int]:
+    """Play one game between two bots with the same rules as the server:
+    player moves again after hit or sunk ship and loses the move after miss.
+
+    Attributes:
+        bots - Tuple[Any, Any] - bots of the first and second player.
+        first - int - number of the player that moves first.
+        rng - random.Random - generator of random numbers for the boards.
+    Return:
+        Tuple[int, int] - number of the winner and count of his shots.
+    """
+    boards = (Board.random(rng), Board.random(rng))
+    shots = [0, 0]
+    player = first
+    while True:
+        enemy_board = boards[1 - player]
+        x, y = bots[player].choose_shot(enemy_board)
+        result = enemy_board.shoot(x, y)
+        shots[player] += 1
+        if result == 4 and enemy_board.is_defeated():
+            return player, shots[player]
+        if result == 3:
+            player = 1 - player
+
+
+def play_chunk(names: Tuple[str, str], seed: int, start: int, count: int) -> Tuple[List, List]:
+    """Play games from start to start + count. Results depend only on the seed
+    and numbers of the games, not on the count of worker processes.
+
+    Attributes:
+        names - Tuple[str, str] - names of the strategies (see STRATEGIES).
+        seed - int - seed of the tournament.
+        start - int - number of the first game.
+        count - int - count of the games.
+    Return:
+        Tuple[List[int], List[Counter]] - wins of both strategies and for both
+        strategies distribution of the shots in won games (count of games by count of shots).
+    """
+    rng = random.Random(f"{seed}:{start}")
+    bots = tuple(STRATEGIES[name](rng) for name in names)
+    wins = [0, 0]
+    shots = [Counter(), Counter()]
+    for game in range(start, start + count):
+        # players change the first move every game
+        winner, winner_shots = play_game(bots, game % 2, rng)
+        wins[winner] += 1
+        shots[winner][winner_shots] += 1
+    return wins, shots
+
+
+class LockstepGames:
+    """Class that represents many games between two batch bots played in lockstep
+    on BatchBoards: in every step every game that is not over gets one shot.
+
+    Attributes:
+        bots - Tuple[Any, Any] - batch bots of the first and second player.
+        boards - Tuple[BatchBoards, BatchBoards] - boards of both players in all games.
+        turn - np.ndarray - number of the player who moves in every game.
+        shots - np.ndarray - array (count of games, 2), shots of both players.
+        winner - np.ndarray - number of the winner in every game, -1 if game is not over.
+    """
+    def __init__(self, names: Tuple[str, str], rng: np.random.Generator,
+                 start: int, count: int):
+        """Create games from start to start + count with random boards.
+
+        Attributes:
+            names - Tuple[str, str] - names of the strategies (see BATCH_STRATEGIES).
+            rng - np.random.Generator - generator of random numbers.
+            start - int - number of the first game.
+            count - int - count of the games.
+        """
+        self.bots = tuple(BATCH_STRATEGIES[name](rng) for name in names)
+        self.boards = (BatchBoards.random(count, rng), BatchBoards.random(count, rng))
+        # players change the first move every game
+        self.turn = np.arange(start, start + count) % 2
+        self.shots = np.zeros((count, 2), dtype=np.int32)
+        self.winner = np.full(count, -1)
+
+    def step(self, player: int) -> None:
+        """Shoot once in every game that is not over and where it is players time to move.
+
+        Attributes:
+            player - int - number of the player.
+        """
+        games = np.flatnonzero((self.winner < 0) & (self.turn == player))
+        if not games.size:
+            return
+        enemy_boards = self.boards[1 - player]
+        x, y = self.bots[player].choose_shots(enemy_boards, games)
+        result = enemy_boards.shoot(games, x, y)
+        self.shots[games, player] += 1
+        self.winner[games[enemy_boards.is_defeated(games)]] = player
+        self.turn[games[result == 3]] = 1 - player
+
+    def results(self) -> Tuple[List, List]:
+        """Return wins and distribution of the shots in won games (same as play_chunk)."""
+        wins = [int(np.count_nonzero(self.winner == player)) for player in range(2)]
+        return wins, [Counter(self.shots[self.winner == player, player].tolist())
+                      for player in range(2)]
+
+
+def play_batch(names: Tuple[str, str], seed: int, start: int, count: int) -> Tuple[List, List]:
+    """Same as play_chunk, but all games are played in lockstep (see LockstepGames).
+
+    Attributes:
+        names - Tuple[str, str] - names of the strategies (see BATCH_STRATEGIES).
+        seed - int - seed of the tournament.
+        start - int - number of the first game.
+        count - int - count of the games.
+    Return:
+        Tuple[List[int], List[Counter]] - same as play_chunk.
+    """
+    games = LockstepGames(names, np.random.default_rng([seed, start]), start, count)
+    while (games.winner < 0).any():
+        for player in range(2):
+            games.step(player)
+    return games.results()
+
+
+def percentile(distribution: Counter, part: float) -> int:
+    """Return the smallest value such that input part of all values is not bigger.
+
+    Attributes:
+        distribution - Counter - count of values by value.
+        part - float - from 0 to 1.
+    """
+    limit = part * sum(distribution.values())
+    total = 0
+    for value in sorted(distribution):
+        total += distribution[value]
+        if total >= limit:
+            return value
+    return 0
+
+
+class Tournament:
+    """Class that runs games between two strategies on the process pool
+    and collects the results.
+
+    Attributes:
+        names - Tuple[str, str] - names of the strategies (see STRATEGIES).
+        games - int - count of the games.
+        seed - int - seed of the tournament, the same seed gives the same results.
+        workers - int | None - count of worker processes, None for count of CPUs.
+        batch - bool - True if games are played in lockstep (see play_batch).
+        wins - List[int] - wins of both strategies.
+        shots - List[Counter] - distribution of the shots in won games of both strategies.
+    """
+    def __init__(self, names: Tuple[str, str], games: int, seed: int = 0,
+                 workers: int = None, batch: bool = False):
+        """Create tournament without results."""
+        self.names = names
+        self.games = games
+        self.seed = seed
+        self.workers = workers
+        self.batch = batch
+        self.wins = [0, 0]
+        self.shots = [Counter(), Counter()]
+
+    def run(self) -> None:
+        """Play all games. Games are split to chunks, every chunk is one task of the pool."""
+        size, play = (BATCH_SIZE, play_batch) if self.batch else (CHUNK_SIZE, play_chunk)
+        starts = range(0, self.games, size)
+        counts = [min(size, self.games - start) for start in starts]
+        with ProcessPoolExecutor(self.workers) as pool:
+            results = pool.map(play, [self.names] * len(counts),
+                               [self.seed] * len(counts), starts, counts)
+            for wins, shots in results:
+                for player in range(2):
+                    self.wins[player] += wins[player]
+                    self.shots[player].update(shots[player])
+
+    def report(self) -> Dict[str, Dict]:
+        """Return win rate and statistics of the shots to win for both strategies."""
+        result = {}
+        for player, name in enumerate(self.names):
+            shots = self.shots[player]
+            won = sum(shots.values())
+            result[f"{player}:{name}"] = {
+                "wins": self.wins[player],
+                "win_rate": self.wins[player] / self.games if self.games else 0,
+                "shots_mean": sum(k * v for k, v in shots.items()) / won if won else 0,
+                "shots_min": min(shots, default=0),
+                "shots_p50": percentile(shots, 0.5),
+                "shots_p90": percentile(shots, 0.9),
+                "shots_max": max(shots, default=0),
+                "shots": dict(sorted(shots.items()))
+            }
+        return result
+
+
+def main():
+    """Parse arguments, run tournament and print results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("first", choices=STRATEGIES, help="strategy of the first player")
+    parser.add_argument("second", choices=STRATEGIES, help="strategy of the second player")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="count of the games")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the tournament")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="count of worker processes, by default count of CPUs")
+    parser.add_argument("-b", "--batch", action="store_true",
+                        help="play games in lockstep on NumPy arrays (much faster)")
+    parser.add_argument("--histogram", action="store_true",
+                        help="print count of won games for every count of shots")
+    args = parser.parse_args()
+
+    tournament = Tournament((args.first, args.second), args.games, args.seed,
+                            args.workers, args.batch)
+    begin = time.perf_counter()
+    tournament.run()
+    elapsed = time.perf_counter() - begin
+    print(f"{args.games} games in {elapsed:.1f} s ({args.games / elapsed:.0f} games/s)")
+    for name, stats in tournament.report().items():
+        print(f"{name}: wins {stats['wins']} ({stats['win_rate']:.2%}), "
+              f"shots to win mean {stats['shots_mean']:.2f}, min {stats['shots_min']}, "
+              f"p50 {stats['shots_p50']}, p90 {stats['shots_p90']}, max {stats['shots_max']}")
+        if args.histogram:
+            for shots, cnt in stats["shots"].items():
+                print(f"    {shots:3d} {cnt}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
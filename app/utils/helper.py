@@ -1,9 +1,55 @@
 """
     All helper functions for this game.
 """
+from functools import lru_cache
 from typing import Tuple
 import pygame as pg
-from utils.settings import FONT_SIZE, FONT_NAME, COLORS, GRID_PARAMS, USERNAME_DEST
+from utils.settings import BASE, FONT_SIZE, FONT_NAME, COLORS, GRID_PARAMS, USERNAME_DEST, CACHE
+
+# clock shared by all loops (only one loop runs at the same time)
+CLOCK = pg.time.Clock()
+
+
+def tick(fps: int = BASE["FPS"]) -> int:
+    """Wait until the end of the current frame, so loop runs
+    at most fps iterations per second.
+
+    Attributes:
+        fps - int - maximal frames per second, 0 for unlimited.
+    Return:
+        int - milliseconds since the previous frame.
+    """
+    return CLOCK.tick(fps)
+
+
+@lru_cache(maxsize=None)
+def get_font(font_name: str, font_size: int) -> pg.font.Font:
+    """Return font by name and size. Every font is loaded only once,
+    because SysFont scans all system fonts.
+
+    Attributes:
+        font_name - str - name of the font.
+        font_size - int - size of the font.
+    Return:
+        pg.font.Font - loaded font.
+    """
+    return pg.font.SysFont(font_name, font_size)
+
+
+@lru_cache(maxsize=CACHE["TEXT_SURFACES"])
+def render_text(text: str, font_size: int, font_name: str,
+                color: Tuple[int, int, int]) -> pg.Surface:
+    """Render text to the surface. Last rendered surfaces are cached.
+
+    Attributes:
+        text - str - text to render.
+        font_size - int - size of the text.
+        font_name - str - name of the text font.
+        color - Tuple[int, int, int] - RGB color of the text.
+    Return:
+        pg.Surface - surface with rendered text.
+    """
+    return get_font(font_name, font_size).render(text, True, color)
 
 
 def draw_text(text: str, dest: Tuple[int, int], font_size: int = FONT_SIZE["MAIN"],
@@ -19,9 +65,7 @@ def draw_text(text: str, dest: Tuple[int, int], font_size: int = FONT_SIZE["MAIN
         color - Tuple[int, int, int] - RGB color of the text.
     """
     screen = pg.display.get_surface()
-    font = pg.font.SysFont(font_name, font_size)
-    font_text = font.render(text, True, color)
-    screen.blit(font_text, dest)
+    screen.blit(render_text(text, font_size, font_name, tuple(color)), dest)
 
 
 def draw_coords(player: str, enemy: str) -> None:
@@ -1,12 +1,14 @@
 """
     All game settings in dictionary format.
 """
+import os
 
 BASE = {
     "WIDTH": 1280,
     "HEIGHT": 800,
     "NAME": "Battleships",
-    "USERNAME_LEN": 20
+    "USERNAME_LEN": 20,
+    "FPS": 60  # maximal frames per second in all loops, 0 for unlimited
 }
 USER = {
     "LEFT": 0,
@@ -23,7 +25,8 @@ FONT_SIZE = {
     "WINNER": 60,
     "SET_PHASE": 18,
     "CHAT": 24,
-    "USERNAME": 40
+    "USERNAME": 40,
+    "PROFILER": 13
 }
 FONT_NAME = {
     "CHAT": "freesansbold",
@@ -47,9 +50,48 @@ USERNAME_DEST = {
 NETWORK = {
     "SERVER": "10.0.10.48",  # local ip of server!
     "PORT": 5555,
-    "MSG_SIZE": 2048 * 10
+    "MSG_SIZE": 2048 * 10,
+    "BACKLOG": 1024
+}
+METRICS = {
+    "HOST": "127.0.0.1",  # metrics are available only on the server machine
+    "PORT": 5556,  # port of the HTTP endpoint, 0 for no endpoint
+    "FILE": "",  # file where metrics are periodically dumped, empty for no file
+    "DUMP_INTERVAL": 10  # seconds between dumps
+}
+PROFILER = {
+    "KEY": "f3",  # key that shows or hides the frame profiler overlay
+    "WINDOW": 300,  # number of last frames for percentiles
+    "REFRESH": 30,  # frames between updates of the overlay
+    "CSV": "",  # file where every frame is logged, empty for no file
+    "DEST": (10, 5)  # top left corner of the overlay
+}
+SESSION = {
+    "GRACE": 30,  # seconds when player who lost connection can resume his session
+    "RETRY": 1,  # seconds between attempts of the client to connect again
+    "TOKEN_SIZE": 16  # bytes of the random session token
+}
+LOBBY = {
+    "MAX_ROOMS": 5000,  # max count of rooms with two players, other players wait in the queue
+    "UPDATE_INTERVAL": 1  # seconds between pushes of changed positions in the queue
+}
+MATCH_LOG = {
+    # directory of the match log (one file per day), empty for no log
+    "DIR": os.path.join(os.path.expanduser("~"), ".battleships", "match_log"),
+    "CHECKPOINT": 16  # shots between checkpoints of the boards in the index for replays
+}
+REPLAY = {
+    "STEP": 400,  # milliseconds between shots during automatic playback
+    "LIST": 10  # number of the last matches in the replay menu
 }
 CHAT = {
     "SCROLL_SPEED": 10,
-    "MAX_MSG_SIZE": 150
+    "MAX_MSG_SIZE": 150,
+    # bytes of the lines kept in the chat log of the room, whole log must fit
+    # into one message (NETWORK["MSG_SIZE"])
+    "LOG_SIZE": 2048 * 4
+}
+CACHE = {
+    "TEXT_SURFACES": 512,
+    "WRAPPED_TEXTS": 256
 }
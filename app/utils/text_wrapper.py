@@ -0,0 +1,133 @@
+"""
+    Class that splits text on lines that fit into the given width.
+"""
+import os
+from typing import Dict, Tuple
+# utils
+from utils.settings import CACHE
+from utils.helper import get_font
+
+
+class TextWrapper:
+    """Class that splits text on lines that fit into the given width.
+    Text is split after the last space that fits into the line, words longer than
+    the line are split by characters. Advance of every glyph is measured only once
+    and split texts are cached, so unchanged text is not split again. Changed text
+    reuses lines of the last split text that depend only on their unchanged beginning,
+    so typing splits again only the last lines.
+
+    Attributes:
+        font_name - str - name of the font.
+        font_size - int - size of the font.
+        width - int - maximal width of one line in pixels.
+        advances - Dict[str, int] - measured advance of every used glyph.
+        cache - Dict[str, Tuple[str, ...]] - already split texts.
+        last - Tuple[str, Tuple[str, ...], Tuple[int, ...]] - the last split text,
+               its lines and stops of the lines (see line_end).
+    """
+    def __init__(self, font_name: str, font_size: int, width: int):
+        """Create wrapper for the font with input name and size."""
+        self.font_name = font_name
+        self.font_size = font_size
+        self.width = width
+        self.advances: Dict[str, int] = {}
+        self.cache: Dict[str, Tuple[str, ...]] = {}
+        self.last = ("", (), ())
+
+    def get_advance(self, char: str) -> int:
+        """Return advance of the glyph (measured only for the first time).
+
+        Attributes:
+            char - str - one character.
+        Return:
+            int - width of the character in pixels.
+        """
+        advance = self.advances.get(char)
+        if advance is None:
+            advance = get_font(self.font_name, self.font_size).size(char)[0]
+            self.advances[char] = advance
+        return advance
+
+    def fit(self, line: str) -> str:
+        """Shorten line until its real width (with kerning) fits into the width.
+        Sum of advances is only estimation, so it is checked once for every line.
+
+        Attributes:
+            line - str - line that was chosen by advances.
+        Return:
+            str - the same line or its beginning.
+        """
+        font = get_font(self.font_name, self.font_size)
+        while len(line) > 1 and font.size(line)[0] > self.width:
+            line = line[:-1]
+        return line
+
+    def line_end(self, text: str, start: int) -> Tuple[int, int]:
+        """Find end of the line that starts on input index using advances of the glyphs.
+
+        Attributes:
+            text - str - whole text.
+            start - int - index of the first character of the line.
+        Return:
+            Tuple[int, int] - index after the last space that fits into the line, or after
+            the last character that fits into the line if there is no such space,
+            and stop of the line: index after the first character that doesn't fit,
+            len(text) + 1 if the line ends with the text. Line depends only on the
+            characters before its stop.
+        """
+        line_width = 0
+        space = -1
+        for i in range(start, len(text)):
+            line_width += self.get_advance(text[i])
+            if line_width > self.width and i > start:
+                return (space + 1 if space >= start else i), i + 1
+            if text[i] == ' ':
+                space = i
+        return len(text), len(text) + 1
+
+    def split(self, text: str, lines: Tuple[str, ...] = (),
+              stops: Tuple[int, ...] = ()) -> Tuple[Tuple[str, ...], Tuple[int, ...]]:
+        """Split text on lines. Every character is measured by advances once,
+        every line is measured by font once (see fit), so it's linear in text length.
+
+        Attributes:
+            text - str - text for splitting.
+            lines - Tuple[str, ...] - first lines of the text that are already split.
+            stops - Tuple[int, ...] - stops of these lines (see line_end).
+        Return:
+            Tuple[Tuple[str, ...], Tuple[int, ...]] - lines of the text, at least one
+            (can be empty), and their stops.
+        """
+        lines, stops = list(lines), list(stops)
+        start = sum(len(line) for line in lines)
+        while True:
+            end, stop = self.line_end(text, start)
+            line = self.fit(text[start:end])
+            lines.append(line)
+            stops.append(stop)
+            start += len(line)
+            if start >= len(text):
+                return tuple(lines), tuple(stops)
+
+    def wrap(self, text: str) -> Tuple[str, ...]:
+        """Return split text from the cache or split it (see split). Lines of the last
+        split text whose stops are in the same beginning as in this text are reused.
+
+        Attributes:
+            text - str - text for splitting.
+        Return:
+            Tuple[str, ...] - lines of the text.
+        """
+        lines = self.cache.get(text)
+        if lines is None:
+            if len(self.cache) >= CACHE["WRAPPED_TEXTS"]:
+                self.cache.clear()
+            last, last_lines, last_stops = self.last
+            same = len(os.path.commonprefix((last, text)))
+            keep = 0
+            while keep < len(last_stops) and last_stops[keep] <= same:
+                keep += 1
+            lines, stops = self.split(text, last_lines[:keep], last_stops[:keep])
+            self.last = (text, lines, stops)
+            self.cache[text] = lines
+        return lines